@@ -0,0 +1,379 @@
+"""Adapters putting student mailroom implementations behind one interface.
+
+Every adapter imports one implementation straight from its directory under
+``students/`` and maps the benchmark operations onto that implementation's
+own API: load a population, add a donation, print the report, write the
+thank-you letters and run the challenge projection.  Adapters call what
+the implementation's menu would call, including its lookups, so that the
+timings reflect the implementation rather than the adapter.
+
+To benchmark another implementation, subclass ``Adapter``, fill in the
+operations it supports and add the class to ``ADAPTERS``.
+"""
+
+import abc
+import importlib
+import importlib.util
+import itertools
+import os
+import shutil
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+STUDENTS = Path(__file__).resolve().parents[2] / 'students'
+
+LETTER_TEMPLATE = ("Dear {name},\n\n"
+                   "Thank you for your gift of ${amount}.\n"
+                   "You have given ${total} in all.\n")
+
+
+class Unsupported(Exception):
+    """Raised for an operation an implementation does not offer."""
+
+
+def load_modules(directory, names):
+    """Import ``names`` from ``students/<directory>``.
+
+    Student modules share names such as ``mailroom`` and import their
+    siblings by bare name, so the directory's own module names are taken
+    out of ``sys.modules`` while importing and restored afterwards.  The
+    returned modules keep references to the siblings they imported.
+    """
+    path = STUDENTS / directory
+    local = {p.stem for p in path.glob('*.py')}
+    saved = {name: sys.modules.pop(name) for name in local if name in sys.modules}
+    sys.path.insert(0, str(path))
+    try:
+        return {name: importlib.import_module(name) for name in names}
+    finally:
+        sys.path.remove(str(path))
+        for name in local:
+            sys.modules.pop(name, None)
+        sys.modules.update(saved)
+
+
+class Adapter(abc.ABC):
+    """One mailroom implementation behind the benchmark operations.
+
+    Subclasses set ``name``, ``directory`` and ``modules`` and override the
+    operations.  ``load`` is abstract; it builds a fresh collection from a
+    population, a list of ``(first, last, amounts)`` with ``amounts`` a
+    tuple of floats.
+    Operations that are not overridden raise ``Unsupported``.
+    """
+
+    name = None
+    directory = None
+    modules = ()
+    requires = ()
+    _imported = {}
+
+    def __init__(self):
+        key = (self.directory, self.modules)
+        if key not in Adapter._imported:
+            Adapter._imported[key] = SimpleNamespace(
+                **load_modules(self.directory, self.modules))
+        self.mod = Adapter._imported[key]
+        self.db = None
+
+    @classmethod
+    def missing(cls):
+        """Return the required packages that are not installed."""
+        return [name for name in cls.requires
+                if importlib.util.find_spec(name) is None]
+
+    @abc.abstractmethod
+    def load(self, population):
+        """Build a fresh collection from ``population``."""
+
+    def add_donation(self, first, last, amount):
+        raise Unsupported
+
+    def report(self):
+        raise Unsupported
+
+    def letters(self, folder):
+        raise Unsupported
+
+    def challenge(self, factor, min_donation, max_donation):
+        raise Unsupported
+
+    def close(self):
+        """Release anything held by the loaded collection."""
+
+
+class DennisLeeAdapter(Adapter):
+    name = 'DennisLee'
+    directory = 'DennisLee/lesson10'
+    modules = ('mailroom',)
+    collection = 'DonorCollection'
+
+    def load(self, population):
+        self.db = getattr(self.mod.mailroom, self.collection)()
+        for first, last, amounts in population:
+            self.db.add(f'{first} {last}', amounts)
+
+    def add_donation(self, first, last, amount):
+        self.db.add(f'{first} {last}', amount)
+
+    def report(self):
+        self.db.create_report()
+
+    def letters(self, folder):
+        self.db.save_letters(folder)
+
+    def challenge(self, factor, min_donation, max_donation):
+        return self.db.challenge(factor, min_donation, max_donation)
+
+
+class DennisLeeColumnarAdapter(DennisLeeAdapter):
+    name = 'DennisLee (columnar)'
+    collection = 'ColumnarDonorCollection'
+
+
+class DustinLAdapter(Adapter):
+    name = 'Dustin_L'
+    directory = 'Dustin_L/lesson10'
+    modules = ('mailroom_fp',)
+
+    def load(self, population):
+        m = self.mod.mailroom_fp
+        self.db = m.DonorDatabase(*(m.Donor(f'{first} {last}', amounts)
+                                    for first, last, amounts in population))
+
+    def add_donation(self, first, last, amount):
+        self.db[f'{first} {last}'].add_donation(amount)
+
+    def report(self):
+        return self.db.create_report()
+
+    def letters(self, folder):
+        os.chdir(folder)
+        self.db.send_letters()
+
+    def challenge(self, factor, min_donation, max_donation):
+        return self.db.challenge(factor, min_donation, max_donation)
+
+
+class HarveyHerelaAdapter(Adapter):
+    name = 'HarveyHerela'
+    directory = 'HarveyHerela/lesson10'
+    modules = ('mailroom_db', 'mailroom_actions')
+
+    def load(self, population):
+        self.db = self.mod.mailroom_db.DonorCollection()
+        for first, last, amounts in population:
+            for amount in amounts:
+                self.db.add_donation(first, last, amount)
+
+    def add_donation(self, first, last, amount):
+        self.db.add_donation(first, last, amount)
+
+    def report(self):
+        return self.mod.mailroom_actions.create_report(self.db)
+
+    def letters(self, folder):
+        # as mailroom_main.send_letters writes them
+        for name, letter in self.mod.mailroom_actions.iter_letters(self.db, LETTER_TEMPLATE):
+            with open(os.path.join(folder, f'{name}.txt'), 'w') as outfile:
+                outfile.write(letter)
+
+    def challenge(self, factor, min_donation, max_donation):
+        # challenge_project takes a single bound
+        return self.mod.mailroom_actions.challenge_project(
+            self.db, above=min_donation, multiplier=factor)
+
+
+class PaulJurekAdapter(Adapter):
+    name = 'paul_jurek'
+    directory = 'paul_jurek/lesson10'
+    modules = ('Donor', 'DonationController')
+
+    def load(self, population):
+        self.db = self.mod.DonationController.DonationController(name='benchmark')
+        ids = self.db.build_donors_from_names((first, last) for first, last, _ in population)
+        self.ids = {}
+        for donor_id, (first, last, amounts) in zip(ids, population):
+            self.ids[first, last] = donor_id
+            for amount in amounts:
+                self.db.create_donation(donor=donor_id, amount=amount)
+
+    def add_donation(self, first, last, amount):
+        if (first, last) not in self.ids:
+            self.ids[first, last] = self.db.build_donors_from_names([(first, last)])[0]
+        self.db.create_donation(donor=self.ids[first, last], amount=amount)
+
+    def report(self):
+        self.db.donor_report()
+
+    def letters(self, folder):
+        self.db.send_letters_to_everyone(thank_you_directory=Path(folder))
+
+    def challenge(self, factor, min_donation, max_donation):
+        # challenge returns a lazy view; materialize it to build the new donors
+        projected = self.db.challenge(factor, min_donation, max_donation)
+        projected.materialize()
+        return projected
+
+
+class Rmart300Adapter(Adapter):
+    name = 'rmart300'
+    directory = 'rmart300/lesson10'
+    modules = ('donor', 'donor_collection')
+
+    def load(self, population):
+        self.db = self.mod.donor_collection.DonorCollection(
+            self.mod.donor.Donor(f'{first} {last}', amounts)
+            for first, last, amounts in population)
+
+    def add_donation(self, first, last, amount):
+        self.db.validate_and_create_thank_you(f'{first} {last}', amount)
+
+    def report(self):
+        self.db.create_report()
+
+    def letters(self, folder):
+        collection = type(self.db)
+        collection.letter_directory, old = folder + os.sep, collection.letter_directory
+        try:
+            self.db.write_letters()
+        finally:
+            collection.letter_directory = old
+
+
+class MarkLuckerothAdapter(Adapter):
+    name = 'mark_luckeroth'
+    directory = 'mark_luckeroth/lesson10'
+    modules = ('donor_io', 'donor_models', 'cli_main')
+
+    def load(self, population):
+        self.db = self.mod.donor_models.DonorCollection()
+        for first, last, amounts in population:
+            self.db.add_donor(first, last, list(amounts))
+
+    def add_donation(self, first, last, amount):
+        self.db.update(first, last, amount)
+
+    def report(self):
+        return self.mod.cli_main.create_report(self.db)
+
+    def letters(self, folder):
+        self.mod.cli_main.donors = self.db
+        os.chdir(folder)
+        self.mod.cli_main.letters()
+
+    def challenge(self, factor, min_donation, max_donation):
+        # round trips through donor_list.txt in the working directory
+        return self.db.challenge(factor, min_donation, max_donation)
+
+
+class MicahBraunAdapter(Adapter):
+    name = 'MicahBraun'
+    directory = 'MicahBraun/Lesson 10'
+    modules = ('mailroom_fp',)
+
+    def load(self, population):
+        m = self.mod.mailroom_fp
+        self.db = m.DonorSuite()
+        for first, last, amounts in population:
+            donor = m.Donor(f'{first} {last}')
+            donor.add_donation(list(amounts))
+            self.db.add_donor(donor)
+
+    def add_donation(self, first, last, amount):
+        # the same search UI.ui_add_name does
+        name = f'{first} {last}'
+        for donor in self.db.donors:
+            if name == donor.name:
+                break
+        else:
+            donor = self.mod.mailroom_fp.Donor(name)
+            self.db.add_donor(donor)
+        donor.add_donation(amount)
+
+    def report(self):
+        self.mod.mailroom_fp.UI(self.db).create_report()
+
+    def letters(self, folder):
+        # UI.write_letters prompts for a folder first
+        for donor in self.db.donors:
+            with open(os.path.join(folder, donor.name + '.txt'), 'w') as outfile:
+                outfile.write(donor.get_thank_you_tofile())
+
+    def challenge(self, factor, min_donation, max_donation):
+        return self.db.matching_factor(factor, min_donation, max_donation)
+
+
+class JaredMulhollandAdapter(Adapter):
+    name = 'jared_mulholland'
+    directory = 'jared_mulholland/lesson_10'
+    modules = ('mail_room_class_2',)
+
+    def load(self, population):
+        m = self.mod.mail_room_class_2
+        donors = [m.Donor(f'{first} {last}', list(amounts)) for first, last, amounts in population]
+        self.db = m.DonorGroup(donors[0])
+        for donor in donors[1:]:
+            self.db.add_donor = donor
+
+    def add_donation(self, first, last, amount):
+        # the same check send_thankyou does
+        name = f'{first} {last}'
+        if name in self.db.donor_list:
+            self.db.donor_dict[name].append(amount)
+        else:
+            self.db.add_donor = self.mod.mail_room_class_2.Donor(name, amount)
+
+    def report(self):
+        return self.db.create_report
+
+    def letters(self, folder):
+        self.db.send_letters = folder
+
+
+class ElmarMAdapter(Adapter):
+    name = 'elmar_m'
+    directory = 'elmar_m/lesson10'
+    modules = ('classes_mailroom',)
+    _databases = itertools.count()
+
+    def load(self, population):
+        m = self.mod.classes_mailroom
+        self.close()
+        self.path = os.path.abspath(f'elmar_m_{next(self._databases)}.db')
+        self.db = m.Mailroom(self.path)
+        for first, last, _ in population:
+            donor = m.Donor(first, last, self.path)
+            donor.create(donor.uid, first, last)
+        self.db.add_donations((f'{first}_{last}', amount)
+                              for first, last, amounts in population for amount in amounts)
+
+    def add_donation(self, first, last, amount):
+        donor = self.mod.classes_mailroom.Donor(first, last, self.path)
+        if not donor.check_existence(donor.uid):
+            donor.create(donor.uid, first, last)
+        self.db.add_donation(donor.uid, amount)
+
+    def report(self):
+        self.db.report()
+
+    def letters(self, folder):
+        shutil.copy(STUDENTS / self.directory / 'MAIL_TEMPLATE', folder)
+        os.chdir(folder)
+        self.db.mail()
+
+    def challenge(self, factor, min_donation, max_donation):
+        # preview computes the projection without changing the database
+        return self.db.preview_challenge(factor, min_donation, max_donation)
+
+    def close(self):
+        if self.db is not None:
+            self.db.pool.close()
+            self.db = None
+
+
+ADAPTERS = [DennisLeeAdapter, DennisLeeColumnarAdapter, DustinLAdapter,
+            HarveyHerelaAdapter, PaulJurekAdapter, Rmart300Adapter,
+            MarkLuckerothAdapter, MicahBraunAdapter, JaredMulhollandAdapter,
+            ElmarMAdapter]
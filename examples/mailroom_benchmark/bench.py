@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""Compare how student mailroom implementations scale.
+
+Builds synthetic donor populations of increasing size and, for every
+implementation in ``adapters.ADAPTERS``, times loading the population,
+adding donations, printing the report, writing letters and running the
+challenge.  Results are printed as a table and can be saved as JSON and
+checked against an earlier run to catch regressions.
+
+    python bench.py --sizes 1k,10k,100k
+    python bench.py --sizes 1M --only DennisLee,Dustin_L --memory
+    python bench.py --json base.json
+    python bench.py --baseline base.json --tolerance 1.5
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from adapters import ADAPTERS, Unsupported
+
+OPERATIONS = ('load', 'add', 'report', 'letters', 'challenge')
+SUFFIXES = {'k': 10 ** 3, 'M': 10 ** 6}
+
+
+def parse_size(text):
+    """Turn '1k', '2.5M' or '500' into a number of gifts."""
+    if text[-1] in SUFFIXES:
+        return int(float(text[:-1]) * SUFFIXES[text[-1]])
+    return int(text)
+
+
+def make_population(gifts, per_donor=5, seed=2018):
+    """Return a list of (first, last, amounts) holding ``gifts`` donations.
+
+    Gifts are spread as evenly as possible over ``gifts // per_donor``
+    donors.  The same arguments always give the same population.
+    """
+    rng = random.Random(seed)
+    donors = max(1, gifts // per_donor)
+    base, extra = divmod(gifts, donors)
+    return [(f'First{i}', f'Last{i}',
+             tuple(round(rng.uniform(1, 5000), 2) for _ in range(base + (i < extra))))
+            for i in range(donors)]
+
+
+def additions(population, count):
+    """Return ``count`` donations, half to existing donors and half to new ones."""
+    gifts = []
+    for i in range(count):
+        if i % 2:
+            first, last, _ = population[i % len(population)]
+        else:
+            first, last = f'New{i}', f'Donor{i}'
+        gifts.append((first, last, 100.0 + i % 50))
+    return gifts
+
+
+def operation(adapter, name, population, args, folder):
+    """Return a function running operation ``name`` once on ``adapter``."""
+    if name == 'load':
+        return lambda: adapter.load(population)
+    if name == 'add':
+        gifts = additions(population, args.adds)
+
+        def add():
+            for first, last, amount in gifts:
+                adapter.add_donation(first, last, amount)
+        return add
+    if name == 'report':
+        return adapter.report
+    if name == 'letters':
+        def letters():
+            os.makedirs(folder, exist_ok=True)
+            adapter.letters(folder)
+        return letters
+    if name == 'challenge':
+        return lambda: adapter.challenge(2, 100, 4000)
+    raise ValueError(f'unknown operation {name!r}')
+
+
+def measure(run, memory):
+    """Run once and return (seconds, peak MiB or None).
+
+    Output is discarded and the working directory is restored, since some
+    implementations print every row or chdir into their letter folder.
+    """
+    cwd = os.getcwd()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        try:
+            if memory:
+                tracemalloc.start()
+            start = time.perf_counter()
+            run()
+            seconds = time.perf_counter() - start
+            peak = None
+            if memory:
+                peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        finally:
+            if memory:
+                tracemalloc.stop()
+            os.chdir(cwd)
+    return seconds, peak
+
+
+def bench_one(adapter_cls, gifts, population, args):
+    """Yield a result dict for each operation of one implementation."""
+    def result(op, seconds=None, peak=None, note=''):
+        return {'implementation': adapter_cls.name, 'gifts': gifts,
+                'operation': op, 'seconds': seconds, 'peak_mib': peak, 'note': note}
+
+    adapter = adapter_cls()
+    try:
+        for op in args.ops:
+            if op == 'letters' and len(population) > args.letters_max_donors:
+                yield result(op, note=f'skipped, over {args.letters_max_donors} donors')
+                continue
+            try:
+                folder = os.path.abspath(f'{adapter_cls.name}_{gifts}_letters')
+                seconds, peak = measure(operation(adapter, op, population, args, folder), False)
+                if args.memory:
+                    # timed without tracemalloc, then run again to trace memory
+                    if op == 'letters':
+                        folder += '_memory'
+                    peak = measure(operation(adapter, op, population, args, folder), True)[1]
+            except Unsupported:
+                yield result(op, note='not supported')
+                continue
+            except Exception as err:
+                yield result(op, note=f'error: {type(err).__name__}: {err}'[:70])
+                if op == 'load':
+                    return
+                continue
+            yield result(op, seconds, peak)
+    finally:
+        adapter.close()
+
+
+def run(args):
+    """Benchmark every selected implementation at every size."""
+    selected = [a for a in ADAPTERS if not args.only or a.name in args.only]
+    results = []
+    too_slow = {}
+    for gifts in args.sizes:
+        population = make_population(gifts, args.per_donor)
+        for adapter_cls in selected:
+            missing = adapter_cls.missing()
+            if missing or adapter_cls.name in too_slow:
+                note = (f'needs {", ".join(missing)}' if missing
+                        else f'skipped, over {args.max_seconds}s at {too_slow[adapter_cls.name]} gifts')
+                results.append({'implementation': adapter_cls.name, 'gifts': gifts,
+                                'operation': '*', 'seconds': None, 'peak_mib': None,
+                                'note': note})
+                continue
+            print(f'{adapter_cls.name} at {gifts:,} gifts...', file=sys.stderr)
+            cwd = os.getcwd()
+            with tempfile.TemporaryDirectory() as scratch:
+                # files an implementation writes to its working directory land here
+                os.chdir(scratch)
+                try:
+                    for result in bench_one(adapter_cls, gifts, population, args):
+                        results.append(result)
+                        if (result['seconds'] or 0) > args.max_seconds:
+                            too_slow[adapter_cls.name] = gifts
+                finally:
+                    os.chdir(cwd)
+    return results
+
+
+def format_table(results):
+    """Return the results as text, fastest first within each size and operation."""
+    order = {op: i for i, op in enumerate(OPERATIONS + ('*',))}
+    rows = sorted(results, key=lambda r: (r['gifts'], order[r['operation']],
+                                          r['seconds'] is None, r['seconds'] or 0))
+    lines = ['{:>10}  {:<9}  {:<22}  {:>10}  {:>9}  {}'.format(
+        'gifts', 'operation', 'implementation', 'seconds', 'peak MiB', 'note')]
+    lines.append('-' * len(lines[0]))
+    for r in rows:
+        seconds = '' if r['seconds'] is None else f"{r['seconds']:.4f}"
+        peak = '' if r['peak_mib'] is None else f"{r['peak_mib']:.1f}"
+        lines.append('{:>10,}  {:<9}  {:<22}  {:>10}  {:>9}  {}'.format(
+            r['gifts'], r['operation'], r['implementation'], seconds, peak, r['note']))
+    return '\n'.join(lines)
+
+
+def regressions(results, baseline, tolerance, floor):
+    """Return text lines for operations slower than ``tolerance`` times the baseline.
+
+    Operations faster than ``floor`` seconds in the baseline are ignored
+    as noise.
+    """
+    before = {(r['implementation'], r['gifts'], r['operation']): r['seconds']
+              for r in baseline if r['seconds'] is not None}
+    slower = []
+    for r in results:
+        old = before.get((r['implementation'], r['gifts'], r['operation']))
+        if old is None or old < floor:
+            continue
+        if r['seconds'] is None:
+            slower.append(f"{r['implementation']} {r['operation']} at {r['gifts']:,} gifts: "
+                          f"{old:.4f}s before, now {r['note'] or 'missing'}")
+        elif r['seconds'] > old * tolerance:
+            slower.append(f"{r['implementation']} {r['operation']} at {r['gifts']:,} gifts: "
+                          f"{old:.4f}s -> {r['seconds']:.4f}s")
+    return slower
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='1k,10k,100k',
+                        help='comma separated gift counts, e.g. 1k,100k,10M (default %(default)s)')
+    parser.add_argument('--only', default='',
+                        help='comma separated implementation names to run')
+    parser.add_argument('--ops', default=','.join(OPERATIONS),
+                        help='comma separated operations (default %(default)s)')
+    parser.add_argument('--per-donor', type=int, default=5,
+                        help='average gifts per donor (default %(default)s)')
+    parser.add_argument('--adds', type=int, default=1000,
+                        help='donations added by the add operation (default %(default)s)')
+    parser.add_argument('--letters-max-donors', type=int, default=100000,
+                        help='skip letters above this many donors (default %(default)s)')
+    parser.add_argument('--max-seconds', type=float, default=60.0,
+                        help='drop an implementation from larger sizes once an '
+                             'operation takes longer (default %(default)s)')
+    parser.add_argument('--memory', action='store_true',
+                        help='run each operation again under tracemalloc for peak memory')
+    parser.add_argument('--json', help='write results to this file')
+    parser.add_argument('--baseline', help='results file from an earlier --json run')
+    parser.add_argument('--tolerance', type=float, default=1.5,
+                        help='allowed slowdown against the baseline (default %(default)s)')
+    parser.add_argument('--floor', type=float, default=0.05,
+                        help='ignore baseline timings under this many seconds (default %(default)s)')
+    parser.add_argument('--list', action='store_true', help='list implementations and exit')
+    args = parser.parse_args(argv)
+    args.sizes = [parse_size(s) for s in args.sizes.split(',') if s]
+    args.only = {s.strip() for s in args.only.split(',') if s.strip()}
+    args.ops = [s for s in args.ops.split(',') if s]
+    unknown = set(args.ops) - set(OPERATIONS)
+    if unknown:
+        parser.error(f'unknown operations: {", ".join(sorted(unknown))}')
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.list:
+        for adapter_cls in ADAPTERS:
+            print(f'{adapter_cls.name:<22}  students/{adapter_cls.directory}')
+        return 0
+
+    results = run(args)
+    print(format_table(results))
+    if args.json:
+        with open(args.json, 'w') as outfile:
+            json.dump(results, outfile, indent=1)
+    if args.baseline:
+        with open(args.baseline) as infile:
+            slower = regressions(results, json.load(infile), args.tolerance, args.floor)
+        if slower:
+            print(f'\n{len(slower)} regression(s) over {args.tolerance}x the baseline:')
+            print('\n'.join(slower))
+            return 1
+        print(f'\nno regressions over {args.tolerance}x the baseline')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,6 +1,27 @@
 #!/usr/bin/env python3
 
+import io
+import locale
+import mmap
+import multiprocessing
 import os
+import struct
+from array import array
+from collections.abc import Mapping, Sequence
+
+# Approximate bytes of text handed to each worker process
+CHUNK_SIZE = 32 * 2 ** 20
+
+# Saved databases: a header (the magic, a 1 in native byte order and the
+# item count of each section), then these arrays, each padded to 8 bytes.
+# Words are stored sorted, so a word's id is its position in that order,
+# pairs are (first id << 32 | second id) in sorted order, and each pair's
+# distinct followers are sorted by id.  Followers are a set here, so there
+# is no counts column; the sentence starters (pair rows) come last.
+DB_MAGIC = b'TRIGDB01'
+DB_SECTIONS = (('word_offsets', 'Q'), ('word_text', 'B'), ('pairs', 'Q'),
+               ('offsets', 'Q'), ('followers', 'I'), ('starters', 'I'))
+DB_HEADER = struct.Struct(f'8sQ{len(DB_SECTIONS)}Q')
 
 def build_text_databases(source_file):
     """
@@ -16,7 +37,6 @@ def build_text_databases(source_file):
 
     # Data structures, which will be compiled into a giant dict
     word_pairs = {}  # dict: key=2 consecutive words, value=following word
-    sentence_starters = list()  # list: 2 words that can begin a paragraph
 
     with open(source_file, 'r') as f:
         # Build the paragraph list
@@ -39,17 +59,10 @@ def build_text_databases(source_file):
 
     # Create dictionary with two-word keys and sets of following words
     for pg in paragraphs:
-        words = pg.split(' ')
-        for i in range(len(words[:-2])):
-            w1, w2, w3 = words[i:i+3]
-            key, value = pair_words(w1, w2), w3
-            word_pairs.setdefault(key, set())
-            word_pairs[key].add(value)
-                
+        add_word_pairs(word_pairs, pg)
+
     # Isolate keys that can function as sentence starters
-    for k in word_pairs:
-        if k[0] == k[0].upper():
-            sentence_starters.append(k)
+    sentence_starters = find_sentence_starters(word_pairs)
 
     # Creating a temp word pair file for debugging - can comment out
     with open('_word_pairs.txt', 'w') as f:
@@ -64,6 +77,342 @@ def build_text_databases(source_file):
     return {'wp': word_pairs,
             'ss': sentence_starters}
 
+def add_word_pairs(word_pairs, pg):
+    """
+    Add the trigrams of one paragraph to a word pair dictionary.
+
+    :word_pairs:  The dict of two-word keys to sets of following words.
+
+    :pg:  The paragraph text, its lines joined by single spaces.
+    """
+    words = pg.split(' ')
+    for i in range(len(words[:-2])):
+        w1, w2, w3 = words[i:i+3]
+        key, value = pair_words(w1, w2), w3
+        word_pairs.setdefault(key, set())
+        word_pairs[key].add(value)
+
+def find_sentence_starters(word_pairs):
+    """
+    List the two-word keys that can begin a sentence.
+
+    :word_pairs:  The dict of two-word keys to sets of following words.
+
+    :return:  The keys whose first character is not lower case, in
+              dictionary order.
+    """
+    return [k for k in word_pairs if k[0] == k[0].upper()]
+
+def paragraph_bounds(source_file, chunk_size=CHUNK_SIZE):
+    """
+    Split a file into byte ranges that each end just after a blank line.
+
+    Trigrams never span paragraphs, so each range can be processed on
+    its own.
+
+    :source_file:  The source file of prose text.
+
+    :chunk_size:  The approximate number of bytes in each range.
+
+    :return:  A list of offsets; each range runs from one offset to the
+              next.
+    """
+    size = os.path.getsize(source_file)
+    bounds = [0]
+    with open(source_file, 'rb') as f:
+        while bounds[-1] < size:
+            f.seek(min(bounds[-1] + chunk_size, size))
+            f.readline()  # Skip the rest of a partial line
+            for line in iter(f.readline, b''):
+                if line.strip() == b'':
+                    break
+            bounds.append(f.tell())
+    return bounds
+
+def _chunk_word_pairs(job):
+    """
+    Build the word pair dictionary for one byte range of a file, in a
+    worker process.
+
+    :job:  A tuple of (source file, start offset, stop offset, encoding).
+
+    :return:  A dict of two-word keys to sets of following words.
+    """
+    source_file, start, stop, encoding = job
+    with open(source_file, 'rb') as f:
+        f.seek(start)
+        text = f.read(stop - start).decode(encoding)
+
+    # Same paragraph rules as build_text_databases; newline=None reads
+    # line endings the way a text-mode file does
+    word_pairs, pg = {}, ''
+    for line in io.StringIO(text, newline=None):
+        if line.strip() != '':
+            pg += line.strip() + ' '
+            continue
+        add_word_pairs(word_pairs, pg.strip())
+        pg = ''
+    if pg != '':
+        add_word_pairs(word_pairs, pg.strip())
+    return word_pairs
+
+def build_text_databases_parallel(source_file, processes=None,
+                                  chunk_size=CHUNK_SIZE):
+    """
+    Create the same databases as build_text_databases, processing a large
+    file in a pool of worker processes.
+
+    The file is split at blank lines into chunks of about chunk_size
+    bytes. Each worker builds the word pairs for one chunk, and the
+    results are merged in file order so the keys (and so the sentence
+    starters) come out in the same order as build_text_databases gives.
+    Files of a single chunk are handed to build_text_databases, debug
+    files included; larger ones write no debug files.
+
+    :source_file:  The source file of prose text to process into the
+                   database.
+
+    :processes:  The number of worker processes (default: one per CPU).
+
+    :chunk_size:  The approximate number of bytes per chunk.
+
+    :return:  A dictionary of word pairs and sentence starters.
+    """
+    bounds = paragraph_bounds(source_file, chunk_size)
+    if len(bounds) <= 2:
+        return build_text_databases(source_file)
+
+    print("\n\nCreating text databases...")
+    encoding = locale.getpreferredencoding(False)
+    jobs = [(source_file, start, stop, encoding)
+            for start, stop in zip(bounds, bounds[1:])]
+    word_pairs = {}
+    with multiprocessing.Pool(processes) as pool:
+        for chunk_pairs in pool.imap(_chunk_word_pairs, jobs):
+            for key, values in chunk_pairs.items():
+                word_pairs.setdefault(key, set())
+                word_pairs[key].update(values)
+
+    return {'wp': word_pairs,
+            'ss': find_sentence_starters(word_pairs)}
+
+class MappedWords(Sequence):
+    """
+    The sorted word table of a saved database, read in place.
+    """
+    def __init__(self, offsets, text):
+        self.offsets, self.text = offsets, text
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return self.encoded(i).decode()
+
+    def encoded(self, i):
+        """
+        Get a word as UTF-8 bytes.
+
+        :i:  The word id.
+
+        :return:  The word's bytes.
+        """
+        return bytes(self.text[self.offsets[i]:self.offsets[i + 1]])
+
+    def find(self, word):
+        """
+        Find the id of a word by binary search.
+
+        :word:  The word to look for.
+
+        :return:  The word id, or **None** if the word is not in the table.
+        """
+        target, low, high = word.encode(), 0, len(self)
+        while low < high:
+            middle = (low + high) // 2
+            if self.encoded(middle) < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self) and self.encoded(low) == target:
+            return low
+        return None
+
+class MappedWordPairs(Mapping):
+    """
+    Read-only word pair dictionary of a saved database. Keys are two-word
+    strings and values are frozensets of following words, found by binary
+    search in the memory-mapped arrays.
+    """
+    def __init__(self, words, pairs, offsets, followers):
+        self.words, self.pairs = words, pairs
+        self.offsets, self.followers = offsets, followers
+
+    def row(self, key):
+        """
+        Find the position of a two-word key in the pair index.
+
+        :key:  The two-word key string.
+
+        :return:  The row number, or **None** if the key is not present.
+        """
+        words = unpair_words(key) if isinstance(key, str) else None
+        if words is None:
+            return None
+        ids = [self.words.find(w) for w in words]
+        if None in ids:
+            return None
+        pair = ids[0] << 32 | ids[1]
+        low, high = 0, len(self.pairs)
+        while low < high:
+            middle = (low + high) // 2
+            if self.pairs[middle] < pair:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self.pairs) and self.pairs[low] == pair:
+            return low
+        return None
+
+    def key(self, row):
+        """
+        Get the two-word key string at a row of the pair index.
+
+        :row:  The row number.
+
+        :return:  The two-word key string.
+        """
+        pair = self.pairs[row]
+        return pair_words(self.words[pair >> 32], self.words[pair & 0xFFFFFFFF])
+
+    def __getitem__(self, key):
+        row = self.row(key)
+        if row is None:
+            raise KeyError(key)
+        start, stop = self.offsets[row], self.offsets[row + 1]
+        return frozenset(self.words[i] for i in self.followers[start:stop])
+
+    def __contains__(self, key):
+        return self.row(key) is not None
+
+    def __iter__(self):
+        return (self.key(row) for row in range(len(self.pairs)))
+
+    def __len__(self):
+        return len(self.pairs)
+
+class MappedSentenceStarters(Sequence):
+    """
+    The sentence starter list of a saved database, in its original order.
+    """
+    def __init__(self, word_pairs, starters):
+        self.word_pairs, self.starters = word_pairs, starters
+
+    def __len__(self):
+        return len(self.starters)
+
+    def __getitem__(self, i):
+        return self.word_pairs.key(self.starters[i])
+
+def save_text_databases(db, db_file):
+    """
+    Write text databases to a binary file that load_text_databases can
+    memory-map. The file is written under a temporary name and renamed,
+    so a reader never sees a partial file.
+
+    :db:  A dictionary of word pairs and sentence starters, as
+          build_text_databases returns.
+
+    :db_file:  The file to write.
+    """
+    word_pairs = db['wp']
+    words = set()
+    for k, v in word_pairs.items():
+        words.update(unpair_words(k))
+        words.update(v)
+    encoded = sorted(w.encode() for w in words)
+    ids = {w.decode(): i for i, w in enumerate(encoded)}
+
+    rows = sorted((ids[w1] << 32 | ids[w2], k)
+                  for k in word_pairs for w1, w2 in [unpair_words(k)])
+    row_of = {k: row for row, (pair, k) in enumerate(rows)}
+    pairs, offsets, followers = array('Q'), array('Q', [0]), array('I')
+    for pair, k in rows:
+        pairs.append(pair)
+        followers.extend(sorted(ids[w] for w in word_pairs[k]))
+        offsets.append(len(followers))
+
+    word_offsets = array('Q', [0])
+    for w in encoded:
+        word_offsets.append(word_offsets[-1] + len(w))
+    sections = {
+            'word_offsets': word_offsets,
+            'word_text': b''.join(encoded),
+            'pairs': pairs,
+            'offsets': offsets,
+            'followers': followers,
+            'starters': array('I', (row_of[k] for k in db['ss']))
+    }
+
+    with open(db_file + '.tmp', 'wb') as f:
+        f.write(DB_HEADER.pack(DB_MAGIC, 1,
+                               *(len(sections[n]) for n, _ in DB_SECTIONS)))
+        for name, code in DB_SECTIONS:
+            data = memoryview(sections[name]).cast('B')
+            f.write(data)
+            f.write(bytes(-len(data) % 8))
+    os.replace(db_file + '.tmp', db_file)
+
+def load_text_databases(db_file):
+    """
+    Open text databases saved by save_text_databases without reading them
+    into memory. The file is memory-mapped read-only, so loading takes
+    milliseconds and processes using the same file share its pages.
+
+    :db_file:  The saved database file.
+
+    :return:  A dictionary of word pairs and sentence starters that
+              create_sentence can use.
+    """
+    with open(db_file, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    if len(view) < DB_HEADER.size:
+        raise ValueError(f'{db_file} is not a saved text database')
+    magic, byte_order, *sizes = DB_HEADER.unpack_from(view)
+    if magic != DB_MAGIC:
+        raise ValueError(f'{db_file} is not a saved text database')
+    if byte_order != 1:
+        raise ValueError(f'{db_file} was written with a different byte order')
+
+    sections, start = {}, DB_HEADER.size
+    for (name, code), size in zip(DB_SECTIONS, sizes):
+        length = size * array(code).itemsize
+        sections[name] = view[start:start + length].cast(code)
+        start += length + -length % 8
+
+    words = MappedWords(sections['word_offsets'], sections['word_text'])
+    word_pairs = MappedWordPairs(words, sections['pairs'],
+                                 sections['offsets'], sections['followers'])
+    return {'wp': word_pairs,
+            'ss': MappedSentenceStarters(word_pairs, sections['starters'])}
+
+def open_text_databases(source_file):
+    """
+    Load the saved databases for a source file, building and saving them
+    first if the saved file is missing or older than the source file.
+
+    :source_file:  The source file of prose text.
+
+    :return:  A dictionary of word pairs and sentence starters.
+    """
+    db_file = os.path.splitext(source_file)[0] + '.trigramdb'
+    if (not os.path.exists(db_file) or
+            os.path.getmtime(db_file) < os.path.getmtime(source_file)):
+        save_text_databases(build_text_databases_parallel(source_file),
+                            db_file)
+    return load_text_databases(db_file)
+
 def build_new_story(source_file, counter = 50):
     """
     Create a random story based on two-word keys and the possible words
@@ -79,7 +428,7 @@ def build_new_story(source_file, counter = 50):
     print('\n\nBuilding the story...')
     if type(counter) != int:
         counter = 50  # Randomizer - any number will do
-    db = build_text_databases(source_file)  # Build text processing db
+    db = open_text_databases(source_file)  # Load or build text processing db
     text = []  # The story text (one list entry for every word)
 
     # Add new sentences until the text length is at least 200 words
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Time donation ingest and report generation for growing gift histories.
+
+Run directly: `python benchmark_mailroom.py [gifts]`.  Each row should
+take roughly ten times as long as the row above it if ingest and
+reporting scale linearly with the number of gifts.  The projection
+line compares a sweep of matching scenarios run through `projector`
+with the same sweep through the batched `projections`.  The memory table
+compares the list-backed and columnar collections holding `gifts` gifts
+(default 1,000,000; pass 10000000 for the full-size comparison).
+A gift costs 8 bytes in a column against 32 bytes (a boxed float plus a
+list slot) in a list, so the ratio approaches 4x from below as the
+fixed per-donor overhead is spread over more gifts: 3.87x at 1,000,000
+gifts.
+"""
+
+import contextlib
+import io
+import random
+import sys
+import timeit
+import tracemalloc
+
+import mailroom
+
+
+def build_collection(donors, gifts_per_donor, batch,
+        factory=mailroom.DonorCollection):
+    """Create a collection by adding gifts one at a time or in batches."""
+    rng = random.Random(42)
+    coll = factory()
+    for d in range(donors):
+        name = f'Donor {d}'
+        amounts = [rng.uniform(1, 10000) for _ in range(gifts_per_donor)]
+        if batch:
+            coll.add(name, amounts)
+        else:
+            for amount in amounts:
+                coll.add(name, amount)
+    return coll
+
+
+def run_report(coll):
+    """Generate the donor report without echoing it to the console."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        coll.create_report()
+
+
+def measure_memory(factory, donors, gifts_per_donor):
+    """Return the traced memory (bytes) held by a populated collection."""
+    tracemalloc.start()
+    coll = build_collection(donors, gifts_per_donor, batch=True,
+            factory=factory)
+    if hasattr(coll, 'store'):
+        coll.store.compact()
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del coll
+    return used
+
+
+def main():
+    donors = 100
+    print(f"{'Total gifts':>12s} | {'Ingest (single)':>15s} | "
+          f"{'Ingest (batch)':>15s} | {'Report':>10s}")
+    for gifts_per_donor in (10, 100, 1000, 10000):
+        single = timeit.default_timer()
+        build_collection(donors, gifts_per_donor, batch=False)
+        single = timeit.default_timer() - single
+
+        batch = timeit.default_timer()
+        coll = build_collection(donors, gifts_per_donor, batch=True)
+        batch = timeit.default_timer() - batch
+
+        report = timeit.timeit(lambda: run_report(coll), number=10) / 10
+        print(f"{donors * gifts_per_donor:>12,d} | {single:>14.3f}s | "
+              f"{batch:>14.3f}s | {report:>9.5f}s")
+
+    scenarios = [(factor, low, low * 10) for factor in (1, 2, 3, 4)
+            for low in range(10, 1010, 40)]
+    coll = build_collection(donors, 1000, batch=True)
+    start = timeit.default_timer()
+    for scenario in scenarios:
+        coll.projection_sum(coll.projector(*scenario))
+    one_by_one = timeit.default_timer() - start
+    start = timeit.default_timer()
+    coll.projections(scenarios)
+    batched = timeit.default_timer() - start
+    print(f"\n{len(scenarios)} projection scenarios over "
+          f"{donors * 1000:,d} gifts: {one_by_one:.3f}s one at a time, "
+          f"{batched:.3f}s batched")
+
+    gifts = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    donors = 1000
+    print(f"\n{'Backend':>12s} | {'Gifts':>12s} | {'Memory (MB)':>12s} | "
+          f"{'Bytes/gift':>10s}")
+    used = {}
+    for label, factory in (('list', mailroom.DonorCollection),
+            ('columnar', mailroom.ColumnarDonorCollection)):
+        used[label] = measure_memory(factory, donors, gifts // donors)
+        print(f"{label:>12s} | {gifts:>12,d} | {used[label] / 2**20:>12.1f} | "
+              f"{used[label] / gifts:>10.1f}")
+    print(f"\nColumnar storage uses {used['list'] / used['columnar']:.2f}x "
+          f"less memory than lists.")
+
+
+if __name__ == "__main__":
+    main()
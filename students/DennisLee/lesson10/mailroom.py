@@ -1,7 +1,13 @@
 #!/usr/bin/env python3
 
 import os
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ThreadPoolExecutor
 from functools import reduce
+from itertools import accumulate, chain
 
 class Donor():
     """Contains methods and properties for a single donor."""
@@ -17,18 +23,32 @@ class Donor():
     def __repr__(self):
         return f"Donor('{self.name}', '{self.donations}')"
 
+    @property
+    def donations(self):
+        """Return the list of donation amounts from the donor."""
+        return self._donations
+
+    @donations.setter
+    def donations(self, amounts):
+        """Replace the donation history and rebuild the running totals."""
+        self._donations = []
+        self._total = 0
+        self._largest = None
+        self._smallest = None
+        self._append(self.clean_amounts(amounts))
+
     @property
     def total(self):
         """Return the cumulative donation amount from the donor."""
-        if self.donations:
-            return sum(self.donations)
+        if self._donations:
+            return self._total
         else:
             return 0.00
 
     @property
     def gifts(self):
         """Return the total number of donations from the donor."""
-        return len(self.donations)
+        return len(self._donations)
 
     @property
     def average(self):
@@ -42,7 +62,7 @@ class Donor():
     def largest(self):
         """Return the largest donation amount from the donor."""
         if self.gifts:
-            return max(self.donations)
+            return self._largest
         else:
             return 0.00
 
@@ -50,7 +70,7 @@ class Donor():
     def smallest(self):
         """Return the smallest donation amount from the donor."""
         if self.gifts:
-            return min(self.donations)
+            return self._smallest
         else:
             return 0.00
 
@@ -58,19 +78,47 @@ class Donor():
     def latest(self):
         """Return the most recent donation amount from the donor."""
         if self.gifts:
-            return self.donations[-1]
+            return self._donations[-1]
         else:
             return 0.00
-        
 
-    def add(self, amount):
-        """Add new amount(s) to the donor's gift history."""
+    @staticmethod
+    def clean_amounts(amount):
+        """
+        Validate and round a single amount or a batch of amounts.
+
+        :amount:  A number, or an iterable of numbers.  Non-numeric
+                  values and values that would round down to zero
+                  (or below) are dropped.
+
+        :return:  A list of the valid amounts, rounded to the cent.
+        """
         if isinstance(amount, (int, float)):
             amount = [amount]
-        amts = list(filter(lambda x: isinstance(x, (int, float)) 
-                and x > 0.005, self.donations + list(amount)))
-        if amts:
-            self.donations = list(map(lambda x: round(x, 2), amts))
+        return [round(x, 2) for x in amount
+                if isinstance(x, (int, float)) and x > 0.005]
+
+    def _append(self, amts):
+        """Append already-cleaned amounts and update the running totals."""
+        if not amts:
+            return
+        total, largest, smallest = self._total, self._largest, self._smallest
+        for x in amts:
+            total += x
+            if largest is None or x > largest:
+                largest = x
+            if smallest is None or x < smallest:
+                smallest = x
+        self._donations.extend(amts)
+        self._total, self._largest, self._smallest = total, largest, smallest
+
+    def add(self, amount):
+        """Add new amount(s) to the donor's gift history."""
+        self._append(self.clean_amounts(amount))
+
+    def gift(self, index=-1):
+        """Return a single donation amount from the donor's history."""
+        return self._donations[index]
 
     @property
     def form_letter(self, index=-1):
@@ -117,7 +165,7 @@ class Donor():
             extra = '(and total donations of ${0:,.2f} from {1:,d} gifts)' \
                     '\n'.format(self.total, self.gifts)
         
-        return text.format(self.name, self.donations[index], extra)
+        return text.format(self.name, self.gift(index), extra)
     
 
 class DonorCollection():
@@ -129,6 +177,7 @@ class DonorCollection():
         self.factor = 1.0
         self.floor = 0.0
         self.ceiling = 1.0e12
+        self.letter_timings = {}
 
     def __repr__(self):
         return "DonorCollection()"
@@ -170,7 +219,19 @@ class DonorCollection():
         if clean_name in self.donors:
             self.donors[clean_name].add(amount)
         else:
-            self.donors[clean_name] = Donor(clean_name, amount)
+            self.donors[clean_name] = self.new_donor(clean_name, amount)
+
+    def new_donor(self, name, amount):
+        """
+        Create the donor object used for a name not yet in the collection.
+
+        :name:  The (already stripped) name of the donor.
+
+        :amount:  The initial amount(s) given.
+
+        :return:  A new `Donor` object.
+        """
+        return Donor(name, amount)
 
     def print_donors(self):
         """
@@ -196,14 +257,23 @@ class DonorCollection():
         print(('{:<25s} | {:>15s}' + 5*' |  {:>18s}').format(*col_headings))
         print('-'*25 + '-|-' + '-'*15 + 5*('-|--' + '-'*18))
 
+        for stats in self.report_stats():
+            print(('{:<25s} | {:>15d}' + 5*' | ${:>18,.2f}').format(*stats))
+        print('\n')
+
+    def report_stats(self):
+        """
+        Generate the report statistics for each donor with gifts.
+
+        :return:  A generator of 7-member tuples: donor name, number of
+                  gifts, total, latest, average, largest and smallest gift.
+        """
         for i in self.donors.values():
             if i.gifts:
-                stats = (i.name, i.gifts, i.total, i.latest, 
+                yield (i.name, i.gifts, i.total, i.latest,
                         i.average, i.largest, i.smallest)
-                print(('{:<25s} | {:>15d}' + 5*' | ${:>18,.2f}').format(*stats))
-        print('\n')
 
-    def save_letters(self, folder=""):
+    def save_letters(self, folder="", workers=4, max_pending=64):
         """
         Save the donor thank-you letters to disk.
 
@@ -213,30 +283,45 @@ class DonorCollection():
                   the method attempts to create the folder and save
                   the letters in the created folder.
 
-        :return:  The folder containing the thank-you letters.
+        :workers:  The number of threads writing letter files.
+
+        :max_pending:  The most rendered letters held in memory at once.
+
+        :return:  The folder containing the thank-you letters.  The
+                  per-stage timings are kept in `letter_timings`.
         """
-        cur_dir = os.getcwd()
-        if not folder:
-            folder = cur_dir
+        folder = os.path.abspath(folder if folder else os.getcwd())
         try:
             os.mkdir(folder)
         except FileExistsError:  # Okay if folder already exists
             pass
-        finally:  # Save each letter, with donor name in each file name
-            os.chdir(folder)
-            folder = os.getcwd()  # Set folder name to the full OS path
-
-            # Create dict of letter names+letter texts, then write files
-            letters = {
-                    f'_{k}.txt': v.form_letter for k, v in self.donors.items()
-            }
-            for filename, text in letters.items():
-                lines = text.splitlines()
-                with open(filename, 'w') as f:
-                    for line in lines:
-                        f.write(line + '\n')
-            os.chdir(cur_dir)
-            return folder
+        # Letters are rendered lazily, with donor name in each file name
+        letters = ((f'_{k}.txt', v) for k, v in self.donors.items())
+        self.letter_timings = write_letters(
+                folder, letters, workers=workers, max_pending=max_pending)
+        return folder
+
+    def all_donations(self):
+        """
+        Iterate over every gift in the collection.
+
+        :return:  An iterable of gift amounts, donor by donor.
+        """
+        return chain.from_iterable(
+                i.donations for i in self.donors.values())
+
+    def projections(self, scenarios):
+        """
+        Project many matching scenarios in one batched call, without
+        building any new `Donor` objects.
+
+        :scenarios:  An iterable of (factor, min_donation, max_donation)
+                     tuples.
+
+        :return:  A list with one (number of matched gifts, matched
+                  total, projected total) tuple per scenario.
+        """
+        return ProjectionEngine(self.all_donations()).project_many(scenarios)
 
     def challenge(self, factor, min_donation=0.0, max_donation=1e12):
         """
@@ -341,3 +426,461 @@ class DonorCollection():
         """
         all_gifts = reduce(lambda x, y: x + y, dict(donation_list).values())
         return round(sum(all_gifts), 2)
+
+
+def write_letters(folder, letters, workers=4, max_pending=64):
+    """
+    Render thank-you letters and write them through a bounded thread pool.
+
+    :folder:  The existing folder to write the letter files to.
+
+    :letters:  An iterable of (file name, `Donor` object) pairs.  Each
+               letter is rendered only once the pool has room for it.
+
+    :workers:  The number of threads writing letter files.
+
+    :max_pending:  The most rendered letters held in memory at once.
+
+    :return:  A dict with the number of `letters` written and the
+              `render`, `write` (summed over the threads) and `total`
+              times in seconds.
+    """
+    slots = threading.BoundedSemaphore(max_pending)
+    lock = threading.Lock()
+    errors = []
+    stats = {'letters': 0, 'render': 0.0, 'write': 0.0, 'total': 0.0}
+    started = time.perf_counter()
+
+    def write(path, text):
+        began = time.perf_counter()
+        try:
+            with open(path, 'w') as f:
+                f.write(text)
+            with lock:
+                stats['letters'] += 1
+        finally:
+            with lock:
+                stats['write'] += time.perf_counter() - began
+            slots.release()
+
+    def check(future):
+        if future.exception() is not None:
+            errors.append(future.exception())
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for filename, donor in letters:
+            slots.acquire()
+            if errors:
+                slots.release()
+                break
+            began = time.perf_counter()
+            text = ''.join(line + '\n' for line in donor.form_letter.splitlines())
+            stats['render'] += time.perf_counter() - began
+            pool.submit(write, os.path.join(folder, filename), text) \
+                    .add_done_callback(check)
+    stats['total'] = time.perf_counter() - started
+    if errors:
+        raise errors[0]
+    return stats
+
+class ProjectionEngine():
+    """
+    Answers "what if a philanthropist multiplies every gift between a
+    minimum and a maximum by a factor" from one sorted copy of the gifts.
+
+    The gifts are sorted once, and a running total (in whole cents, so
+    the sums are exact) is kept alongside them.  Each scenario then costs
+    two binary searches instead of a pass over the whole donor roster.
+    """
+
+    def __init__(self, amounts):
+        """
+        Sort the gifts and build the running totals.
+
+        :amounts:  An iterable of gift amounts, rounded to the cent.
+        """
+        self.amounts = array('d', sorted(amounts))
+        self.prefix = array('q', [0])
+        self.prefix.extend(accumulate(round(x * 100) for x in self.amounts))
+
+    def __repr__(self):
+        return f"ProjectionEngine(<{len(self)} gifts>)"
+
+    def __len__(self):
+        return len(self.amounts)
+
+    def matched(self, min_donation=0.0, max_donation=1e12):
+        """
+        Find the gifts between a minimum and a maximum (inclusive).
+
+        :return:  A 2-member tuple: the number of matched gifts and
+                  their total amount.
+        """
+        lo = bisect_left(self.amounts, min_donation)
+        hi = bisect_right(self.amounts, max_donation)
+        if hi <= lo:
+            return (0, 0.00)
+        return (hi - lo, (self.prefix[hi] - self.prefix[lo]) / 100)
+
+    def project(self, factor, min_donation=0.0, max_donation=1e12):
+        """
+        Project a single matching scenario.
+
+        :factor:  The amount to multiply the matched gifts by.
+
+        :return:  A 3-member tuple: the number of matched gifts, their
+                  total, and the projected (multiplied) total.
+        """
+        factor = float(factor)
+        if factor <= 0.0:
+            raise ValueError(f"The 'factor' argument is '{factor}' - "
+                    "it should be a positive number.")
+        count, total = self.matched(float(min_donation), float(max_donation))
+        return (count, total, round(total * factor, 2))
+
+    def project_many(self, scenarios):
+        """
+        Project a batch of (factor, min_donation, max_donation) scenarios.
+
+        :return:  A list of the tuples returned by `project`.
+        """
+        return [self.project(*scenario) for scenario in scenarios]
+
+
+class DonationColumns():
+    """
+    Columnar, array-backed storage for every gift in a donor collection.
+
+    New gifts go to a tail of parallel amount, donor-id and (optionally)
+    timestamp columns, with a per-donor index of tail rows so a donor's
+    gifts can be read without touching anyone else's.  `compact` folds
+    the tail into the main columns, which are grouped by donor so that
+    donor `i` owns the rows from `offsets[i]` up to `offsets[i + 1]`.
+    Once compacted, the donor of a row is implied by the offsets, so a
+    gift costs 8 bytes (16 bytes with timestamps) instead of a boxed
+    float plus a list slot.
+
+    Compacting rebuilds every column, so it only happens when the tail
+    outgrows `compact_ratio` of the main columns (and at least
+    `compact_min` rows), or when a donor's history is replaced.
+    Per-donor count, total, latest, largest and smallest are kept up to
+    date as gifts arrive, so `donor_stats` and `stats` never scan gifts.
+    """
+
+    compact_min = 1024
+    compact_ratio = 0.25
+
+    def __init__(self, timestamps=False):
+        """
+        Create empty columns.
+
+        :timestamps:  If `True`, also record when each gift was added
+                      (seconds since the epoch).
+        """
+        self.amounts = array('d')
+        self.times = array('q') if timestamps else None
+        self.offsets = array('q', [0])
+        self.tail_amounts = array('d')
+        self.tail_ids = array('q')
+        self.tail_times = array('q') if timestamps else None
+        self.tail_rows = {}  # dict: key=donor id, value=list of tail rows
+        # Running per-donor statistics, indexed by donor id
+        self.counts = array('q')
+        self.totals = array('d')
+        self.latest = array('d')
+        self.largest = array('d')
+        self.smallest = array('d')
+
+    def __repr__(self):
+        return f"DonationColumns(timestamps={self.times is not None})"
+
+    def __len__(self):
+        return len(self.amounts) + len(self.tail_amounts)
+
+    @property
+    def donor_count(self):
+        """Return the number of donors registered in the store."""
+        return len(self.offsets) - 1
+
+    def new_donor(self):
+        """
+        Register a new donor with an empty gift history.
+
+        :return:  The integer id of the new donor.
+        """
+        self.offsets.append(self.offsets[-1])
+        for column in (self.counts, self.totals, self.latest, self.largest,
+                       self.smallest):
+            column.append(0)
+        return self.donor_count - 1
+
+    def _update_stats(self, donor_id, amounts):
+        """Fold new gifts into a donor's running statistics."""
+        if not self.counts[donor_id]:
+            self.largest[donor_id] = self.smallest[donor_id] = amounts[0]
+        total = self.totals[donor_id]
+        for x in amounts:
+            total += x
+        self.totals[donor_id] = total
+        self.counts[donor_id] += len(amounts)
+        self.latest[donor_id] = amounts[-1]
+        self.largest[donor_id] = max(self.largest[donor_id], max(amounts))
+        self.smallest[donor_id] = min(self.smallest[donor_id], min(amounts))
+
+    def append(self, donor_id, amounts, when=None):
+        """
+        Append gifts for a single donor to the tail columns.
+
+        :donor_id:  The id returned by `new_donor`.
+
+        :amounts:  A list of validated, rounded gift amounts.
+
+        :when:  The time of the gifts in seconds since the epoch.  This
+                value defaults to the current time, and is ignored unless
+                the store records timestamps.
+
+        :return:  None.
+        """
+        if not amounts:
+            return
+        if donor_id not in range(self.donor_count):
+            raise IndexError(f"Donor id '{donor_id}' is not in the store.")
+        count = len(amounts)
+        start = len(self.tail_amounts)
+        self.tail_rows.setdefault(donor_id, []).extend(
+                range(start, start + count))
+        self.tail_amounts.extend(amounts)
+        self.tail_ids.extend(array('q', [donor_id]) * count)
+        self._update_stats(donor_id, amounts)
+        if self.tail_times is not None:
+            stamp = int(time.time() if when is None else when)
+            self.tail_times.extend(array('q', [stamp]) * count)
+        if len(self.tail_amounts) > max(self.compact_min,
+                                        self.compact_ratio * len(self.amounts)):
+            self.compact()
+
+    def compact(self):
+        """
+        Merge the tail columns into the donor-grouped main columns.  The
+        gifts of each donor keep the order in which they were added.
+
+        :return:  None.
+        """
+        ids = self.tail_ids
+        if not ids:
+            return
+        # Find runs of consecutive tail rows belonging to the same donor
+        runs = {}
+        start = 0
+        for row in range(1, len(ids) + 1):
+            if row == len(ids) or ids[row] != ids[start]:
+                runs.setdefault(ids[start], []).append((start, row))
+                start = row
+
+        amounts, offsets = array('d'), array('q', [0])
+        times = None if self.times is None else array('q')
+        for donor_id in range(self.donor_count):
+            first, last = self.offsets[donor_id], self.offsets[donor_id + 1]
+            amounts.extend(self.amounts[first:last])
+            if times is not None:
+                times.extend(self.times[first:last])
+            for first, last in runs.get(donor_id, ()):
+                amounts.extend(self.tail_amounts[first:last])
+                if times is not None:
+                    times.extend(self.tail_times[first:last])
+            offsets.append(len(amounts))
+
+        self.amounts, self.times, self.offsets = amounts, times, offsets
+        self.tail_amounts = array('d')
+        self.tail_ids = array('q')
+        self.tail_rows = {}
+        if self.tail_times is not None:
+            self.tail_times = array('q')
+
+    def donations(self, donor_id):
+        """
+        Return the gift amounts of a donor as an `array('d')`: the
+        donor's segment of the main columns followed by any tail rows.
+        """
+        result = self.amounts[self.offsets[donor_id]:self.offsets[donor_id + 1]]
+        tail = self.tail_amounts
+        result.extend(tail[row] for row in self.tail_rows.get(donor_id, ()))
+        return result
+
+    def gift(self, donor_id, index=-1):
+        """
+        Return one gift amount of a donor without copying the others.
+
+        :index:  The position in the donor's history; negative values
+                 count back from the most recent gift.
+        """
+        count = self.counts[donor_id]
+        if index not in range(-count, count):
+            raise IndexError('gift index out of range')
+        index %= count
+        first, last = self.offsets[donor_id], self.offsets[donor_id + 1]
+        if index < last - first:
+            return self.amounts[first + index]
+        return self.tail_amounts[self.tail_rows[donor_id][index - (last - first)]]
+
+    def replace(self, donor_id, amounts, when=None):
+        """
+        Replace the whole gift history of a single donor.
+
+        :donor_id:  The id returned by `new_donor`.
+
+        :amounts:  A list of validated, rounded gift amounts.
+
+        :when:  The time of the gifts, as for `append`.
+
+        :return:  None.
+        """
+        if donor_id not in range(self.donor_count):
+            raise IndexError(f"Donor id '{donor_id}' is not in the store.")
+        self.compact()
+        first, last = self.offsets[donor_id], self.offsets[donor_id + 1]
+        self.amounts[first:last] = array('d', amounts)
+        if self.times is not None:
+            stamp = int(time.time() if when is None else when)
+            self.times[first:last] = array('q', [stamp]) * len(amounts)
+        shift = len(amounts) - (last - first)
+        if shift:
+            offsets = self.offsets
+            for i in range(donor_id + 1, len(offsets)):
+                offsets[i] += shift
+        for column in (self.counts, self.totals, self.latest, self.largest,
+                       self.smallest):
+            column[donor_id] = 0
+        if amounts:
+            self._update_stats(donor_id, amounts)
+
+    def donor_stats(self, donor_id):
+        """
+        Calculate the statistics for a single donor.
+
+        :return:  A 5-member tuple: number of gifts, total, latest,
+                  largest and smallest gift.
+        """
+        if not self.counts[donor_id]:
+            return (0, 0.00, 0.00, 0.00, 0.00)
+        return (self.counts[donor_id], self.totals[donor_id],
+                self.latest[donor_id], self.largest[donor_id],
+                self.smallest[donor_id])
+
+    def stats(self):
+        """
+        Return the statistics for every donor from the running per-donor
+        columns, without reading any gift amounts.
+
+        :return:  A generator of 6-member tuples: donor id, followed by
+                  the values returned by `donor_stats`.
+        """
+        for donor_id in range(self.donor_count):
+            yield (donor_id,) + self.donor_stats(donor_id)
+
+
+class ColumnarDonor(Donor):
+    """A `Donor` whose gift history is kept in a `DonationColumns` store."""
+
+    def __init__(self, name, amount, store):
+        """
+        Initialize with the donor name, initial donation amount and the
+        store shared by the donor collection.
+        """
+        if not name or not name.strip():
+            raise ValueError("A non-blank name must be specified.")
+        self.name = name.strip()
+        self.store = store
+        self.donor_id = store.new_donor()
+        self.add(amount)
+
+    @property
+    def donations(self):
+        """Return a list of the donation amounts from the donor."""
+        return self.store.donations(self.donor_id).tolist()
+
+    @donations.setter
+    def donations(self, amounts):
+        """Replace the donor's segment of the store with new amounts."""
+        self.store.replace(self.donor_id, self.clean_amounts(amounts))
+
+    @property
+    def total(self):
+        """Return the cumulative donation amount from the donor."""
+        return self.store.donor_stats(self.donor_id)[1]
+
+    @property
+    def gifts(self):
+        """Return the total number of donations from the donor."""
+        return self.store.counts[self.donor_id]
+
+    @property
+    def largest(self):
+        """Return the largest donation amount from the donor."""
+        return self.store.donor_stats(self.donor_id)[3]
+
+    @property
+    def smallest(self):
+        """Return the smallest donation amount from the donor."""
+        return self.store.donor_stats(self.donor_id)[4]
+
+    @property
+    def latest(self):
+        """Return the most recent donation amount from the donor."""
+        return self.store.donor_stats(self.donor_id)[2]
+
+    def add(self, amount):
+        """Add new amount(s) to the donor's gift history."""
+        self.store.append(self.donor_id, self.clean_amounts(amount))
+
+    def gift(self, index=-1):
+        """Return a single donation amount straight from the store."""
+        return self.store.gift(self.donor_id, index)
+
+
+class ColumnarDonorCollection(DonorCollection):
+    """
+    A `DonorCollection` that keeps every gift in one `DonationColumns`
+    store instead of a Python list per donor.
+    """
+
+    def __init__(self, timestamps=False):
+        """
+        Create an empty collection backed by a columnar store.
+
+        :timestamps:  If `True`, the store also records when each gift
+                      was added.
+        """
+        super().__init__()
+        self.store = DonationColumns(timestamps)
+
+    def __repr__(self):
+        return "ColumnarDonorCollection()"
+
+    def new_donor(self, name, amount):
+        """Create a `ColumnarDonor` sharing this collection's store."""
+        return ColumnarDonor(name, amount, self.store)
+
+    def all_donations(self):
+        """
+        Return every gift in the collection, straight from the store.
+
+        :return:  The compacted `array('d')` amount column.
+        """
+        self.store.compact()
+        return self.store.amounts
+
+    def report_stats(self):
+        """
+        Generate the report statistics for each donor with gifts, using
+        a single batched pass over the store.
+
+        :return:  A generator of 7-member tuples: donor name, number of
+                  gifts, total, latest, average, largest and smallest gift.
+        """
+        names = {d.donor_id: d.name for d in self.donors.values()}
+        for donor_id, gifts, total, latest, largest, smallest in \
+                self.store.stats():
+            if gifts and donor_id in names:
+                yield (names[donor_id], gifts, total, latest,
+                        1.0 * total / gifts, largest, smallest)
@@ -157,7 +157,10 @@ class DonorUI():
         except OSError:
             print(f"Specified folder '{new_dir}' is not valid.")
         else:
-            print(f"\nLetters saved in folder '{full_dir_name}'.\n")
+            print(f"\nLetters saved in folder '{full_dir_name}'.")
+            t = self.collection.letter_timings
+            print(f"{t['letters']:,d} letters: rendered in {t['render']:.3f}s, "
+                    f"written in {t['write']:.3f}s, {t['total']:.3f}s total.\n")
 
     def get_resp(self, prompt, **kwargs):
         return input(prompt).strip()
@@ -183,16 +186,15 @@ class DonorUI():
             print("\n\nYou did not enter three numbers.\n\n")
             self.exit_screen()
         else:
-            cur_total = self.collection.projection_sum(
-                    self.collection.projector(1.0, 0.0, 1e12))
-            gifts_used_to_multiply = self.collection.projection_sum(
-                    self.collection.projector(1.0, min_gift, max_gift))
             try:
-                proj_gift = self.collection.projection_sum(
-                        self.collection.projector(match_factor, min_gift, max_gift))
+                results = self.collection.projections([
+                        (1.0, 0.0, 1e12),
+                        (match_factor, min_gift, max_gift)])
             except ValueError as ve:
                 print(ve)
             else:
+                cur_total = results[0][1]
+                gifts_used_to_multiply, proj_gift = results[1][1:]
                 print("\n\n",
                         f"Current donation total:  ${cur_total:>18,.2f}",
                         f"Matched donations:       ${gifts_used_to_multiply:>18,.2f}",
@@ -1,4 +1,4 @@
-import unittest, mailroom, mailroom_ui
+import contextlib, io, os, tempfile, unittest, mailroom, mailroom_ui
 
 
 class MailroomTestCase(unittest.TestCase):
@@ -57,6 +57,66 @@ class MailroomTestCase(unittest.TestCase):
         self.assertEqual(projected['Mama Murphy'], [1800, 2355.60])
         self.assertEqual(projected['Pat Panda'], [])
 
+    def test_projections(self):
+        scenarios = [(3, 100, 1e12), (3, 0, 1000), (3, 100, 1000),
+                (2, 48, 48), (1.5, 2000, 100)]
+        results = self.coll.projections(scenarios)
+        for (factor, low, high), (count, matched, projected) in \
+                zip(scenarios, results):
+            self.assertAlmostEqual(projected, self.coll.projection_sum(
+                    self.coll.projector(factor, low, high)), places=1)
+            self.assertAlmostEqual(matched, self.coll.projection_sum(
+                    self.coll.projector(1, low, high)))
+        self.assertEqual(results[3], (1, 48.0, 96.0))
+        self.assertEqual(results[4], (0, 0.00, 0.00))
+        with self.assertRaises(ValueError):
+            self.coll.projections([(0, 0, 100)])
+
+    def test_save_letters(self):
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp:
+            folder = self.coll.save_letters(os.path.join(tmp, 'letters'),
+                    workers=3, max_pending=2)
+            self.assertEqual(os.getcwd(), cwd)
+            self.assertEqual(sorted(os.listdir(folder)),
+                    sorted(f'_{name}.txt' for name in self.coll.donors))
+            with open(os.path.join(folder, '_Pat Panda.txt')) as f:
+                self.assertEqual(f.read().splitlines(),
+                        self.coll['Pat Panda'].form_letter.splitlines())
+        self.assertEqual(self.coll.letter_timings['letters'], 6)
+        self.assertGreaterEqual(self.coll.letter_timings['total'],
+                self.coll.letter_timings['render'])
+
+    def test_save_letters_error(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with self.assertRaises(OSError):
+                mailroom.write_letters(os.path.join(tmp, 'missing'),
+                        self.coll.donors.items())
+
+    def test_donor_aggregates(self):
+        donor = self.coll['Papa Smurf']
+        self.assertEqual(donor.gifts, 6)
+        self.assertEqual(donor.total, sum(donor.donations))
+        self.assertEqual(donor.largest, 2804.83)
+        self.assertEqual(donor.smallest, 48)
+        self.assertEqual(donor.latest, 48)
+        donor.add([5000.004, 'bad', -3, 0.001, 12.345])
+        self.assertEqual(donor.donations[-2:], [5000.0, 12.35])
+        self.assertEqual(donor.gifts, 8)
+        self.assertEqual(donor.total, sum(donor.donations))
+        self.assertEqual(donor.largest, 5000.0)
+        self.assertEqual(donor.latest, 12.35)
+
+    def test_donor_aggregates_reset(self):
+        donor = self.coll['Red Herring']
+        donor.donations = [10, 20.556]
+        self.assertEqual(donor.donations, [10, 20.56])
+        self.assertAlmostEqual(donor.total, 30.56)
+        self.assertEqual(donor.smallest, 10)
+        donor.donations = []
+        self.assertEqual(donor.total, 0.00)
+        self.assertEqual(donor.largest, 0.00)
+
     def test_do_all(self):
         self.input_strings = [
             '0', '01', '5', '6', '7', '8', 'a',  # Bad main menu input
@@ -112,5 +172,113 @@ class MailroomTestCase(unittest.TestCase):
         return return_value.strip()
         
 
+class ColumnarMailroomTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.donor_history = {
+                'Red Herring': [65820.5, 31126.37, 15000, 2500],
+                'Papa Smurf': [210.64, 1000, 57.86, 2804.83, 351.22, 48],
+                'Pat Panda': [55324.4, 35570.53, 14920.50],
+                'Daphne Dastardly': [82]
+        }
+        self.coll = mailroom.DonorCollection()
+        self.cols = mailroom.ColumnarDonorCollection()
+        for name, amts in self.donor_history.items():
+            self.coll.add(name, amts)
+            self.cols.add(name, amts)
+
+    def report_text(self, coll):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            coll.create_report()
+        return out.getvalue()
+
+    def test_report_matches_list_backend(self):
+        self.coll.add('Pat Panda', 12.5)
+        self.cols.add('Pat Panda', 12.5)
+        self.assertEqual(self.report_text(self.cols),
+                self.report_text(self.coll))
+
+    def test_interleaved_adds_keep_order(self):
+        self.cols.add('Red Herring', [1, 2])
+        self.cols.add('Daphne Dastardly', 3)
+        self.cols.add('Red Herring', 4.444)
+        self.assertEqual(self.cols['Red Herring'].donations,
+                [65820.5, 31126.37, 15000, 2500, 1, 2, 4.44])
+        self.assertEqual(self.cols['Daphne Dastardly'].donations, [82, 3])
+        self.assertEqual(self.cols['Red Herring'].latest, 4.44)
+        self.assertEqual(self.cols['Red Herring'].smallest, 1)
+        self.assertEqual(len(self.cols.store), 18)
+
+    def test_donor_stats(self):
+        donor = self.cols['Papa Smurf']
+        self.assertEqual(donor.gifts, 6)
+        self.assertEqual(donor.total, self.coll['Papa Smurf'].total)
+        self.assertEqual(donor.largest, 2804.83)
+        self.assertEqual(donor.smallest, 48)
+        self.assertEqual(self.cols.new_donor('Nobody', []).total, 0.00)
+
+    def test_replace_donations(self):
+        self.cols.add('Red Herring', 7)
+        donor = self.cols['Papa Smurf']
+        donor.donations = [5, 'x', 10.004]
+        self.assertEqual(donor.donations, [5, 10.0])
+        self.assertEqual(donor.total, 15.0)
+        self.assertEqual(self.cols['Red Herring'].donations,
+                [65820.5, 31126.37, 15000, 2500, 7])
+        self.assertEqual(self.cols['Pat Panda'].donations,
+                self.donor_history['Pat Panda'])
+        self.cols['Daphne Dastardly'].donations = []
+        self.assertEqual(self.cols['Daphne Dastardly'].gifts, 0)
+        self.assertEqual(self.cols['Pat Panda'].latest, 14920.50)
+
+    def test_reads_do_not_compact(self):
+        store = self.cols.store
+        store.compact()
+        self.cols.add('Pat Panda', 12.5)
+        self.assertEqual(self.cols['Pat Panda'].latest, 12.5)
+        self.assertEqual(self.cols['Pat Panda'].gifts, 4)
+        self.assertEqual(len(store.tail_amounts), 1)
+        self.assertEqual(self.cols['Pat Panda'].gift(0), 55324.4)
+        self.assertEqual(self.cols['Pat Panda'].gift(-2), 14920.50)
+        self.assertIn('$12.50', self.cols['Pat Panda'].form_letter)
+        stats = dict((row[0], row[1:]) for row in store.stats())
+        self.assertEqual(stats[self.cols['Pat Panda'].donor_id][0], 4)
+        self.assertEqual(stats[self.cols['Pat Panda'].donor_id][2], 12.5)
+        self.assertEqual(len(store.tail_amounts), 1)
+
+    def test_tail_compacts_past_threshold(self):
+        store = self.cols.store
+        store.compact()
+        for i in range(store.compact_min + 1):
+            self.cols.add('Daphne Dastardly', 1)
+        self.assertEqual(len(store.tail_amounts), 0)
+        self.assertEqual(self.cols['Daphne Dastardly'].gifts,
+                store.compact_min + 2)
+
+    def test_challenge(self):
+        new_coll = self.cols.challenge(3, 100, 1000)
+        self.assertEqual(new_coll['Papa Smurf'].donations,
+                [631.92, 3000, 1053.66])
+        self.assertEqual(new_coll['Red Herring'].donations, [])
+
+    def test_projections(self):
+        scenarios = [(3, 100, 1000), (2, 0, 1e12)]
+        self.assertEqual(self.cols.projections(scenarios),
+                self.coll.projections(scenarios))
+        engine = mailroom.ProjectionEngine(self.cols.all_donations())
+        self.assertEqual(len(engine), 14)
+        self.assertEqual(engine.matched(100, 1000), (3, 1561.86))
+
+    def test_timestamps(self):
+        cols = mailroom.ColumnarDonorCollection(timestamps=True)
+        cols.add('Red Herring', [10, 20])
+        cols['Red Herring'].store.append(0, [30], when=1500000000)
+        cols.store.compact()
+        self.assertEqual(len(cols.store.times), 3)
+        self.assertEqual(cols.store.times[-1], 1500000000)
+        self.assertIsNone(self.cols.store.times)
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""Unit Tests for Trigrams"""
+
+import os
+import pathlib
+import pickle
+import random
+import tempfile
+import unittest
+from collections import Counter
+
+import trigrams as tri
+
+
+class TestTrigramModel(unittest.TestCase):
+    """Test class containing all unit tests for the compact trigram model"""
+    corpus = pathlib.Path(__file__).with_name('sherlock_small.txt')
+
+    def setUp(self):
+        self.tri_dict = tri.create_trigram_dict(self.corpus)
+        self.model = tri.create_trigram_model(self.corpus)
+
+    def test_same_trigrams_as_dict(self):
+        self.assertEqual(set(self.tri_dict), set(self.model))
+        self.assertEqual(len(self.tri_dict), len(self.model))
+        for key, followers in self.tri_dict.items():
+            self.assertEqual(Counter(followers), Counter(dict(self.model[key].counts())))
+            self.assertEqual(Counter(followers), Counter(self.model[key]))
+
+    def test_missing_keys(self):
+        self.assertNotIn('not there', self.model)
+        self.assertNotIn('one', self.model)
+        with self.assertRaises(KeyError):
+            self.model['not there']
+
+    def test_followers_sequence(self):
+        tri_counts = tri.TrigramCounts()
+        tri_counts.add_words('a b c a b d a b c'.split())
+        model = tri_counts.freeze()
+        self.assertEqual(sorted(model), ['a b', 'b c', 'b d', 'c a', 'd a'])
+        self.assertEqual(list(model['a b']), ['c', 'c', 'd'])
+        self.assertEqual(model['a b'][-1], 'd')
+        with self.assertRaises(IndexError):
+            model['a b'][3]
+
+    def test_trigram_text(self):
+        random.seed(4)
+        text = tri.create_trigram_text(self.model, 50).split()
+        self.assertLessEqual(len(text), 50)
+        for i in range(len(text) - 2):
+            self.assertIn(text[i + 2], self.tri_dict[f'{text[i]} {text[i + 1]}'])
+
+    def test_sampler_weights(self):
+        sampler = self.model.sampler()
+        self.assertIs(sampler, self.model.sampler())
+        for row in range(len(self.model.pairs)):
+            start, stop = self.model.offsets[row], self.model.offsets[row + 1]
+            size = stop - start
+            total = sum(self.model.counts[start:stop])
+            weights = Counter()
+            for slot in range(start, stop):
+                weights[slot] += sampler.prob[slot]
+                weights[sampler.alias[slot]] += 1 - sampler.prob[slot]
+            for slot in range(start, stop):
+                self.assertAlmostEqual(weights[slot] / size, self.model.counts[slot] / total)
+
+    def test_sampler_next_rows(self):
+        sampler = self.model.sampler()
+        pairs = list(self.model)
+        for row, key in enumerate(pairs):
+            start, stop = self.model.offsets[row], self.model.offsets[row + 1]
+            for slot in range(start, stop):
+                next_key = f'{key.split()[1]} {self.model.words[self.model.followers[slot]]}'
+                next_row = sampler.next_rows[slot]
+                self.assertEqual(pairs[next_row] if next_row >= 0 else None,
+                                 next_key if next_key in self.model else None)
+
+    def test_sampler_iter_words(self):
+        rng = random.Random(7)
+        words = list(self.model.sampler().iter_words(1001, rng))
+        self.assertEqual(len(words), 1001)
+        self.assertTrue(set(words) <= set(self.model.words))
+
+    def test_sampler_empty_model(self):
+        with self.assertRaises(IndexError):
+            tri.TrigramModel().sampler().walk(10)
+
+    def test_saved_model(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            model_path = pathlib.Path(tmp, 'small.trigrams')
+            tri.save_trigram_model(self.model, model_path)
+            mapped = tri.MappedTrigramModel(model_path)
+            self.assertEqual(len(mapped), len(self.model))
+            self.assertEqual(sorted(mapped), sorted(self.model))
+            for key in self.model:
+                self.assertEqual(sorted(mapped[key].counts()), sorted(self.model[key].counts()))
+            self.assertNotIn('not there', mapped)
+            self.assertEqual(list(mapped.words), sorted(self.model.words))
+            for word_id, word in enumerate(sorted(self.model.words)):
+                self.assertEqual(mapped.word_ids[word], word_id)
+            with self.assertRaises(KeyError):
+                mapped.word_ids['zzzz']
+
+            ordered = tri.sort_words(self.model)
+            self.assertIs(tri.sort_words(ordered), ordered)
+            self.assertEqual(list(mapped), list(ordered))
+            sampler, built = mapped.sampler(), ordered.sampler()
+            self.assertEqual(list(sampler.prob), list(built.prob))
+            self.assertEqual(list(sampler.alias), list(built.alias))
+            self.assertEqual(list(sampler.next_rows), list(built.next_rows))
+            random.seed(4)
+            text = tri.create_trigram_text(mapped, 50).split()
+            for i in range(len(text) - 2):
+                self.assertIn(text[i + 2], self.tri_dict[f'{text[i]} {text[i + 1]}'])
+
+            copy = pickle.loads(pickle.dumps(mapped))
+            self.assertEqual(list(copy), list(mapped))
+
+    def test_empty_saved_model(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            model_path = pathlib.Path(tmp, 'empty.trigrams')
+            tri.save_trigram_model(tri.TrigramModel(), model_path)
+            self.assertEqual(len(tri.MappedTrigramModel(model_path)), 0)
+
+    def test_not_a_model_file(self):
+        with self.assertRaises(ValueError):
+            tri.MappedTrigramModel(self.corpus)
+
+    def test_open_trigram_model(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            corpus = pathlib.Path(tmp, 'small.txt')
+            corpus.write_bytes(self.corpus.read_bytes())
+            model = tri.open_trigram_model(corpus)
+            self.assertIsInstance(model, tri.MappedTrigramModel)
+            self.assertEqual(sorted(model), sorted(self.model))
+
+            # a corpus newer than its model file is rebuilt
+            os.utime(corpus.with_suffix('.trigrams'), (0, 0))
+            with open(corpus, 'a') as corpus_file:
+                corpus_file.write(' zebra crossing ahead')
+            self.assertIn('zebra crossing', tri.open_trigram_model(corpus))
+        self.assertEqual(len(tri.open_trigram_model(pathlib.Path('no_such_file.txt'))), 0)
+
+    def test_missing_file(self):
+        self.assertEqual(len(tri.create_trigram_model(pathlib.Path('no_such_file.txt'))), 0)
+        self.assertEqual(len(tri.create_trigram_model_parallel(pathlib.Path('no_such_file.txt'))), 0)
+
+    def test_chunk_bounds(self):
+        bounds = tri.chunk_bounds(self.corpus, 100)
+        data = self.corpus.read_bytes()
+        self.assertEqual((bounds[0], bounds[-1]), (0, len(data)))
+        self.assertGreater(len(bounds), 3)
+        for cut in bounds[1:-1]:
+            self.assertTrue(data[cut:cut + 1].isspace())
+
+    def test_parallel_model(self):
+        expected = tri.sort_words(self.model)
+        for chunk_size in (1, 40, 100, 10 ** 9):
+            model = tri.create_trigram_model_parallel(self.corpus, processes=2,
+                                                      chunk_size=chunk_size)
+            self.assertEqual(model.words, expected.words)
+            self.assertEqual(model.pairs, expected.pairs)
+            self.assertEqual(model.offsets, expected.offsets)
+            self.assertEqual(model.followers, expected.followers)
+            self.assertEqual(model.counts, expected.counts)
+
+    def test_freeze_sorted_words(self):
+        tri_counts = tri.TrigramCounts()
+        with open(self.corpus) as corpus:
+            tri_counts.add_words(tri.iter_words(corpus))
+        model = tri_counts.freeze(sorted_words=True)
+        expected = tri.sort_words(self.model)
+        self.assertEqual(model.words, sorted(self.model.words))
+        self.assertEqual(model.pairs, expected.pairs)
+        self.assertEqual(model.counts, expected.counts)
+
+    def test_pickle_model(self):
+        copy = pickle.loads(pickle.dumps(self.model))
+        self.assertEqual(dict(copy.items()).keys(), dict(self.model.items()).keys())
+        self.assertEqual(copy.counts, self.model.counts)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""Trigram Memory
+
+Compares peak memory and build time of create_trigram_dict,
+create_trigram_model and create_trigram_model_parallel.  Each builder
+runs in its own process so the peak resident size of one does not hide
+the other.  For the parallel builder the peak is that of the parent or
+of the largest worker, whichever is higher.  The memory held by the
+finished model is reported next to it, so the cost of the TrigramCounts
+used while building shows up as the difference.
+
+    python trigram_memory.py                      # sherlock.txt
+    python trigram_memory.py --synthetic-mb 1024 --skip dict  # 1 GB generated corpus
+"""
+import argparse
+import itertools
+import os
+import pathlib
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+import trigrams
+
+BUILDERS = {'dict': trigrams.create_trigram_dict,
+            'model': trigrams.create_trigram_model,
+            'parallel': trigrams.create_trigram_model_parallel}
+
+
+def zipf_vocabulary(seed_path, size):
+    """Rank the words of seed_path by frequency and pad them out to size.
+
+    The padding words are seed words with their rank appended, so they
+    look like words to iter_words but never occur in the seed corpus.
+
+    Args:
+        seed_path (pathlib.Path): Corpus to take words from
+        size (int): Number of words wanted
+
+    Returns:
+        list: Words, most frequent first
+    """
+    with open(seed_path) as corpus:
+        ranked = [word for word, _ in Counter(trigrams.iter_words(corpus)).most_common()]
+    return ranked + [f'{ranked[rank % len(ranked)]}{rank}' for rank in range(len(ranked), size)]
+
+
+def write_synthetic_corpus(seed_path, out_path, size_mb, seed=0,
+                           novelty=0.05, vocab_size=200_000, exponent=1.1):
+    """Write a corpus of roughly size_mb megabytes generated from seed_path.
+
+    Text is a random walk over the seed corpus' trigrams, restarting at a
+    random pair at dead ends.  Each word is replaced, with probability
+    novelty, by one drawn from a Zipf distribution over a vocabulary much
+    larger than the seed's, so new trigrams keep appearing as the corpus
+    grows, as they do in real text, instead of the walk only repeating
+    the seed's own trigrams.
+
+    Args:
+        seed_path (pathlib.Path): Corpus to take trigrams from
+        out_path (pathlib.Path): File to write
+        size_mb (int): Target size in megabytes
+        seed (int): Random seed
+        novelty (float): Share of words drawn from the Zipf vocabulary
+        vocab_size (int): Words in the Zipf vocabulary
+        exponent (float): Zipf exponent, higher favours frequent words
+    """
+    rng = random.Random(seed)
+    vocab = zipf_vocabulary(seed_path, vocab_size)
+    cum_weights = list(itertools.accumulate(rank ** -exponent for rank in range(1, len(vocab) + 1)))
+    sampler = trigrams.create_trigram_model(seed_path).sampler()
+    target = size_mb * 2 ** 20
+    # every word takes at least two bytes with its separator
+    words = sampler.iter_words(target // 2, rng)
+    written = 0
+    with open(out_path, 'w') as out:
+        while written < target:
+            line = list(itertools.islice(words, 12))
+            for i in range(len(line)):
+                if rng.random() < novelty:
+                    line[i] = rng.choices(vocab, cum_weights=cum_weights)[0]
+            text = ' '.join(line) + '\n'
+            out.write(text)
+            written += len(text)
+
+
+def model_mib(model):
+    """Get the memory held by a built model alone, in MiB.
+
+    Counts the model's own containers and the strings in them, not the
+    interpreter or anything freed while building.
+
+    Args:
+        model (TrigramModel or dict): Result of one of the builders
+    """
+    if isinstance(model, trigrams.TrigramModel):
+        size = sum(arr.buffer_info()[1] * arr.itemsize
+                   for arr in (model.pairs, model.offsets, model.followers, model.counts))
+        size += sys.getsizeof(model.words) + sys.getsizeof(model.word_ids)
+        size += sum(sys.getsizeof(word) for word in model.words)
+    else:
+        size = sys.getsizeof(model)
+        seen = set()
+        for key, followers in model.items():
+            size += sys.getsizeof(key) + sys.getsizeof(followers)
+            for word in followers:
+                if id(word) not in seen:
+                    seen.add(id(word))
+                    size += sys.getsizeof(word)
+    return size / 2 ** 20
+
+
+def peak_mib():
+    """Get the peak resident size of this process and its children in MiB."""
+    # ru_maxrss is kilobytes on Linux, bytes on macOS
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return peak / (2 ** 20 if sys.platform == 'darwin' else 2 ** 10)
+
+
+def build(kind, corpus_path):
+    """Build one model and print its size, build seconds and memory.
+
+    The build peak is the high-water resident size while counting and
+    freezing, which TrigramCounts dominates; the model column is what the
+    finished model holds once the counts are gone.
+    """
+    start = time.perf_counter()
+    model = BUILDERS[kind](pathlib.Path(corpus_path))
+    seconds = time.perf_counter() - start
+    print(f'{kind:<8} {len(model):>12,} pairs {seconds:8.2f} s '
+          f'{peak_mib():10.1f} MiB build peak {model_mib(model):10.1f} MiB model')
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Compare trigram builder memory.')
+    parser.add_argument('corpus', nargs='?', default=os.path.join(os.getcwd(), 'sherlock.txt'))
+    parser.add_argument('--synthetic-mb', type=int, default=0,
+                        help='generate a corpus of this many MB from corpus and measure that')
+    parser.add_argument('--skip', choices=sorted(BUILDERS), action='append', default=[],
+                        help='builder to leave out, e.g. dict on corpora that do not fit')
+    parser.add_argument('--build', choices=sorted(BUILDERS), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.build:
+        build(args.build, args.corpus)
+        return
+
+    corpus = args.corpus
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.synthetic_mb:
+            corpus = os.path.join(tmp, 'synthetic.txt')
+            start = time.perf_counter()
+            write_synthetic_corpus(pathlib.Path(args.corpus), corpus, args.synthetic_mb)
+            print(f'wrote {os.path.getsize(corpus) / 2 ** 20:,.0f} MiB corpus '
+                  f'in {time.perf_counter() - start:.1f} s')
+        for kind in sorted(BUILDERS):
+            if kind not in args.skip:
+                subprocess.run([sys.executable, __file__, corpus, '--build', kind], check=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -3,17 +3,583 @@
 
 This module contains all the functions for the Trigrams module.
 """
+import itertools
+import locale
+import mmap
+import multiprocessing
 import os
 import pathlib
+import re
 import string
+import struct
 import random
+from array import array
+from bisect import bisect_left
 from collections import defaultdict
+from collections.abc import Mapping, Sequence
 
 
 REPL_DICT = {punc: '' for punc in string.punctuation}
 REPL_DICT['-'] = ' '
 TRANS_TABLE = str.maketrans(REPL_DICT)
 
+# Word ids are packed 32 bits apiece: a pair key is (w1 << 32) | w2
+ID_BITS = 32
+ID_MASK = (1 << ID_BITS) - 1
+
+# Bytes per chunk handed to each worker by create_trigram_model_parallel
+CHUNK_SIZE = 32 * 2 ** 20
+WHITESPACE = re.compile(rb'\s')
+
+# A model file is a header followed by these arrays, each padded to 8 bytes.
+# The header holds the magic, a 1 written in native byte order and the
+# item count of each section.  Words are stored sorted, so a word's id is
+# its position, pairs are sorted (w1 << 32 | w2) keys and each pair's
+# distinct followers come with their counts.  The sampler tables follow.
+MODEL_MAGIC = b'TRIGRAM2'
+MODEL_SECTIONS = (('word_offsets', 'Q'), ('word_text', 'B'), ('pairs', 'Q'),
+                  ('offsets', 'Q'), ('followers', 'I'), ('counts', 'I'),
+                  ('prob', 'd'), ('alias', 'Q'), ('next_rows', 'q'))
+MODEL_HEADER = struct.Struct(f'8sQ{len(MODEL_SECTIONS)}Q')
+
+
+def iter_words(lines):
+    """Yield the lower-cased, punctuation-stripped words of a text.
+
+    Words run on across line breaks, the same stream create_trigram_dict
+    builds by carrying the last two words of each line forward.
+
+    Args:
+        lines (iterable): Lines of text, e.g. an open file.
+    """
+    for line in lines:
+        yield from line.translate(TRANS_TABLE).lower().split()
+
+
+class Vocabulary:
+    """Interns words as consecutive integer ids."""
+    def __init__(self):
+        self.words = []
+        self.ids = {}
+
+    def __len__(self):
+        return len(self.words)
+
+    def intern(self, word):
+        """Get the id for a word, adding it if it is new.
+
+        Args:
+            word (str): Word to look up
+
+        Returns:
+            int: Word id
+        """
+        word_id = self.ids.setdefault(word, len(self.words))
+        if word_id == len(self.words):
+            self.words.append(word)
+        return word_id
+
+
+class TrigramCounts:
+    """Trigram counts keyed by packed word ids, used to build a model.
+
+    Each distinct trigram is one int key (w1, w2, w3 packed) and a count,
+    so memory grows with the number of distinct trigrams, not with the
+    length of the corpus.
+    """
+    def __init__(self):
+        self.vocab = Vocabulary()
+        self.counts = defaultdict(int)
+
+    def add_words(self, words):
+        """Count every trigram in a stream of words.
+
+        Args:
+            words (iterable): Words in text order
+        """
+        intern = self.vocab.intern
+        counts = self.counts
+        first = second = None
+        for word in words:
+            third = intern(word)
+            if first is not None:
+                counts[(first << ID_BITS | second) << ID_BITS | third] += 1
+            first, second = second, third
+
+    def add_model(self, model):
+        """Add the counts of a frozen model, e.g. one built from another chunk.
+
+        Args:
+            model (TrigramModel): Model whose trigrams are added
+        """
+        ids = [self.vocab.intern(word) for word in model.words]
+        counts = self.counts
+        offsets, followers, model_counts = model.offsets, model.followers, model.counts
+        for row, pair in enumerate(model.pairs):
+            prefix = (ids[pair >> ID_BITS] << ID_BITS | ids[pair & ID_MASK]) << ID_BITS
+            for slot in range(offsets[row], offsets[row + 1]):
+                counts[prefix | ids[followers[slot]]] += model_counts[slot]
+
+    def freeze(self, sorted_words=False):
+        """Pack the counts into a read-only TrigramModel.
+
+        Args:
+            sorted_words (bool): Renumber the words in sorted order, so
+                models of different texts list their trigrams in the same
+                order and can be merged
+
+        Returns:
+            TrigramModel: Model holding the same trigrams
+        """
+        words, counts = self.vocab.words, self.counts
+        if sorted_words:
+            order = sorted(range(len(words)), key=words.__getitem__)
+            new_ids = [0] * len(words)
+            for new_id, old_id in enumerate(order):
+                new_ids[old_id] = new_id
+            words = [words[old_id] for old_id in order]
+            counts = {(new_ids[key >> 2 * ID_BITS] << ID_BITS | new_ids[key >> ID_BITS & ID_MASK])
+                      << ID_BITS | new_ids[key & ID_MASK]: count
+                      for key, count in counts.items()}
+        return _freeze_sorted(words, ((key, counts[key]) for key in sorted(counts)))
+
+
+def _freeze_sorted(words, trigrams):
+    """Pack trigram counts, given in ascending key order, into a model.
+
+    Args:
+        words (list): Words, indexed by id
+        trigrams (iterable): (packed trigram key, count) pairs in
+            ascending key order; counts of a repeated key are added
+
+    Returns:
+        TrigramModel: Model holding the trigrams
+    """
+    pairs = array('Q')
+    offsets = array('Q', [0])
+    followers = array('I')
+    counts = array('I')
+    add_follower, add_count = followers.append, counts.append
+    last = last_pair = None
+    for key, count in trigrams:
+        if key == last:
+            counts[-1] += count
+            continue
+        last = key
+        pair = key >> ID_BITS
+        if pair != last_pair:
+            if pairs:
+                offsets.append(len(followers))
+            pairs.append(pair)
+            last_pair = pair
+        add_follower(key & ID_MASK)
+        add_count(count)
+    if pairs:
+        offsets.append(len(followers))
+    return TrigramModel(words, pairs, offsets, followers, counts)
+
+
+class Followers(Sequence):
+    """The words following one pair, weighted by count.
+
+    Behaves like the list create_trigram_dict stores, with each word
+    repeated once per occurrence, without building that list.
+    """
+    def __init__(self, words, followers, counts):
+        self._words = words
+        self._followers = followers
+        self._counts = counts
+        self._total = sum(counts)
+
+    def __len__(self):
+        return self._total
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._total
+        if not 0 <= index < self._total:
+            raise IndexError('follower index out of range')
+        for word_id, count in zip(self._followers, self._counts):
+            if index < count:
+                return self._words[word_id]
+            index -= count
+
+    def counts(self):
+        """Get each distinct follower with its count.
+
+        Returns:
+            list: (word, count) tuples
+        """
+        return [(self._words[word_id], count)
+                for word_id, count in zip(self._followers, self._counts)]
+
+
+class TrigramModel(Mapping):
+    """Compact, read-only trigram model.
+
+    Keys are 'w1 w2' strings and values are Followers, so the model can be
+    used wherever a create_trigram_dict dictionary is.  Internally word
+    pairs are packed ints in a sorted array, and each pair's followers are
+    a slice of parallel word id and count arrays.
+    """
+    def __init__(self, words=(), pairs=(), offsets=(0,), followers=(), counts=()):
+        self.words = list(words)
+        self.word_ids = {word: i for i, word in enumerate(self.words)}
+        self.pairs = array('Q', pairs)
+        self.offsets = array('Q', offsets)
+        self.followers = array('I', followers)
+        self.counts = array('I', counts)
+        self._sampler = None
+
+    def __reduce__(self):
+        # pickle only the arrays, e.g. when a worker process returns a model
+        return (TrigramModel,
+                (self.words, self.pairs, self.offsets, self.followers, self.counts))
+
+    def _row(self, key):
+        """Get the pair index for a 'w1 w2' key, or -1 if it is absent."""
+        try:
+            first, second = key.split()
+            pair = self.word_ids[first] << ID_BITS | self.word_ids[second]
+        except (AttributeError, ValueError, KeyError):
+            return -1
+        row = bisect_left(self.pairs, pair)
+        if row < len(self.pairs) and self.pairs[row] == pair:
+            return row
+        return -1
+
+    def __contains__(self, key):
+        return self._row(key) >= 0
+
+    def __getitem__(self, key):
+        row = self._row(key)
+        if row < 0:
+            raise KeyError(key)
+        start, stop = self.offsets[row], self.offsets[row + 1]
+        return Followers(self.words, self.followers[start:stop], self.counts[start:stop])
+
+    def __iter__(self):
+        words = self.words
+        for pair in self.pairs:
+            yield f'{words[pair >> ID_BITS]} {words[pair & ID_MASK]}'
+
+    def __len__(self):
+        return len(self.pairs)
+
+    def sampler(self):
+        """Get the generation-ready TrigramSampler for this model.
+
+        Returns:
+            TrigramSampler: Built on first use and kept
+        """
+        if self._sampler is None:
+            self._sampler = TrigramSampler(self)
+        return self._sampler
+
+
+class TrigramSampler:
+    """Generation-ready form of a TrigramModel.
+
+    Each pair's followers get a Vose alias table, so picking the next word
+    takes one random number and O(1) time however many followers there
+    are.  Each follower slot also records the row of the pair it leads to,
+    so no key is built or looked up while generating.  Start pairs are
+    drawn straight from the model's pair array.
+    """
+    def __init__(self, model):
+        self.words = model.words
+        self.pairs = model.pairs
+        self.offsets = model.offsets
+        self.followers = model.followers
+        size = len(model.followers)
+        self.prob = array('d', bytes(8 * size))
+        self.alias = array('Q', bytes(8 * size))
+        self.next_rows = array('q', bytes(8 * size))
+
+        pairs = self.pairs
+        counts = model.counts
+        for row in range(len(pairs)):
+            start, stop = self.offsets[row], self.offsets[row + 1]
+            self._build_alias(start, counts[start:stop])
+            second = pairs[row] & ID_MASK
+            for slot in range(start, stop):
+                pair = second << ID_BITS | self.followers[slot]
+                next_row = bisect_left(pairs, pair)
+                found = next_row < len(pairs) and pairs[next_row] == pair
+                self.next_rows[slot] = next_row if found else -1
+
+    @classmethod
+    def from_tables(cls, model, prob, alias, next_rows):
+        """Wrap tables that were already built, e.g. read from a model file.
+
+        Args:
+            model (TrigramModel): Model the tables belong to
+            prob (sequence): Alias table probabilities per follower slot
+            alias (sequence): Alias slot per follower slot
+            next_rows (sequence): Row each follower slot leads to, or -1
+
+        Returns:
+            TrigramSampler: Sampler using the tables as they are
+        """
+        sampler = cls.__new__(cls)
+        sampler.words = model.words
+        sampler.pairs = model.pairs
+        sampler.offsets = model.offsets
+        sampler.followers = model.followers
+        sampler.prob, sampler.alias, sampler.next_rows = prob, alias, next_rows
+        return sampler
+
+    def _build_alias(self, start, counts):
+        """Fill prob and alias for the slots of one pair.
+
+        Works in integers (count * k against the total) so the table is
+        exact.
+
+        Args:
+            start (int): First slot of the pair
+            counts (array): Follower counts of the pair
+        """
+        size = len(counts)
+        total = sum(counts)
+        scaled = [count * size for count in counts]
+        small = [i for i, weight in enumerate(scaled) if weight < total]
+        large = [i for i, weight in enumerate(scaled) if weight >= total]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.prob[start + less] = scaled[less] / total
+            self.alias[start + less] = start + more
+            scaled[more] += scaled[less] - total
+            (small if scaled[more] < total else large).append(more)
+        for i in small + large:
+            self.prob[start + i] = 1.0
+            self.alias[start + i] = start + i
+
+    def _random_row(self, rng):
+        """Get a random pair row, each pair equally likely."""
+        if not self.pairs:
+            raise IndexError('cannot generate text from an empty model')
+        return int(rng.random() * len(self.pairs))
+
+    def _pair_words(self, row):
+        """Get the two words of the pair at row."""
+        pair = self.pairs[row]
+        return [self.words[pair >> ID_BITS], self.words[pair & ID_MASK]]
+
+    def walk(self, max_len, rng=random):
+        """Generate text from a random pair until a dead end or max_len words.
+
+        Args:
+            max_len (int): Max number of words returned
+            rng (random.Random): Source of randomness
+
+        Returns:
+            list: Generated words
+        """
+        words, followers, offsets = self.words, self.followers, self.offsets
+        prob, alias, next_rows = self.prob, self.alias, self.next_rows
+        row = self._random_row(rng)
+        text = self._pair_words(row)
+        while row >= 0 and len(text) < max_len:
+            start = offsets[row]
+            pick = rng.random() * (offsets[row + 1] - start)
+            slot = start + int(pick)
+            if pick - int(pick) >= prob[slot]:
+                slot = alias[slot]
+            text.append(words[followers[slot]])
+            row = next_rows[slot]
+        return text
+
+    def iter_words(self, count, rng=random):
+        """Yield count generated words, restarting at a random pair at dead ends.
+
+        Args:
+            count (int): Number of words yielded
+            rng (random.Random): Source of randomness
+        """
+        words, followers, offsets = self.words, self.followers, self.offsets
+        prob, alias, next_rows = self.prob, self.alias, self.next_rows
+        row = -1
+        while count > 0:
+            if row < 0:
+                row = self._random_row(rng)
+                for word in self._pair_words(row)[:count]:
+                    yield word
+                count -= 2
+                continue
+            start = offsets[row]
+            pick = rng.random() * (offsets[row + 1] - start)
+            slot = start + int(pick)
+            if pick - int(pick) >= prob[slot]:
+                slot = alias[slot]
+            yield words[followers[slot]]
+            row = next_rows[slot]
+            count -= 1
+
+
+class WordTable(Sequence):
+    """Words stored as one UTF-8 blob and the offsets between them."""
+    def __init__(self, offsets, text):
+        self._offsets = offsets
+        self._text = text
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('word index out of range')
+        return bytes(self._text[self._offsets[index]:self._offsets[index + 1]]).decode()
+
+    def encoded(self, index):
+        """Get the UTF-8 bytes of a word."""
+        return bytes(self._text[self._offsets[index]:self._offsets[index + 1]])
+
+
+class WordIndex(Mapping):
+    """Word to id lookup by binary search over a sorted WordTable."""
+    def __init__(self, words):
+        self._words = words
+
+    def __getitem__(self, word):
+        target = word.encode()
+        low, high = 0, len(self._words)
+        while low < high:
+            middle = (low + high) // 2
+            if self._words.encoded(middle) < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self._words) and self._words.encoded(low) == target:
+            return low
+        raise KeyError(word)
+
+    def __iter__(self):
+        return iter(self._words)
+
+    def __len__(self):
+        return len(self._words)
+
+
+class MappedTrigramModel(TrigramModel):
+    """TrigramModel read in place from a file written by save_trigram_model.
+
+    The file is memory-mapped read-only and its arrays are used as they
+    are, so opening a model takes the same few milliseconds whatever its
+    size, and processes opening the same file share its cached pages.
+    """
+    def __init__(self, file_path):
+        self.path = pathlib.Path(file_path)
+        with open(self.path, 'rb') as model_file:
+            self._map = mmap.mmap(model_file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._map)
+        if len(view) < MODEL_HEADER.size:
+            raise ValueError(f'{self.path} is not a trigram model file')
+        magic, byte_order, *sizes = MODEL_HEADER.unpack_from(view)
+        if magic != MODEL_MAGIC:
+            raise ValueError(f'{self.path} is not a trigram model file')
+        if byte_order != 1:
+            raise ValueError(f'{self.path} was written with a different byte order')
+
+        sections = {}
+        start = MODEL_HEADER.size
+        for (name, code), size in zip(MODEL_SECTIONS, sizes):
+            length = size * array(code).itemsize
+            sections[name] = view[start:start + length].cast(code)
+            start += length + -length % 8
+
+        self.words = WordTable(sections['word_offsets'], sections['word_text'])
+        self.word_ids = WordIndex(self.words)
+        self.pairs = sections['pairs']
+        self.offsets = sections['offsets']
+        self.followers = sections['followers']
+        self.counts = sections['counts']
+        self._sampler = TrigramSampler.from_tables(
+            self, sections['prob'], sections['alias'], sections['next_rows'])
+
+    def __reduce__(self):
+        # another process maps the same file rather than copying the arrays
+        return (MappedTrigramModel, (self.path,))
+
+
+def sort_words(model):
+    """Renumber a model's words in sorted order.
+
+    Sorted str order is UTF-8 byte order, so a word's id in the result is
+    its position in a sorted word table.
+
+    Args:
+        model (TrigramModel): Model to renumber
+
+    Returns:
+        TrigramModel: The same trigrams, or model itself if already sorted
+    """
+    if all(a < b for a, b in zip(model.words, model.words[1:])):
+        return model
+    tri_counts = TrigramCounts()
+    for word in sorted(model.words):
+        tri_counts.vocab.intern(word)
+    tri_counts.add_model(model)
+    return tri_counts.freeze()
+
+
+def save_trigram_model(model, file_path):
+    """Write a model, with its sampler tables, as a MappedTrigramModel file.
+
+    Words are renumbered in sorted order first, so the mapped model finds
+    them by binary search.  The file is written under a temporary name and
+    renamed into place, so a process opening it never sees a partial model.
+
+    Args:
+        model (TrigramModel): Model to save
+        file_path (pathlib.Path): File to write
+    """
+    model = sort_words(model)
+    sampler = model.sampler()
+    encoded = [word.encode() for word in model.words]
+    sections = {'word_offsets': array('Q', itertools.accumulate(map(len, encoded), initial=0)),
+                'word_text': b''.join(encoded),
+                'pairs': model.pairs, 'offsets': model.offsets,
+                'followers': model.followers, 'counts': model.counts,
+                'prob': sampler.prob, 'alias': sampler.alias, 'next_rows': sampler.next_rows}
+
+    file_path = pathlib.Path(file_path)
+    tmp_path = file_path.with_name(file_path.name + '.tmp')
+    with open(tmp_path, 'wb') as model_file:
+        model_file.write(MODEL_HEADER.pack(
+            MODEL_MAGIC, 1, *(len(sections[name]) for name, _ in MODEL_SECTIONS)))
+        for name, code in MODEL_SECTIONS:
+            data = memoryview(sections[name]).cast('B')
+            model_file.write(data)
+            model_file.write(bytes(-len(data) % 8))
+    os.replace(tmp_path, file_path)
+
+
+def open_trigram_model(corpus_path, model_path=None):
+    """Open the saved model of a corpus, building and saving it if needed.
+
+    The model is rebuilt when its file is missing or older than the
+    corpus.
+
+    Args:
+        corpus_path (pathlib.Path): Path to text file.
+        model_path (pathlib.Path): Model file, the corpus path with a
+            .trigrams suffix if None
+
+    Returns:
+        TrigramModel: Memory-mapped model, or an empty model if neither
+        file exists
+    """
+    if model_path is None:
+        model_path = corpus_path.with_suffix('.trigrams')
+    if corpus_path.exists():
+        if not model_path.exists() or model_path.stat().st_mtime < corpus_path.stat().st_mtime:
+            save_trigram_model(create_trigram_model_parallel(corpus_path), model_path)
+    elif not model_path.exists():
+        return TrigramModel()
+    return MappedTrigramModel(model_path)
+
 
 def create_trigram_dict(file_path):
     """Create a trigram dictionary from the passed text file.
@@ -41,16 +607,196 @@ def create_trigram_dict(file_path):
     return tri_dict
 
 
+def create_trigram_model(file_path):
+    """Create a compact trigram model from the passed text file.
+
+    Holds the same trigrams as create_trigram_dict, as integer ids and
+    follower counts rather than lists of repeated strings.
+
+    Args:
+        file_path (pathlib.Path): Path to text file.
+
+    Returns:
+        TrigramModel: Model usable with create_trigram_text.
+    """
+    if not file_path.exists():
+        return TrigramModel()
+
+    tri_counts = TrigramCounts()
+    with open(file_path) as corpus:
+        tri_counts.add_words(iter_words(corpus))
+    return tri_counts.freeze()
+
+
+def chunk_bounds(file_path, chunk_size=CHUNK_SIZE):
+    """Split a file into byte ranges that end at whitespace.
+
+    No word is cut in two, so each range can be counted on its own.
+
+    Args:
+        file_path (pathlib.Path): Path to text file.
+        chunk_size (int): Approximate bytes per range
+
+    Returns:
+        list: Offsets, each range running from one to the next
+    """
+    size = file_path.stat().st_size
+    bounds = [0]
+    with open(file_path, 'rb') as corpus:
+        while bounds[-1] < size:
+            cut = min(bounds[-1] + chunk_size, size)
+            corpus.seek(cut)
+            while cut < size:
+                block = corpus.read(4096)
+                space = WHITESPACE.search(block)
+                if space:
+                    cut += space.start()
+                    break
+                cut += len(block)
+            bounds.append(cut)
+    return bounds
+
+
+def _last_words(text, count=2):
+    """Get the last count words of a text as iter_words splits it."""
+    size = 64
+    while True:
+        words = list(iter_words([text[-size:]]))
+        # the window's first word may be cut, so want one word to spare
+        if len(words) > count or size >= len(text):
+            return words[-count:]
+        size *= 4
+
+
+def _count_chunk(job):
+    """Count the trigrams in one byte range of a corpus.
+
+    Args:
+        job (tuple): (file path, start, stop, encoding)
+
+    Returns:
+        tuple: (TrigramModel with sorted words, first two words, last two
+        words), the words being needed to count the trigrams that span
+        chunk boundaries.
+    """
+    file_path, start, stop, encoding = job
+    with open(file_path, 'rb') as corpus:
+        corpus.seek(start)
+        text = corpus.read(stop - start).decode(encoding)
+    words = iter_words(text.splitlines())
+    head = list(itertools.islice(words, 2))
+    tri_counts = TrigramCounts()
+    tri_counts.add_words(itertools.chain(head, words))
+    return tri_counts.freeze(sorted_words=True), head, _last_words(text)
+
+
+def _model_trigrams(model, ids):
+    """List a model's trigrams under other word ids, each with its count.
+
+    Args:
+        model (TrigramModel): Model with sorted words
+        ids (dict): Id of every word of the model in a larger sorted
+            vocabulary, so the trigrams still come out in ascending order
+
+    Returns:
+        list: trigram key << 32 | count for every trigram, ascending
+    """
+    word_ids = [ids[word] for word in model.words]
+    offsets, followers, counts = model.offsets, model.followers, model.counts
+    packed = []
+    for row, pair in enumerate(model.pairs):
+        prefix = (word_ids[pair >> ID_BITS] << ID_BITS | word_ids[pair & ID_MASK]) << ID_BITS
+        start, stop = offsets[row], offsets[row + 1]
+        packed.extend([(prefix | word_ids[follower]) << ID_BITS | count
+                       for follower, count in zip(followers[start:stop], counts[start:stop])])
+    return packed
+
+
+def _merge_chunks(parts):
+    """Merge the results of two adjacent byte ranges of a corpus.
+
+    Both models have sorted words, so once they share one sorted
+    vocabulary their trigrams are two ascending runs.  sorted() merges
+    such runs in a single linear pass, so nothing is counted again.  The
+    trigrams spanning the boundary are made from the left tail and the
+    right head.
+
+    Args:
+        parts (tuple): Two _count_chunk results, the left range first
+
+    Returns:
+        tuple: The same kind of result for the combined range
+    """
+    (left, left_head, left_tail), (right, right_head, right_tail) = parts
+    # tail and head hold two words at most, so every trigram in them
+    # spans the boundary
+    edge = left_tail + right_head
+    spanning = [edge[i:i + 3] for i in range(len(edge) - 2)]
+    words = sorted(set(left.words).union(right.words, *spanning))
+    ids = {word: word_id for word_id, word in enumerate(words)}
+    merged = _model_trigrams(left, ids)
+    merged += _model_trigrams(right, ids)
+    merged += sorted(((ids[first] << ID_BITS | ids[second]) << ID_BITS | ids[third]) << ID_BITS | 1
+                     for first, second, third in spanning)
+    merged.sort()
+    model = _freeze_sorted(words, ((packed >> ID_BITS, packed & ID_MASK) for packed in merged))
+    # a range of fewer than two words is all head and all tail
+    return model, (left_head + right_head)[:2], (left_tail + right_tail)[-2:]
+
+
+def create_trigram_model_parallel(file_path, processes=None, chunk_size=CHUNK_SIZE):
+    """Create a trigram model from a large text file using a process pool.
+
+    The file is split at whitespace into chunks of about chunk_size bytes
+    and each chunk is counted in a worker process.  Neighbouring chunks
+    are then merged pairwise, also in the pool, adding the trigrams that
+    span each boundary, until one model is left.  Each merge is a linear
+    merge of two sorted runs, so a level of the tree runs on as many
+    workers as it has pairs.  The result holds the same trigrams as
+    create_trigram_model builds, with the words numbered in sorted order.
+
+    Args:
+        file_path (pathlib.Path): Path to text file.
+        processes (int): Worker processes, os.cpu_count() if None
+        chunk_size (int): Approximate bytes per chunk
+
+    Returns:
+        TrigramModel: Model usable with create_trigram_text.
+    """
+    if not file_path.exists():
+        return TrigramModel()
+
+    bounds = chunk_bounds(file_path, chunk_size)
+    if len(bounds) <= 2:
+        return sort_words(create_trigram_model(file_path))
+
+    encoding = locale.getpreferredencoding(False)
+    jobs = [(str(file_path), start, stop, encoding) for start, stop in zip(bounds, bounds[1:])]
+    with multiprocessing.Pool(processes) as pool:
+        parts = pool.map(_count_chunk, jobs)
+        while len(parts) > 1:
+            # an odd chunk out waits for the next level
+            parts = (pool.map(_merge_chunks, zip(parts[0::2], parts[1::2]))
+                     + parts[len(parts) - len(parts) % 2:])
+    return parts[0][0]
+
+
 def create_trigram_text(tri_dict, max_len):
     """Create a trigram text based upon the passed trigram dictionary.
 
+    A TrigramModel is walked with its TrigramSampler, which picks weighted
+    followers in O(1) without building any key strings.
+
     Args:
-        tri_dict (dict): Trigram dicionary
+        tri_dict (dict): Trigram dicionary or TrigramModel
         max_len (int): Max number of words in trigram returned text
 
     Returns:
         str: Generated trigram text
     """
+    if isinstance(tri_dict, TrigramModel):
+        return ' '.join(tri_dict.sampler().walk(max_len))
+
     if isinstance(tri_dict, defaultdict):
         tri_dict.default_factory = None
 
@@ -67,7 +813,7 @@ def create_trigram_text(tri_dict, max_len):
 def main():
     """Main function."""
     corpus_path = pathlib.Path(os.path.join(os.getcwd(), 'sherlock.txt'))
-    tri_dict = create_trigram_dict(corpus_path)
+    tri_dict = open_trigram_model(corpus_path)
     tri_text = create_trigram_text(tri_dict, 200)
     print(tri_text)
 
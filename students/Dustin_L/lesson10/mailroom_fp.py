@@ -6,7 +6,10 @@ Mail Room module.
 """
 
 import datetime
+from array import array
+from bisect import bisect_left, bisect_right
 from collections import defaultdict
+from itertools import accumulate
 
 SELECT_PROMPT = ('\nPlease select from the following options:\n'
                  '\t1. Send a Thank You\n'
@@ -19,13 +22,16 @@ PROMPT_OPTS = (1, 2, 3, 4, 5)
 
 
 class Donor:
-    """Contains all information for a single donor"""
+    """Contains all information for a single donor
+
+    Donations are stored rounded to the cent.
+    """
     def __init__(self, name, donations=None):
         if not donations:
             donations = []
 
         self.name = str(name)
-        self._donations = list(donations)
+        self._donations = [round(d, 2) for d in donations]
         self._total = sum(self._donations)
         self._ave = self._total / len(self._donations) if donations else 0
 
@@ -55,6 +61,7 @@ class Donor:
         Args:
             donation (int): donation amount
         """
+        amount = round(amount, 2)
         self._donations.append(amount)
         self._total += amount
         self._ave = self._total / self.num_donations
@@ -164,15 +171,52 @@ class DonorDatabase(defaultdict):
             max_don (float, optional): Defaults to None. Max donation value
 
         Returns:
-            float: Projected contribution value
+            float: Projected contribution value, rounded to the cent
         """
-        projection = 0
+        cents = 0
         for donor in self.values():
-            projection += sum(self.filter_and_factor(factor,
-                                                     donor.donations,
-                                                     min_don=min_don,
-                                                     max_don=max_don))
-        return projection
+            cents += sum(round(d * 100)
+                         for d in self.filter_and_factor(1,
+                                                         donor.donations,
+                                                         min_don=min_don,
+                                                         max_don=max_don))
+        return round(factor * cents / 100, 2)
+
+    def projections(self, scenarios):
+        """Return the projected contribution value for many scenarios at once.
+
+        All donations are sorted once, with a running total in integer
+        cents, so each scenario is answered with two binary searches instead
+        of a pass over every donor.  Donations are stored rounded to the
+        cent, so the cent totals are exact and each result equals what
+        `projection` returns for the same scenario, which is cheaper for a
+        single one.
+
+        Args:
+            scenarios (iterable): (factor, min_don, max_don) tuples, where
+                min_don and max_don may be None as in `projection`
+
+        Raises:
+            ValueError: Min donation value is greater than max value
+
+        Returns:
+            list: Projected contribution value for each scenario, rounded
+                to the cent
+        """
+        donations = sorted(d for donor in self.values() for d in donor.donations)
+        running = array('q', [0])
+        running.extend(accumulate(round(d * 100) for d in donations))
+
+        projections = []
+        for factor, min_don, max_don in scenarios:
+            if min_don and max_don and min_don > max_don:
+                raise ValueError('Min donation value is greater than max')
+
+            lo = bisect_left(donations, min_don) if min_don else 0
+            hi = bisect_right(donations, max_don) if max_don else len(donations)
+            cents = running[hi] - running[lo] if hi > lo else 0
+            projections.append(round(factor * cents / 100, 2))
+        return projections
 
     @staticmethod
     def filter_and_factor(factor, donations, min_don=None, max_don=None):
@@ -159,6 +159,46 @@ class TestDonorDatabase(unittest.TestCase):
             self.assertEqual(contents, self.db.thank_you_fmt.format(
                 'Test Donor 3', 112527))
 
+    def test_projection(self):
+        """Test projection() fxn against filter_and_factor()"""
+        for min_don, max_don in ((None, None), (5000, None), (None, 10000),
+                                 (5000, 27000), (6000, 6100)):
+            expected = 0
+            for donor in self.db.values():
+                expected += sum(self.db.filter_and_factor(
+                    2, donor.donations, min_don=min_don, max_don=max_don))
+            self.assertAlmostEqual(
+                self.db.projection(2, min_don=min_don, max_don=max_don),
+                expected)
+
+        with self.assertRaises(ValueError):
+            self.db.projection(2, min_don=100, max_don=10)
+
+    def test_projections(self):
+        """Test batched projections() fxn"""
+        self.assertEqual(self.db.projections([(1, None, None),
+                                              (3, 5000, 5000),
+                                              (2, 0, 1000)]),
+                         [172527, 30000, 2000])
+
+    def test_projections_keep_cents(self):
+        """Test projections() stays exact to the cent for large totals"""
+        db = DonorDatabase(Donor('Big Donor', [1e13, 0.01, 0.02]),
+                           Donor('Small Donor', [0.05]))
+        self.assertEqual(db.projections([(1, 0.01, 0.05), (2, 0.02, 0.02)]),
+                         [0.08, 0.04])
+
+    def test_projections_match_projection(self):
+        """Test projections() agrees with projection() for sub-cent inputs"""
+        db = DonorDatabase(Donor('Odd Donor', [10.004, 0.1]),
+                           Donor('Even Donor', [0.2, 0.005]))
+        self.assertEqual(db['Odd Donor'].donations, [10.0, 0.1])
+        scenarios = [(2, None, None), (2, 10, 10.004), (1.5, 0.1, 0.2),
+                     (3, None, 0.2), (2, 20, None)]
+        self.assertEqual(db.projections(scenarios),
+                         [db.projection(*s) for s in scenarios])
+        self.assertEqual(db.projection(2), 20.62)
+
     def test_get_donor_names(self):
         """Test reading all donor names from database"""
         for i, name in enumerate(self.db):
@@ -1,3 +1,9 @@
+import heapq
+import itertools
+import string
+import _string
+import sys
+
 import mailroom_db
 
 def send_thank_you(db, firstname, lastname, amount):
@@ -6,68 +12,134 @@ def send_thank_you(db, firstname, lastname, amount):
         fn=firstname, ln=lastname, amount=amount)
 
 
-def create_report(db):
-    """Prints a list of all donors, sorted by total amount given."""
-
-    def get_total(donor_data):
-        return donor_data[1]
+REPORT_HEADER = ("Donor Name    | Total Given   | Num Gifts | Average Gift",
+                 "--------------------------------------------------------")
 
-
-    def create_row(donor):
-        fullname = donor.get_name()
-        total = sum(donor.get_donations())
-        num = len(donor.get_donations())
-        avg = total / num
-        return [fullname, total, num, avg]
+# Define the formatter
+ROW_FORMAT = "{name:<14}  ${total:>13.2f}   {num:>9d}  ${avg:>12.2f}".format
 
 
-    report = list()
-    report.append("Donor Name    | Total Given   | Num Gifts | Average Gift")
-    report.append("--------------------------------------------------------")
+def report_rows(db, top=None, offset=0, limit=None):
+    """
+    Yields [name, total, num, avg] for each donor, sorted by total amount given.
 
-    # Create a list with the data we want
-    data_list = [create_row(donor) for donor in db.get_donors()]
+    top: only rank the top donors; a heap keeps the K largest totals, so
+         this is O(N log K) instead of sorting every donor.
+    offset, limit: return limit rows starting offset rows down the ranking.
+    """
 
-    # Sort the list by total amount given
-    data_list.sort(key=get_total, reverse=True)
-
-    # Define the formatter
-    line_fmtr = "{name:<14}  ${total:>13.2f}   {num:>9d}  ${avg:>12.2f}".format
+    def get_total(donor_data):
+        return donor_data[1]
 
-    # Apply the formatting to all the data
-    for d in data_list:
-        report.append(line_fmtr(name=d[0], total=d[1], num=d[2], avg=d[3]))
 
-    return '\n'.join(report)
+    def create_row(donor):
+        total = donor.get_total()
+        num = len(donor.get_donations())
+        return [donor.get_name(), total, num, total / num]
+
+
+    # Create the rows lazily with the data we want
+    data = (create_row(donor) for donor in db.get_donors())
+
+    if top is not None and limit is not None:
+        top = min(top, limit)
+    elif limit is not None:
+        top = limit
+
+    if top is None:
+        # Sort the whole list by total amount given
+        ranked = sorted(data, key=get_total, reverse=True)
+    else:
+        # Only keep the largest offset + top totals
+        ranked = heapq.nlargest(offset + top, data, key=get_total)
+
+    yield from itertools.islice(ranked, offset, None)
+
+
+def report_lines(db, **kwargs):
+    """Yields the report one line at a time. Takes the report_rows options."""
+    yield from REPORT_HEADER
+    for name, total, num, avg in report_rows(db, **kwargs):
+        yield ROW_FORMAT(name=name, total=total, num=num, avg=avg)
+
+
+def write_report(db, out=None, **kwargs):
+    """Writes the report row by row to any writable stream (stdout by default)."""
+    if out is None:
+        out = sys.stdout
+    for line in report_lines(db, **kwargs):
+        out.write(line)
+        out.write('\n')
+
+
+def create_report(db, **kwargs):
+    """Returns the report as one newline-separated string, donors sorted by total amount given."""
+    return '\n'.join(report_lines(db, **kwargs))
+
+
+LETTER_FIELDS = ('name', 'amount', 'total')
+
+
+def compile_template(template_in):
+    """
+    Parses a letter template once and returns a function that renders it.
+
+    The returned function takes name, amount and total keyword arguments.
+    Attribute and index lookups such as {name.upper} or {name[0]} work as
+    they do with str.format. A bare {amount} or {total} is shown with two
+    decimals unless the template gives its own format spec. Raises KeyError
+    for any placeholder not based on {name}, {amount} or {total}.
+    """
+    formatter = string.Formatter()
+    parts = list()
+    for literal, field, spec, conversion in formatter.parse(template_in):
+        parts.append(literal.replace('{', '{{').replace('}', '}}'))
+        if field is None:
+            continue
+        first, rest = _string.formatter_field_name_split(field)
+        if first not in LETTER_FIELDS:
+            raise KeyError(first)
+        if not spec and field in ('amount', 'total'):
+            spec = '.2f'
+        parts.append('{' + field + ('!' + conversion if conversion else '')
+                     + (':' + spec if spec else '') + '}')
+    return ''.join(parts).format
+
+
+def iter_letters(db, template_in):
+    """
+    Returns a generator of (name, letter) pairs, one per donor.
+
+    The template is compiled before the generator is returned, so a bad
+    placeholder raises KeyError right away rather than part way through.
+    """
+    render = compile_template(template_in)
+    return ((donor.get_name(),
+             render(name=donor.get_name(), amount=donor.get_donations()[-1],
+                    total=donor.get_total()))
+            for donor in db.get_donors())
+
+
+def checked_letters(db, template_in):
+    """
+    Returns iter_letters(db, template_in), or prints which placeholder is
+    invalid and returns None if the template has a bad key.
+    """
+    try:
+        return iter_letters(db, template_in)
+    except KeyError as kerr:
+        print("Key Error:", kerr, "is not a valid key.",
+            "The only valid keys are: ",
+            "{name}, {amount}, and {total}")
+        return None
 
 
 def send_letters(db, template_in):
+    letters = checked_letters(db, template_in)
+    if letters is None:
+        return "Failed!"
 
-    donor_template = template_in
-    donor_template = donor_template.replace('{amount}', '{amount:.2f}')
-    donor_template = donor_template.replace('{total}', '{total:.2f}')
-
-    letters = list()
-
-    for donor in db.get_donors():
-        # Setup up the data to write
-        donations = donor.get_donations()
-        last = donations[-1]
-        total = sum(donations)
-
-        # Create the personalized letter
-        # Replace the keys with the data
-        try:
-            letters.append(
-                (donor.get_name(),
-                donor_template.format(name=donor.get_name(), amount=last, total=total)))
-        except KeyError as kerr:
-            print("Key Error:", kerr, "is not a valid key.",
-                "The only valid keys are: ",
-                "{name}, {amount}, and {total}")
-            return "Failed!"
-
-    return letters
+    return list(letters)
 
 
 def challenge_project(db, above=0, below=0, multiplier=1):
@@ -95,4 +167,33 @@ def challenge_project(db, above=0, below=0, multiplier=1):
     
     return '\n'.join(return_list)
     
-    
\ No newline at end of file
+    
+
+
+if __name__ == "__main__":
+    # Time letter rendering for a large database
+    import time
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    db = mailroom_db.DonorCollection()
+    for i in range(count):
+        db.add_donation("First{}".format(i), "Last{}".format(i), 10.0)
+        db.add_donation("First{}".format(i), "Last{}".format(i), 25.5)
+    template = "Dear {name},\n\nThank you for your gift of ${amount}.\n" \
+               "You have given ${total} in all.\n"
+
+    # The old way: rewrite the template and sum the donations for each donor
+    start = time.perf_counter()
+    for donor in db.get_donors():
+        donations = donor.get_donations()
+        t = template.replace("{amount}", "{amount:.2f}")
+        t = t.replace("{total}", "{total:.2f}")
+        t.format(name=donor.get_name(), amount=donations[-1],
+                 total=sum(donations))
+    print("per-donor format: {:,} letters in {:.2f}s".format(
+        count, time.perf_counter() - start))
+
+    start = time.perf_counter()
+    num = sum(1 for _ in iter_letters(db, template))
+    print("compiled template: {:,} letters in {:.2f}s".format(
+        num, time.perf_counter() - start))
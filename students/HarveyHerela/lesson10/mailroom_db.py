@@ -2,16 +2,22 @@ class Donor:
     def __init__(self, firstname, lastname):
         self.name = (firstname, lastname)
         self.donations = list()
+        self.total = 0
 
 
     def add_donation(self, amount):
         self.donations.append(amount)
+        self.total += amount
 
 
     def get_donations(self):
         return self.donations
 
 
+    def get_total(self):
+        return self.total
+
+
     def get_key(self):
         return self.name
 
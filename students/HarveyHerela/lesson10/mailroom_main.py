@@ -48,14 +48,18 @@ def send_letters(db):
         print("\nThere was an error reading the template file")
         return "Failed!"
 
-    letters = mailroom_actions.send_letters(db, template_in)
+    letters = mailroom_actions.checked_letters(db, template_in)
+    if letters is None:
+        return "Failed!"
 
-    # Write the letters to file
-    for letter in letters:
-        filename = "./{dir}/{name}.txt".format(name=letter[0], dir=subdir)
+    # Write the letters to file as they are rendered
+    num = 0
+    for name, letter in letters:
+        filename = "./{dir}/{name}.txt".format(name=name, dir=subdir)
         with open(filename, 'w') as outfile:
-            outfile.write(letter[1])
-    return "{num} letters created!".format(num=len(letters))
+            outfile.write(letter)
+        num += 1
+    return "{num} letters created!".format(num=num)
 
 
 def challenge_projection(db):
@@ -1,3 +1,5 @@
+import contextlib
+import io
 import unittest
 
 import mailroom_actions
@@ -98,6 +100,34 @@ class DBTest(unittest.TestCase):
         self.assertEqual(expected, result)
 
 
+    def test_create_report_top(self):
+        db = self.create_default_db()
+        db.add_donation("Grace", "Kelly", 70)
+        names = [row[0] for row in mailroom_actions.report_rows(db, top=2)]
+        self.assertEqual(["Audrey Hepburn", "Cary Grant"], names)
+
+        # Ties keep the same order as the fully sorted report
+        full = list(mailroom_actions.report_rows(db))
+        self.assertEqual(full[1:3], list(mailroom_actions.report_rows(db, offset=1, limit=2)))
+        self.assertEqual(full[2:], list(mailroom_actions.report_rows(db, offset=2)))
+        self.assertEqual(full[1:2], list(mailroom_actions.report_rows(db, top=5, offset=1, limit=1)))
+
+        lines = mailroom_actions.create_report(db, top=1).split('\n')
+        self.assertEqual(3, len(lines))
+        self.assertTrue(lines[2].startswith("Audrey Hepburn"))
+
+
+    def test_write_report(self):
+        db = self.create_default_db()
+        out = io.StringIO()
+        mailroom_actions.write_report(db, out, limit=2)
+        self.assertEqual(mailroom_actions.create_report(db, top=2) + '\n', out.getvalue())
+
+        with contextlib.redirect_stdout(io.StringIO()) as stdout:
+            mailroom_actions.write_report(db, limit=2)
+        self.assertEqual(out.getvalue(), stdout.getvalue())
+
+
     def test_send_letters(self):
         db = self.create_default_db()
         template = "{name} {amount} {total}"
@@ -113,5 +143,46 @@ class DBTest(unittest.TestCase):
         self.assertIn(expected_list[2], result_list)
 
 
+    def test_send_letters_bad_key(self):
+        db = self.create_default_db()
+        self.assertEqual("Failed!", mailroom_actions.send_letters(db, "{name} {gift}"))
+
+
+    def test_compile_template(self):
+        render = mailroom_actions.compile_template("{{x}} {name!r} {amount} {total:,.1f}")
+        self.assertEqual("{x} 'Cary Grant' 40.00 1,070.0",
+                         render(name="Cary Grant", amount=40, total=1070))
+        with self.assertRaises(KeyError):
+            mailroom_actions.compile_template("{name} {}")
+
+
+    def test_compile_template_lookups(self):
+        render = mailroom_actions.compile_template("{name[0]}. {name[1]} {amount.real}")
+        self.assertEqual("C. G 40.5",
+                         render(name=("C", "G"), amount=40.5, total=0))
+        with self.assertRaises(KeyError):
+            mailroom_actions.compile_template("{gift.real}")
+
+
+    def test_iter_letters(self):
+        db = self.create_default_db()
+        # A bad key is reported before any letters are made
+        with self.assertRaises(KeyError):
+            mailroom_actions.iter_letters(db, "{amount} {donor}")
+        letters = mailroom_actions.iter_letters(db, "{name}: {total}")
+        self.assertNotIsInstance(letters, list)
+        self.assertEqual(sorted(letters), [("Audrey Hepburn", "Audrey Hepburn: 270.00"),
+                                           ("Cary Grant", "Cary Grant: 70.00"),
+                                           ("Jimmy Stewart", "Jimmy Stewart: 50.00")])
+
+
+    def test_donor_total(self):
+        donor = mailroom_db.Donor("Cary", "Grant")
+        self.assertEqual(0, donor.get_total())
+        donor.add_donation(30)
+        donor.add_donation(40.5)
+        self.assertEqual(70.5, donor.get_total())
+
+
 if __name__ == "__main__":
     unittest.main()
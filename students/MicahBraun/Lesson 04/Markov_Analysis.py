@@ -9,11 +9,104 @@
 # then strung together "randomly" based on this predictive analysis and then printed out for the user to view.
 # ----------------------------------------------------------------------------------------------------------------------
 import re
+import sys
 import random
+import tracemalloc
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter, deque
+from itertools import accumulate
 # --------------------------------------------------    DATA    --------------------------------------------------------
 potential_words_map = {}                           # map from root_words to a list of potential_words
 root_word = ()                                     # current tuple of words
 big_list = []                                      # used for final data display
+word_choices = {}                                  # frozen map: root_words -> (words, running totals of counts)
+start_keys = []                                    # every root_words key, so a start is picked without a copy
+map_changed = False                                # set by process_word(), cleared by freeze_map()
+all_maps = []                                      # flat dicts for orders 1..n, only kept by memory_report()
+word_trie = None                                   # NgramTrie of every context up to its order words long
+
+#   --------------------------------------------     CLASSES     -------------------------------------------------------
+
+
+class NgramTrie:
+    """Trie of every run of 1 to order + 1 words in a text, so any context of up to order words can be looked up and
+    contexts that start the same way share their nodes instead of each being a whole tuple key.
+
+    Each level of the trie is kept as flat arrays sorted by word ids: level[n] holds every distinct run of n words as
+    the id of its last word (words), how many times it was seen (counts) and, below the deepest level, where its
+    children start in level n + 1 (first). A node's children are next to each other, so following a word is a bisect
+    over that small slice and a node takes about 12 bytes."""
+
+    def __init__(self, filename, order=3):
+        self.order = order                                          # longest context that can be looked up
+        self.ids = {}                                               # word -> word id
+        self.words = []                                             # word id -> word
+        text = array('I')                                           # whole text as word ids, 4 bytes a word
+        with open(filename) as fp:
+            for line in fp:                                         # same words process_f() reads
+                for word in line.rstrip().split():
+                    word_id = self.ids.setdefault(word, len(self.words))
+                    if word_id == len(self.words):
+                        self.words.append(word)
+                    text.append(word_id)
+
+        self.level_words, self.level_counts, self.level_first = [None], [None], [None]
+        above = None                                                # sorted runs of the level above, until linked
+        for n in range(1, order + 2):                               # a level at a time, only two held as tuples
+            runs = sorted(Counter(zip(*(text[i:] for i in range(n)))).items())
+            self.level_words.append(array('I', (run[-1] for run, count in runs)))
+            self.level_counts.append(array('I', (count for run, count in runs)))
+            if above is not None:
+                self.level_first.append(self.link(above, runs))
+            above = [run for run, count in runs]
+        self.level_first.append(array('I', bytes(4 * (len(above) + 1))))  # deepest level has no children
+
+    @staticmethod
+    def link(above, runs):
+        """Returns where the children of each run in above start in runs, plus the end -- both lists are sorted, so a
+        run's children are the runs right after its own one-shorter prefix"""
+        first = array('I', [0])
+        child = 0
+        for run in above:
+            while child < len(runs) and runs[child][0][:-1] == run:
+                child += 1
+            first.append(child)
+        return first
+
+    def children(self, context):
+        """Returns (level, start, stop) of the nodes following context (tuple of words), or None if never seen"""
+        if len(context) > self.order:
+            return None
+        start, stop = 0, len(self.level_words[1])                  # the root's children are all of level 1
+        for n, word in enumerate(context, 1):
+            word_id = self.ids.get(word)
+            pos = bisect_left(self.level_words[n], word_id, start, stop) if word_id is not None else stop
+            if pos == stop or self.level_words[n][pos] != word_id:
+                return None
+            start, stop = self.level_first[n][pos], self.level_first[n][pos + 1]
+        return len(context) + 1, start, stop
+
+    def followers(self, context):
+        """Returns {word: count} of the words seen right after context -- empty if context was never followed"""
+        found = self.children(tuple(context))
+        if found is None:
+            return {}
+        n, start, stop = found
+        return {self.words[self.level_words[n][i]]: self.level_counts[n][i] for i in range(start, stop)}
+
+    def choices(self, context):
+        """Returns (words, running totals) for the longest end of context (up to order words) that has followers,
+        backing off one word at a time down to the empty context (every word, weighted by how often it appears)"""
+        context = tuple(context)[max(0, len(context) - self.order):]  # only the last order words can be looked up
+        for drop in range(len(context) + 1):                        # longest context first, then drop its first word
+            found = self.children(context[drop:])
+            if found is not None and found[1] < found[2]:
+                n, start, stop = found
+                words = [self.words[self.level_words[n][i]] for i in range(start, stop)]
+                return words, list(accumulate(self.level_counts[n][start:stop]))
+        raise ValueError('the trie is empty')                       # not even the empty context has followers
+
 
 #   --------------------------------------------     FUNCTIONS     -----------------------------------------------------
 
@@ -35,7 +128,7 @@ def process_word(word, order=3):
     after that we start adding entries to the dictionary."               <--- I liked their description better than
                                                                          <--- anything I could come up with.
     """
-    global root_word                                       # access global tuple word collection
+    global root_word, map_changed                          # access global tuple word collection and dirty flag
     if len(root_word) < order:                             # if the length of the tuple is less than order(3), add-
         root_word += (word,)                               # -word to root_word tuple. it needs to be at least 3 to work
         return
@@ -44,25 +137,110 @@ def process_word(word, order=3):
         potential_words_map[root_word].append(word)        # add value of root_word to dict potential_words_map{}
     except KeyError:
         potential_words_map[root_word] = [word]            # if key of root_word does not already exist in dict, create
+    map_changed = True                                     # word_choices no longer matches potential_words_map
 
     root_word = arrange_trigram(root_word, word)          # call arrange_trigram for root_word, word
 
 
+def freeze_map():
+    """Collapses each list of potential_words into its distinct words and their counts, kept as running totals, so
+    randomize() draws a weighted word with one bisect instead of picking from a list holding every repeat"""
+    global word_choices, start_keys, map_changed                    # access global frozen map and start keys
+    word_choices = {}
+    for key, potential_words in potential_words_map.items():        # for each root_words and its followers
+        counted = Counter(potential_words)                          # word -> number of times it followed key
+        word_choices[key] = (list(counted), list(accumulate(counted.values())))
+    start_keys = list(word_choices)                                 # built once, not on every randomize() call
+    map_changed = False                                             # frozen map is up to date
+
+
+def pick_word(choices):
+    """Picks a word from (words, running totals), weighted by how often each word followed the key"""
+    words, totals = choices
+    return words[bisect_right(totals, random.random() * totals[-1])]    # first total above the random point
+
+
 def randomize(n=300):
     """Generates random words from the analyzed text -- n: number of words to generate"""
     global big_list                                                 # accesses global var big_list
-    start = random.choice(list(potential_words_map.keys()))         # a random value (word) from dict
+    if map_changed:                                                 # freeze the map if a word was added since
+        freeze_map()
+    start = random.choice(start_keys)                               # a random value (word) from dict
 
     for i in range(n):                                              # for items in range 0-300
-        potential_words = potential_words_map.get(start, None)      # potential_words = random
-        if potential_words == None:                                 # if == None, randomize(300 - 300)
-            randomize(n-i)                                          # randomize all
-            return                                              # Not None
-        word = random.choice(potential_words)                       # word = random selection from potential_words
+        choices = word_choices.get(start, None)                     # choices = (words, totals) following start
+        if choices is None:                                         # dead end: start over from a random key and
+            start = random.choice(start_keys)                       # -keep going (was a recursive randomize(n-i))
+            choices = word_choices[start]
+        word = pick_word(choices)                                   # word = weighted random pick from choices
         big_list.append(word + " ")                                 # append word to big_list along with whitespace
         start = arrange_trigram(start, word)                       # start = call arrange_trigram() on start, word
 
 
+def process_f_trie(filename, order=3):
+    """Reads-in file contents (from filename) into word_trie, so contexts of 0 up to order words can be looked up"""
+    global word_trie                                                # access global trie
+    word_trie = NgramTrie(filename, order)
+
+
+def trie_followers(context):
+    """Returns {word: count} of the words seen right after context in word_trie"""
+    return word_trie.followers(context)
+
+
+def randomize_trie(n=300):
+    """Generates n random words from word_trie, backing off to shorter contexts instead of restarting at dead ends"""
+    global big_list
+    context = ()
+    for i in range(n):
+        word = pick_word(word_trie.choices(context))                # weighted pick after the longest known context
+        big_list.append(word + " ")
+        context = (context + (word,))[-word_trie.order:]            # keep the last order words
+
+
+def structure_size(build, *args):
+    """Returns (bytes still allocated after build(*args) returns, peak bytes while it ran) as seen by tracemalloc"""
+    tracemalloc.start()
+    try:
+        build(*args)
+        return tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+
+def flat_dict(filename, order):
+    """Rebuilds potential_words_map the original way, as a flat dict of order-word tuple keys"""
+    global potential_words_map, root_word, map_changed
+    potential_words_map, root_word, map_changed = {}, (), True
+    process_f(filename, order)
+
+
+def flat_dicts(filename, order):
+    """Keeps a flat dict for every order from 1 to order, which is what it takes to back off with tuple keys"""
+    global all_maps
+    all_maps = []
+    for i in range(1, order + 1):
+        flat_dict(filename, i)
+        all_maps.append(potential_words_map)
+
+
+def memory_report(filename, orders=(2, 3, 4, 5)):
+    """Prints the memory the flat dict and word_trie take for each order, measured with tracemalloc. The trie
+    answers every context length up to its order, so it is also set against one flat dict per context length"""
+    global potential_words_map, word_trie, all_maps
+    print(f"{'order':>5} {'flat dict':>12} {'flat dicts 1..n':>16} {'trie 1..n':>12} {'trie peak':>12}"
+          "     (MiB kept after building, and the trie's peak while building)")
+    for order in orders:
+        flat = structure_size(flat_dict, filename, order)[0]
+        potential_words_map = {}
+        flats = structure_size(flat_dicts, filename, order)[0]
+        all_maps = []
+        trie, peak = structure_size(process_f_trie, filename, order)
+        word_trie = None
+        print(f"{order:>5} {flat / 2 ** 20:>12.1f} {flats / 2 ** 20:>16.1f} {trie / 2 ** 20:>12.1f}"
+              f" {peak / 2 ** 20:>12.1f}")
+
+
 def arrange_trigram(t, word):
     """Creates a new tuple with t (start) as the tuple and word as the end added on to the end (the
     beginning of the new tuple has been cut off ( see [1:] ) """
@@ -83,11 +261,16 @@ def list_to_str_format():
         whole = whole[break_pos:]                                   # whole = whole starting from previous break_pos
 
 
-def main(filename, n=300, order=3):                                 # main function calls all other functions
+def main(filename, n=300, order=3, trie=False):                     # main function calls all other functions
     n = int(n)                                                      # n = default length of text to read-in from file
     order = int(order)                                              # order = default (trigram) values to store
-    process_f(filename, order)                                      # open file
-    randomize(n)                                                    # randomize
+    if trie:                                                        # trie: back off at dead ends instead of restarting
+        process_f_trie(filename, order)
+        randomize_trie(n)
+    else:
+        process_f(filename, order)                                  # open file
+        freeze_map()                                                # collapse followers for randomize
+        randomize(n)                                                # randomize
     list_to_str_format()                                            # format text to display
     print()                                                         # print empty line
 
@@ -95,6 +278,10 @@ def main(filename, n=300, order=3):                                 # main funct
 #   ---------------------------------------------     DISPLAY     ------------------------------------------------------
 
 
-main('C:\\Users\\Micah\\Desktop\\TheBrothersKaramazov.txt')          # file to use
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == '--memory':             # python Markov_Analysis.py --memory book.txt
+        memory_report(sys.argv[2])
+    else:
+        main('C:\\Users\\Micah\\Desktop\\TheBrothersKaramazov.txt')  # file to use
 
 
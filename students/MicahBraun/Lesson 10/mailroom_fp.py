@@ -53,35 +53,62 @@ class Donor:
         :param name:
         """
         self.name = name
-        self.donations = []
         self.avg_donation = 0
         self.sum_donations = 0
+        self._donation_total = 0
         self._donation_size = 0
-        self.set_avg_donation()
+        self.donations = []
+
+    @property
+    def donations(self):
+        """
+        List of donation amounts. A running total and count are kept alongside it so the average and report
+        totals never need to walk the whole list.
+        :return:
+        """
+        return self._donations
+
+    @donations.setter
+    def donations(self, donations):
+        """
+        Replacing the list (filters, projections, resets) rebuilds the running total, count and average in one
+        pass.
+        :param donations: new list of donation amounts
+        :return:
+        """
+        self._donations = donations
+        self._donation_total = sum(donations)
+        self._donation_size = len(donations)
+        self.avg_donation = self._donation_total / self._donation_size if self._donation_size else 0
 
     def add_donation(self, donation):
         """
         Method adds the entered donation amount from ui_add_name() to the Donor object, and calls set_avg_donation
         to create the next characteristic that will be tracked for the donors.
+
+        A list (or tuple) of gifts is added in one call, so loading a donor's history is linear rather than
+        re-averaging after every gift.
         :param donation: passed in from ui_add_name()
         :return:
         """
-        if type(donation) == list:
-            for l in donation:
-                self.donations.append(float(l))
+        if isinstance(donation, (list, tuple)):
+            gifts = [float(l) for l in donation]
         else:
-            self.donations.append(float(donation))
+            gifts = [float(donation)]
+        self._donations.extend(gifts)
+        for gift in gifts:
+            self._donation_total += gift
+        self._donation_size += len(gifts)
         self.set_avg_donation()
 
     def set_avg_donation(self):
         """
-        If donations present, avg will be created (sum_donations)/(num_donations -- len(self.donations) == a list
-        with 0:N donations, obtaining the len(self.donations) provides the number of donations in the list which
-        keeps track of the number like a counting feature.)
+        If donations present, avg will be created from the running total and count (kept up to date by
+        add_donation and the donations setter), so this is O(1) no matter how many donations the donor has.
         :return:
         """
-        if self.donations:
-            self.avg_donation = sum(self.donations) / len(self.donations)
+        if self._donation_size:
+            self.avg_donation = self._donation_total / self._donation_size
 
     def get_thank_you(self):
         """
@@ -143,8 +170,8 @@ Foundation Board of Directors
         :return:
         """
         return '{:{}}  |  ${:>14,.2f}  |  {:^10}  |  ${:>10,.2f}'.\
-            format(self.name, donor_header_width, sum(self.donations),
-                   len(self.donations), self.avg_donation)
+            format(self.name, donor_header_width, self._donation_total,
+                   self._donation_size, self.avg_donation)
 
     def get_report_row_list(self, donor_name_list):
         """
@@ -161,14 +188,14 @@ Foundation Board of Directors
         :param other:
         :return:
         """
-        return sum(self.donations) > sum(other.donations)
+        return self._donation_total > other._donation_total
 
     def sum_the_donations(self):
         """
         Sums all donations for all donors regardless of min/max
         :return: 
         """
-        self.sum_donations = sum(self.donations)
+        self.sum_donations = self._donation_total
 
     # noinspection PyAttributeOutsideInit
     def filter_projections(self, min_don, max_don):
@@ -29,6 +29,30 @@ class MailroomFPTest(unittest.TestCase):
         self.assertEqual(self._donor.avg_donation, 340)
         # Passed
 
+    def test_running_totals(self):
+        donor = m.Donor('Ron Weasley')
+        donor.add_donation(['100', 200, 600.5])
+        donor.add_donation(99.5)
+        self.assertEqual(donor._donation_total, 1000)
+        self.assertEqual(donor._donation_size, 4)
+        self.assertEqual(donor.avg_donation, 250)
+        donor.multiply_projections(2)
+        donor.sum_the_donations()
+        self.assertEqual(donor.sum_donations, 2000)
+        donor.donations = []
+        donor.add_donation(list(range(1, 100001)))
+        self.assertEqual(donor.avg_donation, 50000.5)
+
+    def test_avg_after_setter(self):
+        donor = m.Donor('Ron Weasley')
+        donor.add_donation([100, 200, 600])
+        donor.multiply_projections(2)
+        self.assertEqual(donor.avg_donation, 600)
+        donor.filter_projections(300, 500)
+        self.assertEqual(donor.avg_donation, 400)
+        donor.filter_projections(1000, None)
+        self.assertEqual(donor.avg_donation, 0)
+
     def test_thank_you(self):
         self._donor.donations = []
         self._donor.add_donation(500)
@@ -4,24 +4,105 @@ elmar_m / 22e88@mailbox.org
 Lesson09: classes for OOP mailroom program 
 '''
 
-import sqlite3, time
-from collections import defaultdict 
+import queue, sqlite3, threading, time
+from contextlib import contextmanager
+
+
+class ConnectionPool:
+    ''' One shared writer connection plus a bounded pool of reader
+        connections per database file. All connections use WAL mode, so
+        readers are not blocked by the writer. Tables and indexes are
+        created once, when the pool for a file is first requested.
+    '''
+    _pools = {}
+    _pools_lock = threading.Lock()
+
+    @classmethod
+    def get(cls, path='BLABLA.db', readers=4):
+        with cls._pools_lock:
+            if path not in cls._pools:
+                cls._pools[path] = cls(path, readers)
+            return cls._pools[path]
+
+
+    def __init__(self, path='BLABLA.db', readers=4):
+        self.path = path
+        self.readers = readers
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._write_lock = threading.RLock()
+        self.writer = self._connect()
+        self._create_schema()
+
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute('pragma journal_mode=wal')
+        conn.execute('pragma synchronous=normal')
+        return conn
+
+
+    def _create_schema(self):
+        with self.transaction() as conn:
+            conn.execute('''create table if not exists donors
+                     (uid TEXT PRIMARY KEY, 
+                    fname TEXT, lname TEXT, last_donation INT DEFAULT 0)''')
+            conn.execute('''create table if not exists mailroom
+                     (donation_ID INTEGER PRIMARY KEY AUTOINCREMENT, 
+                    date TEXT, donor TEXT, donation INT DEFAULT 0)''')
+            conn.execute('create index if not exists mailroom_donor on mailroom (donor)')
+            conn.execute('create index if not exists mailroom_donation on mailroom (donation)')
+
+
+    @contextmanager
+    def transaction(self):
+        ''' Serialize writers and commit (or roll back) once at the end. '''
+        with self._write_lock:
+            with self.writer:
+                yield self.writer
+
+
+    @contextmanager
+    def reader(self):
+        ''' Borrow a reader connection, waiting if all of them are in use. '''
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = None
+            with self._lock:
+                if self._created < self.readers:
+                    self._created += 1
+                    conn = self._connect()
+            if conn is None:
+                conn = self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+
+    def close(self):
+        with self._pools_lock:
+            if self._pools.get(self.path) is self:
+                del self._pools[self.path]
+        while not self._idle.empty():
+            self._idle.get_nowait().close()
+        self.writer.close()
+
 
 class Donor:
-    def __init__(self, fname, lname):
+    def __init__(self, fname, lname, path='BLABLA.db'):
         self.firstname = fname
         self.lastname = lname
         self.uid = '{}_{}'.format(fname, lname) 
-        self.db= sqlite3.connect('BLABLA.db')
-        self.dcursor = self.db.cursor()
-        self.dcursor.execute('''create table if not exists donors
-                     (uid TEXT PRIMARY KEY, 
-                    fname TEXT, lname TEXT, last_donation INT DEFAULT 0)''')
+        self.pool = ConnectionPool.get(path)
+        self.db = self.pool.writer
 
 
     def check_existence(self, uid):
-        self.dcursor.execute('select * from donors where uid = ?', (uid,))
-        result = self.dcursor.fetchall()
+        with self.pool.reader() as conn:
+            result = conn.execute('select * from donors where uid = ?', (uid,)).fetchall()
         if len(result) == 0:
             return None
         else:
@@ -30,10 +111,10 @@ class Donor:
     
     def create(self, uid, fname, lname, last_donation=None):
         try:
-            self.dcursor.execute('''insert into donors 
+            with self.pool.transaction() as conn:
+                conn.execute('''insert into donors 
                     (uid, fname, lname, last_donation)
                      values (?, ?, ?, ?)''', (uid, fname, lname, last_donation))
-            self.db.commit()
             return True
         except sqlite3.Error as e:
             print('Exception raised: {}'.format(e))
@@ -42,36 +123,56 @@ class Donor:
 
     def get_last_donation(self, donor):
         try:
-            self.dcursor.execute('select from donors (last_donation) where uid = ?', (donor))
-            return self.dcursor.fetchall()
+            with self.pool.reader() as conn:
+                return conn.execute('select from donors (last_donation) where uid = ?', (donor)).fetchall()
         except sqlite3.Error as e:
             print('Exception raised: {}'.format(e))
             return None
                     
 
 class Mailroom:
-    def __init__(self):
-        self.db= sqlite3.connect('BLABLA.db')
-        self.cursor = self.db.cursor()
-        self.cursor.execute('''create table if not exists mailroom
-                     (donation_ID INTEGER PRIMARY KEY AUTOINCREMENT, 
-                    date TEXT, donor TEXT, donation INT DEFAULT 0)''')
+    def __init__(self, path='BLABLA.db'):
+        self.pool = ConnectionPool.get(path)
+        self.db = self.pool.writer
 
 
     def add_donation(self, donor, amount):
         ts = time.strftime('%Y%m%d-%H%M%S')
         try: 
-            self.cursor.execute('insert into mailroom (date, donor, donation) values(?, ?, ?)', (ts, donor, amount)) 
-            self.cursor.execute('update donors set last_donation = ? where uid = ?', (amount, donor)) 
-            self.db.commit()
+            with self.pool.transaction() as conn:
+                conn.execute('insert into mailroom (date, donor, donation) values(?, ?, ?)', (ts, donor, amount)) 
+                conn.execute('update donors set last_donation = ? where uid = ?', (amount, donor)) 
             return True
         except sqlite3.Error as e:
             print('Exception raised: {}'.format(e))
 
 
+    def add_donations(self, rows):
+        ''' Insert an iterable of (donor, amount) rows in one transaction.
+            Returns the number of donations inserted.
+        '''
+        ts = time.strftime('%Y%m%d-%H%M%S')
+        last = {}
+
+        def stamped():
+            for donor, amount in rows:
+                last[donor] = amount
+                yield ts, donor, amount
+
+        try: 
+            with self.pool.transaction() as conn:
+                count = conn.executemany('insert into mailroom (date, donor, donation) values(?, ?, ?)', stamped()).rowcount
+                conn.executemany('update donors set last_donation = ? where uid = ?',
+                                 ((amount, donor) for donor, amount in last.items()))
+            return count
+        except sqlite3.Error as e:
+            print('Exception raised: {}'.format(e))
+            return 0
+
+
     def get_donations(self, donor):
-        self.cursor.execute('select date, donation from mailroom where donor = ?', (donor,))
-        return self.cursor.fetchall()
+        with self.pool.reader() as conn:
+            return conn.execute('select date, donation from mailroom where donor = ?', (donor,)).fetchall()
 
 
     def _get_average_donation(self, donor):
@@ -82,105 +183,175 @@ class Mailroom:
         
 
     def _get_number_of_donations(self, donor):
-        self.cursor.execute('select * from mailroom where donor = ?', (donor,))
-        num = self.cursor.fetchall()
-        return len(num)
+        with self.pool.reader() as conn:
+            return conn.execute('select count(*) from mailroom where donor = ?', (donor,)).fetchone()[0]
 
     
     def _get_donations_total(self, donor):
-        self.cursor.execute('select donation from mailroom where donor = ?', (donor,))
-        res = self.cursor.fetchall()
-        dlist = [x[0] for x in res]
-        total = sum(dlist) 
-        return total
+        with self.pool.reader() as conn:
+            return conn.execute('select coalesce(sum(donation), 0) from mailroom where donor = ?',
+                                (donor,)).fetchone()[0]
     
 
     def get_all_donors(self):
-        self.cursor.execute('select donor from mailroom')
-        raw = set(self.cursor.fetchall())    # unifying result by putting it into a set
+        with self.pool.reader() as conn:
+            raw = set(conn.execute('select distinct donor from mailroom').fetchall())
         return raw
+
+
+    def has_summary(self):
+        with self.pool.reader() as conn:
+            return conn.execute("select 1 from sqlite_master where type = 'table' "
+                                "and name = 'donor_summary'").fetchone() is not None
+
+
+    def enable_summary(self):
+        ''' Create the donor_summary table, fill it from the existing
+            donations and keep it up to date with triggers, so the report
+            reads one row per donor instead of scanning every donation.
+        '''
+        with self.pool.transaction() as conn:
+            conn.executescript('''
+                begin;
+                create table if not exists donor_summary
+                    (donor TEXT PRIMARY KEY, total INT DEFAULT 0, num INT DEFAULT 0);
+                delete from donor_summary;
+                insert into donor_summary (donor, total, num)
+                    select donor, sum(donation), count(*) from mailroom group by donor;
+
+                create trigger if not exists donor_summary_insert after insert on mailroom
+                begin
+                    insert or ignore into donor_summary (donor) values (new.donor);
+                    update donor_summary set total = total + new.donation, num = num + 1
+                        where donor = new.donor;
+                end;
+
+                create trigger if not exists donor_summary_delete after delete on mailroom
+                begin
+                    update donor_summary set total = total - old.donation, num = num - 1
+                        where donor = old.donor;
+                    delete from donor_summary where donor = old.donor and num = 0;
+                end;
+
+                create trigger if not exists donor_summary_update
+                after update of donor, donation on mailroom
+                begin
+                    update donor_summary set total = total - old.donation, num = num - 1
+                        where donor = old.donor;
+                    delete from donor_summary where donor = old.donor and num = 0;
+                    insert or ignore into donor_summary (donor) values (new.donor);
+                    update donor_summary set total = total + new.donation, num = num + 1
+                        where donor = new.donor;
+                end;
+                commit;
+                ''')
+
+
+    def disable_summary(self):
+        with self.pool.transaction() as conn:
+            conn.executescript('''
+                begin;
+                drop trigger if exists donor_summary_insert;
+                drop trigger if exists donor_summary_delete;
+                drop trigger if exists donor_summary_update;
+                drop table if exists donor_summary;
+                commit;
+                ''')
+
+
+    def _summary_source(self):
+        if self.has_summary():
+            return 'donor_summary'
+        return '(select donor, sum(donation) as total, count(*) as num from mailroom group by donor)'
+
+
+    def report_rows(self):
+        ''' Stream (donor, total, number, average) rows straight from a
+            grouped query, one row at a time.
+        '''
+        with self.pool.reader() as conn:
+            for donor, total, num in conn.execute(
+                    'select donor, total, num from {}'.format(self._summary_source())):
+                yield donor, total, num, format(total / num, '.2f')
     
 
-    def multiply(self, factor, above=None, below=None):
-        if above is None and below is None:
-            sql_show = 'select count(*) from mailroom where donation'
-            sql_total = 'select sum(donation) from mailroom where donation'
-            sql = 'update mailroom set donation = donation * ?'
-            args = (factor,)
-            self._preview(sql_show)
-            self.map_multiply(factor)
-            self._preview_total(sql_total, factor)
-            self._decide(sql, args)
-        elif below:
-            sql_show = 'select count(*) from mailroom where donation < ' + below
-            sql_total = 'select sum(donation) from mailroom where donation < ' + below
-            sql = 'update mailroom set donation = donation * ? where donation < ?'
-            args = (factor, below)
-            self._preview(sql_show)
-            self.map_multiply(factor, below=below)
-            self._preview_total(sql_total, factor)
-            self._decide(sql, args)
-        elif above:
-            sql_show = 'select count(*) from mailroom where donation > ' + above
-            sql_total = 'select sum(donation) from mailroom where donation > ' + above
-            sql = 'update mailroom set donation = donation * ? where donation > ?'
-            args = (factor, above)
-            self._preview(sql_show)
-            self.map_multiply(factor, above=above)
-            self._preview_total(sql_total, factor)
-            self._decide(sql, args)
+    def _challenge_filter(self, above=None, below=None):
+        ''' Build a parameterized where clause for the donations a
+            CHALLENGE applies to.
+        '''
+        clauses, args = ['donation'], []
+        if above is not None:
+            clauses.append('donation > ?')
+            args.append(above)
+        if below is not None:
+            clauses.append('donation < ?')
+            args.append(below)
+        return ' where ' + ' and '.join(clauses), tuple(args)
+
+
+    def preview_challenge(self, factor, above=None, below=None):
+        ''' Return (number of donations, their total, total multiplied by
+            factor) using SQL aggregates only; no rows are fetched.
+        '''
+        where, args = self._challenge_filter(above, below)
+        with self.pool.reader() as conn:
+            return conn.execute('select count(*), coalesce(sum(donation), 0), coalesce(sum(donation) * ?, 0) '
+                                'from mailroom' + where, (factor,) + args).fetchone()
+
+
+    def sample_challenge(self, factor, above=None, below=None, limit=10):
+        ''' Yield (current, multiplied) pairs for up to limit affected
+            donations (all of them if limit is None), streamed from a cursor.
+        '''
+        where, args = self._challenge_filter(above, below)
+        sql = 'select donation, donation * ? from mailroom' + where
+        if limit is not None:
+            sql += ' limit ?'
+            args += (limit,)
+        with self.pool.reader() as conn:
+            yield from conn.execute(sql, (factor,) + args)
+
+
+    def apply_challenge(self, factor, above=None, below=None):
+        ''' Multiply the affected donations in one transaction and return
+            how many were updated.
+        '''
+        where, args = self._challenge_filter(above, below)
+        with self.pool.transaction() as conn:
+            return conn.execute('update mailroom set donation = donation * ?' + where,
+                                (factor,) + args).rowcount
+
+
+    def multiply(self, factor, above=None, below=None, sample=10):
+        count, total, result = self.preview_challenge(factor, above, below)
+        print('\n\tThis operation would affect {} already existing donations!'.format(count))
+        if sample:
+            print('\tSee a listing of up to {}:\n'.format(sample))
+            self.map_multiply(factor, above=above, below=below, limit=sample)
+        print('\n\tYou would have to give an additional donation of {} to pass the CHALLENGE !'.format(result))
+        self._decide(factor, above, below)
         return True
     
     
-    def _decide(self, sql, args):
+    def _decide(self, factor, above=None, below=None):
         decision = input('\n\tDo you really want to accept this CHALLENGE ? (Y/N)')
         if decision == 'Y':
-            self._write_to_db(sql, args)
+            self._write_to_db(factor, above, below)
         else:
             print('\n\tCHALLENGE aborted.')
 
 
-    def _preview(self, show):
-        self.cursor.execute(show)
-        rows = self._beautify(self.cursor.fetchall())
-        print('\n\tThis operation would affect {} already existing donations!'.format(rows[0]))
-        print('\tSee a listing:\n')
-
-    
-    def _preview_total(self, total, factor): 
-        self.cursor.execute(total)
-        value = self._beautify(self.cursor.fetchall())
-        value_int = int(value[0])
-        result = value_int * int(factor)
-        print('\n\tYou would have to give an additional donation of {} to pass the CHALLENGE !'.format(result))
-
-
-    def _write_to_db(self, sql, args):
+    def _write_to_db(self, factor, above=None, below=None):
         try:
-            self.cursor.execute(sql, args)
-            self.db.commit()
+            self.apply_challenge(factor, above, below)
             print('\n\tThank you! Donations successfully updated in database.')
         except sqlite3.Error as e:
             print('Exception raised 4: {}'.format(e))
         
 
-    def map_multiply(self, factor, above=None, below=None):
-        self.cursor.execute('select donation from mailroom where donation')
-        donations_all = self._beautify(self.cursor.fetchall())
-        if above is None and below is None: 
-            donations_after = list(map(lambda x: x * int(factor), donations_all))
-            for i in zip(donations_all, donations_after):
-                print('\tcurrent donation: {:<10}   multiplied: {}'.format(i[0], i[1]))
-        elif below:
-            donations_below = list(filter(lambda x: x < int(below), donations_all))
-            donations_after = list(map(lambda x: x * int(factor), donations_below))
-            for i in zip(donations_below, donations_after):
-                print('\tcurrent donation: {:<10}   multiplied: {}'.format(i[0], i[1]))
-        elif above:
-            donations_above = list(filter(lambda x: x > int(above), donations_all))
-            donations_after = list(map(lambda x: x * int(factor), donations_above))
-            for i in zip(donations_above, donations_after):
-                print('\tcurrent donation: {:<10}   multiplied: {}'.format(i[0], i[1]))
+    def map_multiply(self, factor, above=None, below=None, limit=None):
+        for current, multiplied in self.sample_challenge(factor, above, below, limit):
+            print('\tcurrent donation: {:<10}   multiplied: {}'.format(current, multiplied))
 
 
     # ToDo: make more consistent usage of this function throughout the program... or omit it at all.
@@ -193,25 +364,13 @@ class Mailroom:
         
 
     def report(self):
-        donordict = defaultdict(list)
-        maxn = 0
-        for i in self.get_all_donors():
-            person = i[0]
-            total = self._get_donations_total(person)
-            slen = len(str(total))
-            if slen > maxn:
-                maxn = slen
-            num = self._get_number_of_donations(person)
-            avg = self._get_average_donation(person)
-            donordict[person].append(total)
-            donordict[person].append(num)
-            donordict[person].append(avg)
-        maxn += 3
+        rows = list(self.report_rows())
+        maxn = max((len(str(row[1])) for row in rows), default=0) + 3
         fstring = '\t{:<20} ' + '|' + '{:>' + str(maxn) + '} ' + '|' + '{:>9}' + '|' + '{:>20}' 
         print(fstring.format('Donor Name', 'Total', 'Num Gifts', 'Average Gift'))  
         print('\t' + '-' * (maxn + 54)) 
-        for i in donordict:
-            print(fstring.format(i, donordict[i][0], donordict[i][1], donordict[i][2])) 
+        for row in rows:
+            print(fstring.format(*row)) 
         
     
     def mail(self):
@@ -220,8 +379,8 @@ class Mailroom:
             for name in self._beautify(self.get_all_donors()):
                 ts = time.strftime('%Y%m%d-%H%M%S')
                 filename = name + '_' + ts + '.txt'
-                self.cursor.execute('select * from donors where uid = ?', (name,))
-                result = self.cursor.fetchall()
+                with self.pool.reader() as conn:
+                    result = conn.execute('select * from donors where uid = ?', (name,)).fetchall()
                 if len(result) == 0:
                     print('====Last_donation not found: {}'.format(name))
                 else:
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+
+'''
+file: test_mailroom.py
+elmar_m / 22e88@mailbox.org
+Lesson10: unittests for classes_mailroom.py
+'''
+
+
+import contextlib, io, os, tempfile, threading, unittest
+from unittest import mock
+from classes_mailroom import ConnectionPool, Mailroom, Donor
+
+class Mailroom_Tests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'test.db')
+        self.db = Mailroom(self.path)
+        for uid in ('John_Doe', 'Jane_Roe'):
+            fname, lname = uid.split('_')
+            Donor(fname, lname, self.path).create(uid, fname, lname)
+
+
+    def tearDown(self):
+        self.db.pool.close()
+        self.tmp.cleanup()
+
+
+    def test_shared_pool(self):
+        obj = Donor('John', 'Doe', self.path)
+        self.assertIs(obj.pool, self.db.pool)
+        self.assertIs(obj.db, self.db.db)
+        mode = self.db.db.execute('pragma journal_mode').fetchone()[0]
+        self.assertEqual(mode, 'wal')
+        indexes = {row[0] for row in self.db.db.execute(
+            "select name from sqlite_master where type = 'index' and tbl_name = 'mailroom'")}
+        self.assertTrue({'mailroom_donor', 'mailroom_donation'} <= indexes)
+
+
+    def test_add_donation(self):
+        self.assertTrue(self.db.add_donation('John_Doe', 8999))
+        self.assertEqual([x[1] for x in self.db.get_donations('John_Doe')], [8999])
+
+
+    def test_add_donations(self):
+        rows = [('John_Doe', 100), ('Jane_Roe', 5), ('John_Doe', 300)]
+        self.assertEqual(self.db.add_donations(iter(rows)), 3)
+        self.assertEqual([x[1] for x in self.db.get_donations('John_Doe')], [100, 300])
+        last = dict(self.db.db.execute('select uid, last_donation from donors'))
+        self.assertEqual(last, {'John_Doe': 300, 'Jane_Roe': 5})
+
+
+    def test_report_rows(self):
+        self.db.add_donations([('John_Doe', 100), ('Jane_Roe', 5), ('John_Doe', 301)])
+        self.assertEqual(sorted(self.db.report_rows()),
+                         [('Jane_Roe', 5, 1, '5.00'), ('John_Doe', 401, 2, '200.50')])
+        self.assertEqual(self.db._get_donations_total('Nobody'), 0)
+        self.assertEqual(self.db._get_number_of_donations('John_Doe'), 2)
+
+
+    def test_summary_table(self):
+        self.db.add_donations([('John_Doe', 100), ('Jane_Roe', 5)])
+        plain = io.StringIO()
+        with contextlib.redirect_stdout(plain):
+            self.db.report()
+        self.db.enable_summary()
+        self.assertTrue(self.db.has_summary())
+        summarized = io.StringIO()
+        with contextlib.redirect_stdout(summarized):
+            self.db.report()
+        self.assertEqual(plain.getvalue(), summarized.getvalue())
+
+        self.db.add_donations([('John_Doe', 300), ('Max_Moe', 7)])
+        with self.db.pool.transaction() as conn:
+            conn.execute('update mailroom set donation = donation * 2 where donor = ?', ('John_Doe',))
+            conn.execute('delete from mailroom where donor = ?', ('Jane_Roe',))
+        self.assertEqual(sorted(self.db.report_rows()),
+                         [('John_Doe', 800, 2, '400.00'), ('Max_Moe', 7, 1, '7.00')])
+        self.db.disable_summary()
+        self.assertFalse(self.db.has_summary())
+        self.assertEqual(sorted(self.db.report_rows()),
+                         [('John_Doe', 800, 2, '400.00'), ('Max_Moe', 7, 1, '7.00')])
+
+
+    def test_report_reads_once(self):
+        self.db.add_donations([('John_Doe', 123456), ('Jane_Roe', 5)])
+        out = io.StringIO()
+        with mock.patch.object(self.db, '_summary_source', wraps=self.db._summary_source) as source, \
+                contextlib.redirect_stdout(out):
+            self.db.report()
+        self.assertEqual(source.call_count, 1)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertEqual(lines[1], '\t' + '-' * 63)
+
+
+    def test_preview_challenge(self):
+        self.db.add_donations([('John_Doe', 100), ('Jane_Roe', 5), ('John_Doe', 300), ('Jane_Roe', 0)])
+        self.assertEqual(self.db.preview_challenge(2), (3, 405, 810))
+        self.assertEqual(self.db.preview_challenge('2', below='200'), (2, 105, 210))
+        self.assertEqual(self.db.preview_challenge(3, above=50, below=200), (1, 100, 300))
+        self.assertEqual(self.db.preview_challenge(3, above=1000), (0, 0, 0))
+        self.assertEqual(list(self.db.sample_challenge(2, above=50, limit=1)), [(100, 200)])
+        self.assertEqual(len(list(self.db.sample_challenge(2, limit=None))), 3)
+
+
+    def test_apply_challenge(self):
+        self.db.add_donations([('John_Doe', 100), ('Jane_Roe', 5), ('John_Doe', 300)])
+        self.assertEqual(self.db.apply_challenge(3, above=50), 2)
+        self.assertEqual(sorted(x[1] for x in self.db.get_donations('John_Doe')), [300, 900])
+
+
+    def test_multiply(self):
+        self.db.add_donations([('John_Doe', 100), ('Jane_Roe', 5)])
+        out = io.StringIO()
+        with mock.patch('builtins.input', return_value='N'), contextlib.redirect_stdout(out):
+            self.assertTrue(self.db.multiply('2', below='200', sample=1))
+        self.assertIn('affect 2 already existing', out.getvalue())
+        self.assertEqual(out.getvalue().count('current donation:'), 1)
+        self.assertIn('additional donation of 210 ', out.getvalue())
+        self.assertEqual(self.db.preview_challenge(1)[1], 105)
+
+        with mock.patch('builtins.input', return_value='Y'), contextlib.redirect_stdout(out):
+            self.db.multiply('2', above='50', sample=0)
+        self.assertEqual(self.db.preview_challenge(1)[1], 205)
+
+
+    def test_readers_are_bounded(self):
+        pool = ConnectionPool(self.path, readers=2)
+        seen = set()
+        with pool.reader() as a, pool.reader() as b:
+            seen.update((a, b))
+            done = []
+            waiter = threading.Thread(target=lambda: done.append(pool.reader().__enter__()))
+            waiter.start()
+            waiter.join(0.1)
+            self.assertEqual(done, [])
+        waiter.join(1)
+        self.assertIn(done[0], seen)
+        self.assertEqual(pool._created, 2)
+        pool.close()
+
+
+    def test_reads_skip_writer(self):
+        self.db.add_donation('John_Doe', 100)
+        with self.db.pool.transaction() as conn:
+            conn.execute("insert into donors (uid) values ('Max_Moe')")
+            conn.execute("insert into mailroom (donor, donation) values ('Max_Moe', 7)")
+            self.assertIsNone(Donor('Max', 'Moe', self.path).check_existence('Max_Moe'))
+            self.assertEqual(self.db.get_all_donors(), {('John_Doe',)})
+            self.assertEqual(self.db.get_donations('Max_Moe'), [])
+            self.assertEqual(self.db._get_number_of_donations('Max_Moe'), 0)
+            self.assertFalse(self.db.has_summary())
+        self.assertTrue(Donor('Max', 'Moe', self.path).check_existence('Max_Moe'))
+        self.assertEqual(self.db.get_donations('Max_Moe')[0][1], 7)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+"""times the report rows two ways: old per row np.mean and plain python"""
+
+import random
+import sys
+import time
+
+import numpy as np
+
+from mail_room_class_2 import Donor, DonorGroup
+
+
+def build_group(num_donors):
+    """creates DonorGroup with num_donors donors of 1 to 10 donations each"""
+    rng = random.Random(10)
+    dg = DonorGroup(Donor("Donor 0", [rng.uniform(1, 1000)]))
+    for i in range(1, num_donors):
+        dg.add_donor = Donor(f"Donor {i}", [rng.uniform(1, 1000) for _ in range(rng.randint(1, 10))])
+    return dg
+
+
+def per_row_numpy(dg):
+    """the old create_report rows, np.mean called on each donor's list"""
+    return [(donor, sum(dg.donor_dict[donor]),len(dg.donor_dict[donor]),np.mean(dg.donor_dict[donor])) for donor in dg.donor_dict]
+
+
+if __name__ == "__main__":
+    num_donors = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    dg = build_group(num_donors)
+
+    modes = [("per row np.mean", per_row_numpy),
+             ("python", lambda dg: dg.report_rows())]
+    for label, make_rows in modes:
+        start = time.perf_counter()
+        rows = make_rows(dg)
+        lines = ['{:<20s} ${:15,.2f} {:12d} ${:15,.2f}'.format(*row) for row in rows]
+        print(f"{label}: {len(lines):,} rows in {time.perf_counter() - start:.3f}s")
@@ -1,6 +1,5 @@
 """import required modules"""
 
-import numpy as np
 import os
 import sys
 
@@ -102,9 +101,14 @@ class DonorGroup(object):
         self.donor_list.append(new_donor.fullname)
         self.donor_dict[new_donor.fullname] = new_donor.donation    
 
+    def report_rows(self):
+        """returns (donor, total, count, average) for every donor
+        plain python sum and len per donor, np.mean on each list was the slow part"""
+        return [(donor, sum(d), len(d), sum(d) / len(d) if d else float("nan")) for donor, d in self.donor_dict.items()]
+
     @property
     def create_report(self):
-        rows = [(donor, sum(self.donor_dict[donor]),len(self.donor_dict[donor]),np.mean(self.donor_dict[donor])) for donor in self.donor_dict]
+        rows = self.report_rows()
 
         #rows.sort(key = takeSecond, reverse = True)
 
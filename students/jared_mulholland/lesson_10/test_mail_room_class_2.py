@@ -18,7 +18,7 @@ import sys
 sys.path.append("C:\\Users\\Jared\\Documents\\IntroToPython\\Self_Paced-Online\\students\\jared_mulholland\\lesson_10")
 
 import pytest
-import numpy as np
+import math
 import os
 from mail_room_class_2 import Donor, DonorGroup
 
@@ -74,6 +74,20 @@ def test_create_report():
     x = dg.create_report
     assert x == "report created"
 
+def test_report_rows():
+    """test report rows, including a donor with no donations"""
+    dg = DonorGroup(Donor("Jared Mulholland", [10000, 250.5]))
+    dg.add_donor = Donor("Chris Cornell", 50000)
+    dg.add_donor = Donor("Kim Thayil", [])
+    dg.add_donor = Donor("Ben Shepard", [4000, 10, 20])
+
+    rows = dg.report_rows()
+    assert rows[0] == ("Jared Mulholland", 10250.5, 2, 5125.25)
+    assert rows[1] == ("Chris Cornell", 50000, 1, 50000)
+    assert rows[2][1:3] == (0, 0)
+    assert math.isnan(rows[2][3])
+    assert rows[3][3] == pytest.approx(4030 / 3)
+
 def test_send_letters():
     """test that the letters are sent by checking number of files in folder after function is run"""
     jared = Donor("Jared Mulholland", 10000) 
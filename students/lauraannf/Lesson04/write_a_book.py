@@ -1,5 +1,23 @@
 # -*- coding: utf-8 -*-
+import mmap
+import os
 import random
+import struct
+from array import array
+from bisect import bisect_right
+from collections import Counter
+from collections.abc import Mapping, Sequence
+from itertools import accumulate
+
+# saved word_dict file: header (magic, 1 in native byte order, item count
+# of each section) then each section padded to 8 bytes. words are sorted
+# so a word's id is its place in that order, pairs are sorted
+# (id1 << 32 | id2) and each pair has its distinct followers, sorted by
+# id, with how many times each one followed the pair
+MAGIC = b'HOUND3G2'
+SECTIONS = (('word_offsets', 'Q'), ('word_text', 'B'), ('pairs', 'Q'),
+            ('offsets', 'Q'), ('followers', 'I'), ('counts', 'I'))
+HEADER = struct.Struct('8sQ' + str(len(SECTIONS)) + 'Q')
 
 
 def write_new():
@@ -25,25 +43,193 @@ def create_word_dict():
     return word_dict
 
 
-with open('hound.txt', 'r', encoding='utf8') as book_file:
-    # changed to with open
-    # change file to book_file
-    lines = book_file.readlines()
-    del lines[:38]
-    word_list = []
-    for line in lines:
-        for word in line.split():
-            word_list.append(word)
-    word_dict = create_word_dict()
-    word_list_new = ['Holmes', 'leaned']
-    word_key = word_list_new[0] + ' ' + word_list_new[1]
-    n = 1
-    while True:
-        if word_key not in word_dict:
-            break
-        word_list_new.append(random.choice(word_dict[word_key]))
-        word_key = word_list_new[n] + ' ' + word_list_new[n+1]
-        n = n + 1
+class WordList(Sequence):
+    """words from a saved word_dict file, looked up by id"""
+
+    def __init__(self, offsets, text):
+        self.offsets = offsets
+        self.text = text
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, it):
+        return self.encoded(it).decode('utf8')
+
+    def encoded(self, it):
+        return bytes(self.text[self.offsets[it]:self.offsets[it+1]])
+
+    def find(self, word):
+        # binary search, words are stored sorted
+        word = word.encode('utf8')
+        low, high = 0, len(self)
+        while low < high:
+            mid = (low + high) // 2
+            if self.encoded(mid) < word:
+                low = mid + 1
+            else:
+                high = mid
+        if low < len(self) and self.encoded(low) == word:
+            return low
+        return None
+
+
+class Followers(Sequence):
+    """the words following one pair, each repeated as often as it
+    followed it, without storing the repeats. a running total of the
+    counts is bisected to find a word, so random.choice picks each one
+    just as often as from the list create_word_dict makes
+    """
+
+    def __init__(self, words, ids, counts):
+        self.words = words
+        self.ids = ids
+        self.ends = list(accumulate(counts))
+
+    def __len__(self):
+        return self.ends[-1] if self.ends else 0
+
+    def __getitem__(self, it):
+        if it < 0:
+            it = it + len(self)
+        if not 0 <= it < len(self):
+            raise IndexError('follower index out of range')
+        return self.words[self.ids[bisect_right(self.ends, it)]]
+
+
+class SavedWordDict(Mapping):
+    """word_dict read straight from a memory-mapped file
+
+    works like the dict from create_word_dict: keys are 'word1 word2'
+    and values are Followers, which act like the lists of following
+    words, repeats included
+    """
+
+    def __init__(self, file_name):
+        with open(file_name, 'rb') as saved_file:
+            self.saved = mmap.mmap(saved_file.fileno(), 0,
+                                   access=mmap.ACCESS_READ)
+        view = memoryview(self.saved)
+        if len(view) < HEADER.size:
+            raise ValueError(file_name + ' is not a saved word_dict')
+        magic, byte_order, *sizes = HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise ValueError(file_name + ' is not a saved word_dict')
+        if byte_order != 1:
+            raise ValueError(file_name + ' was written with a different byte order')
+        sections = {}
+        start = HEADER.size
+        for (name, code), size in zip(SECTIONS, sizes):
+            length = size * array(code).itemsize
+            sections[name] = view[start:start + length].cast(code)
+            start = start + length + -length % 8
+        self.words = WordList(sections['word_offsets'], sections['word_text'])
+        self.pairs = sections['pairs']
+        self.offsets = sections['offsets']
+        self.followers = sections['followers']
+        self.counts = sections['counts']
+
+    def row(self, key):
+        two_words = key.split(' ')
+        if len(two_words) != 2:
+            return None
+        id1, id2 = self.words.find(two_words[0]), self.words.find(two_words[1])
+        if id1 is None or id2 is None:
+            return None
+        pair = id1 << 32 | id2
+        low, high = 0, len(self.pairs)
+        while low < high:
+            mid = (low + high) // 2
+            if self.pairs[mid] < pair:
+                low = mid + 1
+            else:
+                high = mid
+        if low < len(self.pairs) and self.pairs[low] == pair:
+            return low
+        return None
+
+    def __getitem__(self, key):
+        it = self.row(key)
+        if it is None:
+            raise KeyError(key)
+        start, stop = self.offsets[it], self.offsets[it+1]
+        return Followers(self.words, self.followers[start:stop],
+                         self.counts[start:stop])
+
+    def __contains__(self, key):
+        return self.row(key) is not None
+
+    def __iter__(self):
+        for pair in self.pairs:
+            yield self.words[pair >> 32] + ' ' + self.words[pair & 0xFFFFFFFF]
+
+    def __len__(self):
+        return len(self.pairs)
+
+
+def save_word_dict(word_dict, file_name):
+    # written to a temp file then renamed, so no one reads half a file
+    words = set()
+    for key, followers in word_dict.items():
+        words.update(key.split(' '))
+        words.update(followers)
+    encoded = sorted(word.encode('utf8') for word in words)
+    ids = {word.decode('utf8'): it for it, word in enumerate(encoded)}
+    rows = sorted((ids[key.split(' ')[0]] << 32 | ids[key.split(' ')[1]], key)
+                  for key in word_dict)
+    word_offsets = array('Q', [0])
+    for word in encoded:
+        word_offsets.append(word_offsets[-1] + len(word))
+    pairs = array('Q')
+    offsets = array('Q', [0])
+    followers = array('I')
+    counts = array('I')
+    for pair, key in rows:
+        pairs.append(pair)
+        counted = Counter(ids[word] for word in word_dict[key])
+        for word_id in sorted(counted):
+            followers.append(word_id)
+            counts.append(counted[word_id])
+        offsets.append(len(followers))
+    sections = {'word_offsets': word_offsets, 'word_text': b''.join(encoded),
+                'pairs': pairs, 'offsets': offsets, 'followers': followers,
+                'counts': counts}
+    with open(file_name + '.tmp', 'wb') as saved_file:
+        saved_file.write(HEADER.pack(MAGIC, 1, *(len(sections[name])
+                                                 for name, code in SECTIONS)))
+        for name, code in SECTIONS:
+            data = memoryview(sections[name]).cast('B')
+            saved_file.write(data)
+            saved_file.write(bytes(-len(data) % 8))
+    os.replace(file_name + '.tmp', file_name)
+
+
+if os.path.exists('hound.trigrams') and \
+        os.path.getmtime('hound.trigrams') >= os.path.getmtime('hound.txt'):
+    # saved word_dict is up to date, map it instead of rebuilding
+    word_dict = SavedWordDict('hound.trigrams')
+else:
+    with open('hound.txt', 'r', encoding='utf8') as book_file:
+        # changed to with open
+        # change file to book_file
+        lines = book_file.readlines()
+        del lines[:38]
+        word_list = []
+        for line in lines:
+            for word in line.split():
+                word_list.append(word)
+        word_dict = create_word_dict()
+    save_word_dict(word_dict, 'hound.trigrams')
+
+word_list_new = ['Holmes', 'leaned']
+word_key = word_list_new[0] + ' ' + word_list_new[1]
+n = 1
+while True:
+    if word_key not in word_dict:
+        break
+    word_list_new.append(random.choice(word_dict[word_key]))
+    word_key = word_list_new[n] + ' ' + word_list_new[n+1]
+    n = n + 1
 
 with open('new_hound.txt', 'w') as file_new:
     # changed to with open
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+"""
+Streaming reader and writer for the semicolon separated donor file format
+
+Each line of the file is `first;last;amount,amount,...`.  Files are read in
+large blocks and parsed a block of lines at a time, so the whole file is
+never held in memory.  Writes are collected into large buffers before they
+are handed to the file.
+"""
+
+import mmap
+
+BUFFER_SIZE = 1 << 20
+
+
+def iter_blocks(f, buffer_size=BUFFER_SIZE, use_mmap=False):
+    """Yield blocks of bytes from a file opened in binary mode"""
+    if not use_mmap:
+        yield from iter(lambda: f.read(buffer_size), b'')
+        return
+    try:
+        view = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except ValueError:
+        # empty files cannot be mapped
+        return
+    with view:
+        for start in range(0, len(view), buffer_size):
+            yield view[start:start + buffer_size]
+
+
+def iter_records(filename, buffer_size=BUFFER_SIZE, use_mmap=False):
+    """
+    Yield (first, last, donations) for each donor in the file
+
+    Lines are split out of each block as bytes, so a multi-byte character
+    cut by a block boundary is decoded once the rest of its line arrives.
+    Blank lines are skipped.
+    """
+    with open(filename, 'rb') as f:
+        rest = b''
+        for block in iter_blocks(f, buffer_size, use_mmap):
+            block = rest + block
+            end = block.rfind(b'\n') + 1
+            rest = block[end:]
+            yield from parse_lines(block[:end].decode().split('\n'))
+        if rest:
+            yield from parse_lines(rest.decode().split('\n'))
+
+
+def parse_lines(lines):
+    """Parse decoded lines into (first, last, donations) records"""
+    for line in lines:
+        if not line.strip():
+            continue
+        first, last, amounts = line.split(';')
+        yield first, last, list(map(float, amounts.split(',')))
+
+
+def write_records(filename, records, buffer_size=BUFFER_SIZE):
+    """Write (first, last, donations) records, buffer_size characters at a time"""
+    with open(filename, 'w', buffering=buffer_size) as f:
+        chunk = []
+        size = 0
+        for first, last, donations in records:
+            line = '{};{};{}\n'.format(first, last, ','.join(map(str, donations)))
+            chunk.append(line)
+            size += len(line)
+            if size >= buffer_size:
+                f.write(''.join(chunk))
+                chunk = []
+                size = 0
+        f.write(''.join(chunk))
+
+
+if __name__ == "__main__":
+    # time a round trip of a large generated donor file
+    import os
+    import sys
+    import tempfile
+    import time
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000000
+    filename = os.path.join(tempfile.mkdtemp(), 'donor_list.txt')
+    records = (('First{}'.format(i), 'Last{}'.format(i),
+                [float(i % 1000), 25.0, 100.5]) for i in range(count))
+
+    start = time.perf_counter()
+    write_records(filename, records)
+    print('wrote {:,} donors in {:.2f}s'.format(count, time.perf_counter() - start))
+    for use_mmap in (False, True):
+        start = time.perf_counter()
+        loaded = sum(1 for _ in iter_records(filename, use_mmap=use_mmap))
+        print('read {:,} donors (mmap={}) in {:.2f}s'.format(
+            loaded, use_mmap, time.perf_counter() - start))
+    os.remove(filename)
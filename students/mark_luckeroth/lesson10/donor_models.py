@@ -4,6 +4,8 @@
 A class-based system for managing donor information
 """
 
+import donor_io
+
 class Donor():
 
     def __init__(self, first, last, amount):
@@ -65,39 +67,46 @@ class DonorCollection():
 
     def __init__(self, donors=None):
         self.donorlist = donors
+        self.reindex()
+
+    @staticmethod
+    def key(first, last):
+        """Normalized (last, first) key used by the name index"""
+        return (last.strip().casefold(), first.strip().casefold())
+
+    def reindex(self):
+        """Rebuild the name index, e.g. after editing donorlist directly"""
+        self._index = {}
+        for donor in self.donorlist or ():
+            self._index.setdefault(self.key(donor.first_name, donor.last_name), donor)
 
     def add_donor(self, first, last, amount):
+        donor = Donor(first, last, amount)
         if self.donorlist == None:
-            self.donorlist = [Donor(first, last, amount)]
+            self.donorlist = [donor]
         else:
-            self.donorlist.append(Donor(first, last, amount))
+            self.donorlist.append(donor)
+        self._index.setdefault(self.key(first, last), donor)
 
-    def load_donors(self, filename='donor_list.txt'):
-        with open(filename, 'r') as f:
-            for line in f:
-                load = line.split(';')
-                amount = [float(_) for _ in load[2].split(',')]
-                self.add_donor(load[0],load[1],amount)
+    def load_donors(self, filename='donor_list.txt', use_mmap=False):
+        for first, last, amount in donor_io.iter_records(filename, use_mmap=use_mmap):
+            self.add_donor(first, last, amount)
 
     def save_donors(self, filename='donor_list.txt'):
-        with open(filename, 'w') as f:
-            for donor in self.donorlist:
-                f.write("{};{};{}\n".format(donor.first_name, donor.last_name,
-                                            ','.join(str(a) for a in donor.donations)))
+        donor_io.write_records(filename, ((donor.first_name, donor.last_name, donor.donations)
+                                          for donor in self.donorlist or ()))
 
     @property
     def names(self):
         return [(donor.last_name, donor.first_name) for donor in self.donorlist]
 
     def find(self, first, last):
-        if (last, first) in self.names:
-            return self.donorlist[self.names.index((last, first))]
-        else:
-            return None
+        return self._index.get(self.key(first, last))
 
     def update(self, first, last, amount):
-        if (last, first) in self.names:
-            self.find(first, last).add_donation(amount)
+        donor = self.find(first, last)
+        if donor is not None:
+            donor.add_donation(amount)
         else:
             self.add_donor(first, last, amount)
 
@@ -7,6 +7,7 @@ import pytest
 import math
 from random import shuffle
 
+import donor_io
 from donor_models import *
 from cli_main import *
 
@@ -118,3 +119,44 @@ def test_filter():
     assert d.donorlist[4].donations == [120.]
     assert d.donorlist is not c.donorlist
 
+
+def test_find_ignores_case():
+    c = DonorCollection([Donor('Peter', 'Pan', [10.]), Donor('Paul', 'Hollywood', [100.])])
+    assert c.find('peter', 'PAN') is c.donorlist[0]
+    c.update(' paul ', 'hollywood', 1.)
+    assert len(c.donorlist) == 2
+    assert c.donorlist[1].donations == [100., 1.]
+
+def test_reindex():
+    c = DonorCollection([Donor('Mark', 'Luckeroth', 1000.)])
+    assert c.find('Mark', 'Luckeroth') is c.donorlist[0]
+    c.donorlist.append(Donor('Raja', 'Koduri', 60.))
+    assert c.find('Raja', 'Koduri') is None
+    c.reindex()
+    assert c.find('Raja', 'Koduri') is c.donorlist[1]
+
+def test_stream_round_trip(tmpdir):
+    filename = str(tmpdir.join('donors.txt'))
+    c = DonorCollection()
+    c.add_donor('Zoë', 'Ångström', [1.5, 2.])
+    c.add_donor('Mary', 'Berry', 100.)
+    c.save_donors(filename)
+    for use_mmap in (False, True):
+        d = DonorCollection()
+        d.load_donors(filename, use_mmap=use_mmap)
+        assert [(x.first_name, x.last_name, x.donations) for x in d.donorlist] == \
+            [('Zoë', 'Ångström', [1.5, 2.]), ('Mary', 'Berry', [100.])]
+
+def test_stream_small_blocks(tmpdir):
+    filename = str(tmpdir.join('donors.txt'))
+    records = [('Zoë{}'.format(i), 'Last', [float(i), 2.]) for i in range(50)]
+    donor_io.write_records(filename, records, buffer_size=16)
+    for use_mmap in (False, True):
+        assert list(donor_io.iter_records(filename, buffer_size=7,
+                                          use_mmap=use_mmap)) == records
+
+def test_stream_empty_file(tmpdir):
+    filename = str(tmpdir.join('donors.txt'))
+    DonorCollection().save_donors(filename)
+    for use_mmap in (False, True):
+        assert list(donor_io.iter_records(filename, use_mmap=use_mmap)) == []
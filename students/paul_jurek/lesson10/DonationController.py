@@ -4,13 +4,67 @@ Expected to have one controller created for each non-profit organization.
 This controller contains information about organization and manages creation
 and management of donations"""
 
-import copy
 import datetime
+from heapq import heappush, heapreplace, heappop, merge, nlargest
+from itertools import groupby
 from pathlib import Path
 import pickle
 from Donor import Donor, Donation
 
 
+class IdAllocator:
+    """allocates the lowest unused positive integer id
+
+    ids above the high-water mark have never been used.  free ids below it
+    are kept in a min-heap of [start, end) ranges; ids that were claimed out
+    of order are skipped lazily when their range reaches the top of the heap,
+    so each operation is O(log n)"""
+
+    def __init__(self, used=()):
+        """args:
+            used : ids already in use
+            """
+        self.high = 0
+        self._free = []
+        for used_id in sorted(used):
+            self.claim(used_id)
+
+    def peek(self, taken=()):
+        """returns the lowest free id without reserving it
+        args:
+            taken : container of ids currently in use
+            """
+        while self._free:
+            start, end = self._free[0]
+            if start >= end:
+                heappop(self._free)
+            elif start in taken:
+                heapreplace(self._free, (start + 1, end))
+            else:
+                return start
+        return self.high + 1
+
+    def claim(self, used_id):
+        """records id as used, remembering any gap below it as free"""
+        if used_id > self.high:
+            if used_id > self.high + 1:
+                heappush(self._free, (self.high + 1, used_id))
+            self.high = used_id
+
+    def release(self, used_id):
+        """makes id avaliable for reuse"""
+        if 0 < used_id <= self.high:
+            heappush(self._free, (used_id, used_id + 1))
+
+
+# maps a donation date to the first day of the period it is rolled up into
+PERIOD_STARTS = {
+    'day': lambda moment: moment.date(),
+    'month': lambda moment: datetime.date(moment.year, moment.month, 1),
+    'year': lambda moment: datetime.date(moment.year, 1, 1),
+}
+
+
 class DonationController:
     """organization controller for donations"""
 
@@ -20,6 +74,28 @@ class DonationController:
             """
         self.name = name
         self.donors = {}
+        self._id_allocator = IdAllocator()
+        self.journal = None
+
+    def __getstate__(self):
+        """journal holds an open file so it is never pickled"""
+        state = self.__dict__.copy()
+        state.pop('journal', None)
+        return state
+
+    def log_event(self, *event):
+        """appends event to journal if one is attached"""
+        journal = getattr(self, 'journal', None)
+        if journal is not None:
+            journal.record(*event)
+
+    @property
+    def id_allocator(self):
+        """returns donor id allocator.  Rebuilt from donors for controllers
+        pickled before the allocator existed"""
+        if getattr(self, '_id_allocator', None) is None:
+            self._id_allocator = IdAllocator(self.donors)
+        return self._id_allocator
 
     def find_donor(self, donor: Donor):
         """searches through donor list and returns donor
@@ -41,46 +117,82 @@ class DonationController:
                 self.donors[donor.id] = donor
             except AttributeError:
                 raise AttributeError('Donor object needs id')
+            self.id_allocator.claim(donor.id)
+            self.log_event('donor', donor.id, donor.firstname, donor.lastname,
+                           donor.email, tuple(donor.donations), donor._donation_id)
+
+    def remove_donor(self, donor):
+        """removes donor and frees id for reuse"""
+        found = self.find_donor(donor)
+        if found is None:
+            raise IndexError('Donor does not exist')
+        del self.donors[found.id]
+        self.id_allocator.release(found.id)
+        self.log_event('remove', found.id)
     
     def build_donor_from_name(self, firstname, lastname):
         """interface to build donor from just name and automatically assign id"""
         self.create_donor(Donor(id=self.next_id, firstname=firstname, lastname=lastname))
 
+    def build_donors_from_names(self, names):
+        """bulk import of donors from iterable of (firstname, lastname)
+        returns list of assigned ids"""
+        ids = []
+        for firstname, lastname in names:
+            donor_id = self.next_id
+            self.create_donor(Donor(id=donor_id, firstname=firstname, lastname=lastname))
+            ids.append(donor_id)
+        return ids
+
     def get_total_donations(self):
         """returns total donations in controller"""
         return sum([k.donation_total() for i, k in self.donors.items() if k.donations])
 
-    def create_donation(self, donor, amount, date=datetime.datetime.utcnow()):
-        """creates donation in input donor"""
+    def create_donation(self, donor, amount, date=None):
+        """creates donation in input donor, dated now unless date given"""
 
-        if self.find_donor(donor) is None:
+        found = self.find_donor(donor)
+        if found is None:
             raise IndexError('Donor does not exist')
-        self.find_donor(donor).add_donation(amount)
+        found.add_donation(amount, date=date)
+        self.log_event('donation', found.id, found.donations[-1])
+
+    def donation_total_between(self, start=None, end=None):
+        """returns amount given by all donors from start up to but not
+        including end.  O(log n) per donor using each donor's ledger"""
+        return sum(donor.donation_total_between(start, end) for donor in self.donors.values())
+
+    def rollup(self, period='month', start=None, end=None):
+        """returns dict of {first day of period: total given} across all
+        donors, in date order
+        args:
+            period : 'day', 'month' or 'year'
+            start, end : only donations from start up to but not including end
+            """
+        try:
+            period_start = PERIOD_STARTS[period]
+        except KeyError:
+            raise ValueError(f'period should be one of {", ".join(PERIOD_STARTS)}')
+        # each ledger is already sorted so donors are merged, not re-sorted
+        ordered = merge(*(donor.donations_between(start, end) for donor in self.donors.values()),
+                        key=lambda i: i.date)
+        return {day: sum(i.amount for i in group)
+                for day, group in groupby(ordered, key=lambda i: period_start(i.date))}
 
     @property
     def next_id(self):
         """returns the next avaliable int id from list
         used to asign donor ids"""
-        donor_id_list = {i for i in self.donors}
-        if self.donors:
-            max_id = max(donor_id_list)
-        else:
-            max_id = 1
-        
-        # create range of ints
-        non_used_ids = set(range(1,max_id+1)) - donor_id_list
-        if non_used_ids:
-            return min(non_used_ids)
-        else:
-            return max_id + 1
+        return self.id_allocator.peek(self.donors)
 
     def display_donors(self):
         """displays a list of donors in printed format"""
         donor_list = [":".join([str(donor_id), donor.fullname]) for donor_id, donor in self.donors.items()]
         print("\n".join(donor_list))
 
-    def donor_report(self):
+    def donor_report(self, top=None):
         """handles process for main screens report selection
+        top: only print the top donors, selected with a heap in O(N log top)
 
         If the user (you) selected “Create a Report”, print a list of your donors,
         sorted by total historical donation amount.
@@ -106,8 +218,11 @@ class DonationController:
         print(f"{'Donor Name':<26}|{'Total Given':^15}|"
             f"{'Num Gifts':^11}|{'Average Gift':^15}")
         print('-'*70)
-        donor_stats = [donor.summarize_donor() for id, donor in self.donors.items()]
-        donor_stats.sort(key=lambda tup: tup[2], reverse=True)
+        donor_stats = (donor.summarize_donor() for id, donor in self.donors.items())
+        if top is None:
+            donor_stats = sorted(donor_stats, key=lambda tup: tup[2], reverse=True)
+        else:
+            donor_stats = nlargest(top, donor_stats, key=lambda tup: tup[2])
         for summary in donor_stats:
             print(f"{summary[1]:<26} ${summary[2]:>13.2f}  "
                 f"{summary[3]:>10}  ${summary[4]:>14.2f}")
@@ -144,28 +259,120 @@ class DonationController:
 
     def challenge(self, factor, min_donation=0, max_donation=1e9):
         """increases donations due to nice donor
-        returns copy of donation controller with multiplied input"""
+        returns lazy projected view of donation controller with multiplied input.
+        the view only copies donors if it is modified"""
 
         if factor < 1:
             raise ValueError('Donors are not allowed to take $ from our cause.  Please consider factor of 10 ;)')
-        # copy generated to avoid messing with old database
-        new_db = copy.deepcopy(self)
-        mod_func = modifying_fun_generator(factor)
-        mod_filter = filter_fun_generator(min_donation=min_donation, max_donation=max_donation)
-        # seperate list made to simplify code as we need to regenerate dict
-        donor_list = map(mod_func, filter(mod_filter, new_db.donors.values()))
-        # rebuilds donors dict
-        new_db.donors = {i.id:i for i in donor_list}        
-        return new_db
+        return ProjectedController(self, factor=factor,
+                                   min_donation=min_donation,
+                                   max_donation=max_donation)
 
     def project_donation(self, factor, min_donation=0, max_donation=1e9):
         """provides projected donation amount assuming donor matches all donations"""
         return self.challenge(factor=factor, min_donation=min_donation, max_donation=max_donation).get_total_donations()
 
+
+class ProjectedController(DonationController):
+    """copy-on-write view of a donation controller with a challenge applied.
+
+    factor and filter are applied when donors are read, so creating the view
+    costs O(1) memory.  A real copy of the donors is only made the first time
+    the view is modified, after which it no longer follows the source."""
+
+    def __init__(self, controller, factor, min_donation=0, max_donation=1e9):
+        """args:
+            controller : controller (or view) the projection is based on
+            factor : multiplier applied to matching donations
+            min_donation : smallest donation amount matched
+            max_donation : largest donation amount matched
+            """
+        super().__init__(controller.name)
+        # donors are read through from source and ids come from it until
+        # the view is materialized, so drop the empty dict and allocator
+        self._donors = None
+        self._id_allocator = None
+        self.source = controller
+        self.factor = factor
+        self.min_donation = min_donation
+        self.max_donation = max_donation
+
+    @property
+    def donors(self):
+        """returns projected donors dict, built on read until materialized"""
+        if self._donors is not None:
+            return self._donors
+        return {donor_id: self.project_donor(donor)
+                for donor_id, donor in self.source.donors.items()}
+
+    @donors.setter
+    def donors(self, donors):
+        self._donors = donors
+
+    @property
+    def materialized(self):
+        """returns True once the view holds its own copy of the donors"""
+        return self._donors is not None
+
+    def materialize(self):
+        """freezes the projection into this controller's own donors dict"""
+        if self._donors is None:
+            self._donors = self.donors
+
+    def project_donor(self, donor):
+        """returns new donor with filtered and multiplied donations.
+        Donation tuples are immutable so the source donor is left untouched"""
+        projected = Donor(id=donor.id, firstname=donor.firstname,
+                          lastname=donor.lastname, email=donor.email)
+        projected.set_donations(donor.donations)
+        projected._donation_id = donor._donation_id
+        projected = filter_donor_donations(projected,
+                                           min_donation=self.min_donation,
+                                           max_donation=self.max_donation)
+        return modify_donor_donations(factor=self.factor, donor=projected)
+
+    def find_donor(self, donor):
+        """returns projected donor, or none if not found"""
+        if self._donors is not None:
+            return super().find_donor(donor)
+        found = self.source.find_donor(donor)
+        return None if found is None else self.project_donor(found)
+
+    def get_total_donations(self):
+        """returns total projected donations without copying any donors"""
+        if self._donors is not None:
+            return super().get_total_donations()
+        return sum(i.amount * self.factor
+                   for donor in self.source.donors.values()
+                   for i in donor.donations
+                   if self.min_donation <= i.amount <= self.max_donation)
+
+    def create_donor(self, donor):
+        """creates donor in a materialized copy of the projection"""
+        self.materialize()
+        super().create_donor(donor)
+
+    def remove_donor(self, donor):
+        """removes donor from a materialized copy of the projection"""
+        self.materialize()
+        super().remove_donor(donor)
+
+    def create_donation(self, donor, amount, date=None):
+        """creates donation in a materialized copy of the projection"""
+        self.materialize()
+        super().create_donation(donor, amount, date=date)
+
+    @property
+    def next_id(self):
+        """returns the next avaliable id, from the source until materialized"""
+        if self._donors is None:
+            return self.source.next_id
+        return super().next_id
+
 def modify_donor_donations(factor, donor):
     """returns a modified donor with their donations matched by nice donor"""
     new_donations = [Donation(amount=i.amount*factor, date=i.date, id=i.id) for i in donor.donations]
-    donor._donations = new_donations
+    donor.set_donations(new_donations)
     return donor
 
 def modifying_fun_generator(factor):
@@ -175,7 +382,7 @@ def modifying_fun_generator(factor):
 def filter_donor_donations(donor, min_donation=0, max_donation = 1.0e9):
     """filters donor donations to just those meeting criteria"""
     filtered_donations = [Donation(amount=i.amount, date=i.date, id=i.id) for i in donor.donations if (i.amount>=min_donation and i.amount <= max_donation) ]
-    donor._donations = filtered_donations
+    donor.set_donations(filtered_donations)
     return donor
 
 def filter_fun_generator(min_donation=0, max_donation=1.0e9):
@@ -0,0 +1,169 @@
+"""append-only journal persistence for donation controllers
+
+Instead of pickling the whole controller on every save, each change (new
+donor, new donation, removed donor) is appended to a journal file as a
+length-prefixed, checksummed record.  Every so often the journal is
+compacted: the whole controller is written to a snapshot file and the
+journal is emptied.  Loading reads the snapshot and replays the journal.
+
+A record cut short by a crash fails its checksum; replay stops there and the
+torn tail is truncated, so the database comes back as of the last complete
+record."""
+
+import os
+from pathlib import Path
+import pickle
+import struct
+import zlib
+
+from DonationController import DonationController, load_donation_controller
+from Donor import Donor
+
+# payload length and crc32 of payload
+RECORD_HEADER = struct.Struct('>II')
+
+
+class DonationJournal:
+    """journal and snapshot files backing a donation controller"""
+
+    def __init__(self, path, snapshot_every=10000, sync=False):
+        """args:
+            path : base path.  '.journal' and '.snapshot' files are created
+                next to it
+            snapshot_every : number of records after which the journal is
+                compacted into a new snapshot
+            sync : fsync after every record for durability against power loss
+            """
+        path = Path(path)
+        self.journal_path = path.with_name(path.name + '.journal')
+        self.snapshot_path = path.with_name(path.name + '.snapshot')
+        self.snapshot_every = snapshot_every
+        self.sync = sync
+        self.controller = None
+        self.seq = 0
+        self.pending = 0
+        self._file = None
+
+    def open(self, name='', initial=None):
+        """loads controller from snapshot and journal and attaches journal
+        args:
+            name : organization name used if no database exists yet
+            initial : controller used to seed a new database, e.g. one
+                loaded from an old whole-file pickle
+        returns controller"""
+        snapshot_seq = 0
+        if self.snapshot_path.exists():
+            with open(self.snapshot_path, 'rb') as f:
+                snapshot_seq, controller = pickle.load(f)
+        elif initial is not None:
+            controller = initial
+        else:
+            controller = DonationController(name=name)
+        controller.journal = None
+
+        self.seq = snapshot_seq
+        self.pending = 0
+        for seq, event in self.replay():
+            if seq > snapshot_seq:
+                apply_event(controller, event)
+                self.pending += 1
+            self.seq = max(self.seq, seq)
+
+        self.controller = controller
+        self._file = open(self.journal_path, 'ab')
+        controller.journal = self
+        if not self.snapshot_path.exists():
+            # new database: first snapshot records name and any seed data
+            self.compact()
+        return controller
+
+    def replay(self):
+        """yields (seq, event) for each complete record in the journal and
+        truncates any torn record left by a crash"""
+        if not self.journal_path.exists():
+            return
+        good = 0
+        with open(self.journal_path, 'rb') as f:
+            while True:
+                header = f.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    break
+                length, crc = RECORD_HEADER.unpack(header)
+                payload = f.read(length)
+                if len(payload) < length or zlib.crc32(payload) != crc:
+                    break
+                good = f.tell()
+                yield pickle.loads(payload)
+        if good < self.journal_path.stat().st_size:
+            os.truncate(self.journal_path, good)
+
+    def record(self, *event):
+        """appends one event to the journal.  Cost does not depend on the
+        size of the database"""
+        self.seq += 1
+        payload = pickle.dumps((self.seq, event), protocol=pickle.HIGHEST_PROTOCOL)
+        self._file.write(RECORD_HEADER.pack(len(payload), zlib.crc32(payload)))
+        self._file.write(payload)
+        self._file.flush()
+        if self.sync:
+            os.fsync(self._file.fileno())
+        self.pending += 1
+        if self.snapshot_every and self.pending >= self.snapshot_every:
+            self.compact()
+
+    def compact(self):
+        """writes whole controller to snapshot and empties the journal.
+        Snapshot is written to a temp file and renamed into place; it stores
+        the last sequence number so a crash before the journal is emptied
+        does not replay events twice"""
+        temp_path = self.snapshot_path.with_name(self.snapshot_path.name + '.tmp')
+        with open(temp_path, 'wb') as f:
+            pickle.dump((self.seq, self.controller), f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.snapshot_path)
+
+        self._file.close()
+        self._file = open(self.journal_path, 'wb')
+        self.pending = 0
+
+    def close(self):
+        """closes journal file and detaches it from the controller"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self.controller is not None:
+            self.controller.journal = None
+
+
+def apply_event(controller, event):
+    """applies a journal event to a controller"""
+    kind, donor_id, *details = event
+    if kind == 'donor':
+        firstname, lastname, email, donations, donation_id = details
+        donor = Donor(id=donor_id, firstname=firstname, lastname=lastname, email=email)
+        donor.set_donations(donations)
+        donor._donation_id = donation_id
+        controller.create_donor(donor)
+    elif kind == 'donation':
+        donation, = details
+        donor = controller.find_donor(donor_id)
+        donor.append_donation(donation)
+    elif kind == 'remove':
+        controller.remove_donor(donor_id)
+    else:
+        raise ValueError(f'unknown journal event {kind!r}')
+
+
+def open_donation_controller(path, name='', legacy_database=None, **kwargs):
+    """opens journaled controller at path.  If no database exists yet but a
+    whole-file pickle from save_donation_controller does, it is used to seed
+    the first snapshot"""
+    journal = DonationJournal(path, **kwargs)
+    initial = None
+    if (legacy_database is not None and Path(legacy_database).exists()
+            and not journal.snapshot_path.exists()
+            and not journal.journal_path.exists()):
+        initial = load_donation_controller(legacy_database)
+    return journal.open(name=name, initial=initial)
@@ -1,10 +1,92 @@
 """donor class controlling donor behavior"""
 
+from bisect import bisect_left, bisect_right
 from collections import namedtuple
 import datetime
+from itertools import accumulate
 
 Donation = namedtuple('Donation', ['amount', 'date', 'id'])
 
+
+def as_datetime(moment):
+    """returns datetime for date or datetime so both can bound a range"""
+    if isinstance(moment, datetime.datetime) or moment is None:
+        return moment
+    return datetime.datetime.combine(moment, datetime.time())
+
+
+class DonationLedger:
+    """donations kept sorted by date with running totals
+
+    range queries bisect the sorted dates and period totals subtract two
+    prefix sums, so both are O(log n) however many donations there are.
+    donations given in date order are appended in O(1).  version counts
+    changes so callers can tell when results they derived are stale"""
+
+    def __init__(self, donations=()):
+        """args:
+            donations : Donation tuples in any order
+            """
+        self.version = 0
+        self._load(donations)
+
+    def _load(self, donations):
+        """sorts donations by date and builds their running totals"""
+        self.donations = sorted(donations, key=lambda i: i.date)
+        self.dates = [i.date for i in self.donations]
+        self.totals = [0] + list(accumulate(i.amount for i in self.donations))
+
+    def __len__(self):
+        return len(self.donations)
+
+    def add(self, donation):
+        """adds donation, rebuilding running totals only after an out of
+        order date"""
+        self.version += 1
+        if not self.dates or donation.date >= self.dates[-1]:
+            self.donations.append(donation)
+            self.dates.append(donation.date)
+            self.totals.append(self.totals[-1] + donation.amount)
+            return
+        index = bisect_right(self.dates, donation.date)
+        self.dates.insert(index, donation.date)
+        self.donations.insert(index, donation)
+        del self.totals[index + 1:]
+        self.totals.extend(list(accumulate((i.amount for i in self.donations[index:]),
+                                           initial=self.totals[index]))[1:])
+
+    def replace(self, donations):
+        """replaces every donation, e.g. with filtered or multiplied ones"""
+        self._load(donations)
+        self.version += 1
+
+    def span(self, start=None, end=None):
+        """returns (first, stop) indexes of donations from start up to but
+        not including end.  either bound may be a date, datetime or None"""
+        first = 0 if start is None else bisect_left(self.dates, as_datetime(start))
+        stop = len(self.dates) if end is None else bisect_left(self.dates, as_datetime(end))
+        return first, max(first, stop)
+
+    def between(self, start=None, end=None):
+        """returns donations from start up to but not including end"""
+        first, stop = self.span(start, end)
+        return self.donations[first:stop]
+
+    def total(self, start=None, end=None):
+        """returns amount given from start up to but not including end"""
+        first, stop = self.span(start, end)
+        return self.totals[stop] - self.totals[first]
+
+    def count(self, start=None, end=None):
+        """returns number of donations from start up to but not including end"""
+        first, stop = self.span(start, end)
+        return stop - first
+
+    def last_days(self, days, now=None):
+        """returns donations made in the last days days"""
+        now = datetime.datetime.utcnow() if now is None else as_datetime(now)
+        return self.between(now - datetime.timedelta(days=days))
+
 # TODO: add email validation https://www.pythoncentral.io/how-to-validate-an-email-address-using-python/
 
 class Donor:
@@ -28,6 +110,30 @@ class Donor:
         self.email = email
         self._donations = []
         self._donation_id = 1
+        self._ledger = None
+
+    def __getstate__(self):
+        """ledger is rebuilt from donations so it is never pickled"""
+        state = self.__dict__.copy()
+        state.pop('_ledger', None)
+        return state
+
+    @property
+    def ledger(self):
+        """returns donations sorted by date, built on first use.  donations
+        must only change through add_donation, append_donation or
+        set_donations, which keep the ledger up to date"""
+        ledger = getattr(self, '_ledger', None)
+        if ledger is None:
+            ledger = self._ledger = DonationLedger(self._donations)
+        return ledger
+
+    def set_donations(self, donations):
+        """replaces all donations, e.g. with filtered or multiplied ones"""
+        self._donations = list(donations)
+        ledger = getattr(self, '_ledger', None)
+        if ledger is not None:
+            ledger.replace(self._donations)
 
     def donation_total(self):
         """returns the total amount the donor has donated"""
@@ -37,10 +143,27 @@ class Donor:
         else:
             return 0
 
-    def add_donation(self, amount, date=datetime.datetime.utcnow()):
-        """adds donation for user"""
-        self._donations.append(Donation(amount=amount, date=date, id=self._donation_id))
-        self._donation_id += 1
+    def add_donation(self, amount, date=None):
+        """adds donation for user, dated now unless date given"""
+        if date is None:
+            date = datetime.datetime.utcnow()
+        self.append_donation(Donation(amount=amount, date=date, id=self._donation_id))
+
+    def append_donation(self, donation):
+        """adds an existing Donation, e.g. replayed from a journal, keeping
+        its id"""
+        ledger = self.ledger
+        self._donations.append(donation)
+        ledger.add(donation)
+        self._donation_id = donation.id + 1
+
+    def donations_between(self, start=None, end=None):
+        """returns donations from start up to but not including end"""
+        return self.ledger.between(start, end)
+
+    def donation_total_between(self, start=None, end=None):
+        """returns amount donated from start up to but not including end"""
+        return self.ledger.total(start, end)
 
     def donation_count(self):
         """returns count of donations"""
@@ -1,11 +1,12 @@
 """entry point to mailroom application"""
 
-from pathlib import Path
-from DonationController import DonationController, save_donation_controller, load_donation_controller
+from DonationController import DonationController
+from DonationJournal import open_donation_controller
 from Donor import Donor
 from helpers import menu_selection
 
-CONTROLLER = load_donation_controller('stw.p')
+# changes are journaled as they happen; stw.p seeds the first snapshot
+CONTROLLER = open_donation_controller('stw', legacy_database='stw.p')
 
 def main_menu():
     """calls main menu for program"""
@@ -77,8 +78,8 @@ def send_thank_you_letters():
 
 
 def save_database():
-    """saves default database"""
-    save_donation_controller(CONTROLLER, Path('stw.p'))
+    """saves default database by compacting journal into a snapshot"""
+    CONTROLLER.journal.compact()
 
 
 def create_sample_donor_database():
@@ -86,3 +87,4 @@ def create_sample_donor_database():
     allows us to test scalability"""
 if __name__ == '__main__':
     main_menu()
+    CONTROLLER.journal.close()
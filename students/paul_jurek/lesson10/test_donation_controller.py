@@ -155,3 +155,115 @@ def test_projecting_donation(stw, donor1, donor2):
                 stw.create_donation(donor=donor1, amount=donation_amount, date=datetime.datetime(2018,i,1))
 
         assert stw.project_donation(factor=FACTOR, min_donation=0, max_donation=5000)==3300*FACTOR
+
+def test_challenge_is_lazy_view(stw, donor1, donor2):
+        """given donation controller
+        when challenge applied
+        projection follows the original until it is modified"""
+        stw.create_donor(donor1)
+        stw.create_donation(donor=donor1, amount=500)
+
+        trees = stw.challenge(3, min_donation=100)
+        assert not trees.materialized
+        assert trees.get_total_donations() == 1500
+
+        stw.create_donation(donor=donor1, amount=200)
+        assert trees.get_total_donations() == 2100
+        assert [i.amount for i in trees.find_donor(donor1).donations] == [1500, 600]
+        assert trees.find_donor(donor2) is None
+        assert not trees.materialized
+
+def test_challenge_copies_on_write(stw, donor1, donor2):
+        """given projected controller
+        when donation added to projection
+        original controller is unchanged"""
+        stw.create_donor(donor1)
+        stw.create_donation(donor=donor1, amount=500)
+
+        trees = stw.challenge(2)
+        trees.create_donor(donor2)
+        trees.create_donation(donor=donor2, amount=5)
+        assert trees.materialized
+        assert trees.get_total_donations() == 1005
+        assert stw.get_total_donations() == 500
+        assert stw.find_donor(donor2) is None
+
+        stw.create_donation(donor=donor1, amount=100)
+        assert trees.get_total_donations() == 1005
+
+def test_challenge_of_projection(stw, donor1):
+        """given projected controller
+        when challenge applied again
+        both factors are applied"""
+        stw.create_donor(donor1)
+        stw.create_donation(donor=donor1, amount=500)
+        stw.create_donation(donor=donor1, amount=50)
+
+        assert stw.challenge(2).challenge(3, min_donation=200).get_total_donations() == 3000
+
+def test_next_id_reuses_lowest_gap(stw):
+        """given donors with gaps in ids
+        when donors removed and next_id called
+        lowest free id is returned"""
+        for donor_id in (1, 2, 5, 9):
+                stw.create_donor(Donor(id=donor_id, firstname='A', lastname='B'))
+        assert stw.next_id == 3
+        stw.build_donor_from_name('Wonky', 'Donkey')
+        stw.build_donor_from_name('Fisher', 'Price')
+        assert stw.next_id == 6
+
+        stw.remove_donor(2)
+        stw.remove_donor(9)
+        assert stw.next_id == 2
+        stw.create_donor(Donor(id=2, firstname='A', lastname='B'))
+        assert stw.next_id == 6
+
+        with pytest.raises(IndexError):
+                stw.remove_donor(42)
+
+def test_build_donors_from_names(stw, donor2):
+        """given controller with one donor
+        when bulk import of names
+        ids fill gap then continue above max"""
+        stw.create_donor(donor2)
+        ids = stw.build_donors_from_names([('A', 'B'), ('C', 'D'), ('E', 'F')])
+        assert ids == [1, 3, 4]
+        assert stw.find_donor(4).fullname == 'E F'
+        assert stw.next_id == 5
+
+def test_donor_report_top(stw, donor1, donor2, capsys):
+        """given donation controller with donors
+        when report limited to top donor
+        only largest donor is printed"""
+        stw.create_donor(donor1)
+        stw.create_donation(donor=donor1, amount=500)
+        stw.create_donor(donor2)
+        stw.create_donation(donor=donor2, amount=5000)
+        capsys.readouterr()
+
+        stw.donor_report(top=1)
+        report = capsys.readouterr().out
+        assert 'Wonky Donkey' in report
+        assert 'Fisher Price' not in report
+
+def test_rollup(stw, donor1, donor2):
+        """given donors with donations over two years
+        when donations rolled up by day, month and year
+        totals across all donors are returned in date order"""
+        stw.create_donor(donor1)
+        stw.create_donor(donor2)
+        stw.create_donation(donor=donor1, amount=500, date=datetime.datetime(2018, 12, 30))
+        stw.create_donation(donor=donor2, amount=50, date=datetime.datetime(2018, 12, 30, 12))
+        stw.create_donation(donor=donor2, amount=5, date=datetime.datetime(2018, 11, 2))
+        stw.create_donation(donor=donor1, amount=7, date=datetime.datetime(2019, 1, 2))
+
+        assert list(stw.rollup('year').items()) == [(datetime.date(2018, 1, 1), 555),
+                                                    (datetime.date(2019, 1, 1), 7)]
+        assert list(stw.rollup().items()) == [(datetime.date(2018, 11, 1), 5),
+                                              (datetime.date(2018, 12, 1), 550),
+                                              (datetime.date(2019, 1, 1), 7)]
+        assert stw.rollup('day', start=datetime.date(2018, 12, 1)) == {datetime.date(2018, 12, 30): 550,
+                                                                       datetime.date(2019, 1, 2): 7}
+        assert stw.donation_total_between(datetime.date(2018, 12, 1), datetime.date(2019, 1, 1)) == 550
+        with pytest.raises(ValueError):
+                stw.rollup('week')
@@ -0,0 +1,121 @@
+"""testing the donation journal persistence"""
+
+import pytest
+from Donor import Donor
+from DonationController import DonationController, save_donation_controller
+from DonationJournal import DonationJournal, open_donation_controller
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """base path for journal and snapshot files"""
+    return tmp_path / 'stw'
+
+
+def reopen(db_path, **kwargs):
+    """loads database from disk as a fresh controller"""
+    return open_donation_controller(db_path, **kwargs)
+
+
+def test_changes_survive_reopen(db_path):
+    """given journaled controller
+    when donors and donations are added and database reopened
+    all changes are replayed"""
+    stw = open_donation_controller(db_path, name='Save The Whales')
+    stw.create_donor(Donor(id=1, firstname='Fisher', lastname='Price'))
+    stw.create_donation(donor=1, amount=500)
+    stw.build_donor_from_name('Wonky', 'Donkey')
+    stw.create_donation(donor=2, amount=5)
+    stw.create_donation(donor=2, amount=7)
+    stw.journal.close()
+
+    loaded = reopen(db_path)
+    assert loaded.name == 'Save The Whales'
+    assert loaded.get_total_donations() == 512
+    assert [i.id for i in loaded.find_donor(2).donations] == [1, 2]
+    assert loaded.next_id == 3
+
+
+def test_save_appends_single_record(db_path):
+    """given journaled controller
+    when one donation added
+    journal grows by one small record, not the whole database"""
+    stw = open_donation_controller(db_path, snapshot_every=0)
+    stw.create_donor(Donor(id=1, firstname='Fisher', lastname='Price'))
+    for _ in range(100):
+        stw.create_donation(donor=1, amount=500)
+    size = stw.journal.journal_path.stat().st_size
+    stw.create_donation(donor=1, amount=500)
+    record_size = stw.journal.journal_path.stat().st_size - size
+    assert record_size < size / 50
+
+
+def test_compaction_writes_snapshot(db_path):
+    """given journaled controller
+    when record count reaches snapshot_every
+    snapshot is written and journal emptied"""
+    stw = open_donation_controller(db_path, snapshot_every=3)
+    stw.create_donor(Donor(id=1, firstname='Fisher', lastname='Price'))
+    stw.create_donation(donor=1, amount=500)
+    stw.create_donation(donor=1, amount=50)
+    assert stw.journal.snapshot_path.exists()
+    assert stw.journal.journal_path.stat().st_size == 0
+    stw.remove_donor(1)
+    stw.build_donor_from_name('Wonky', 'Donkey')
+    stw.journal.close()
+
+    loaded = reopen(db_path)
+    assert loaded.find_donor(1).fullname == 'Wonky Donkey'
+    assert loaded.get_total_donations() == 0
+
+
+def test_torn_record_is_dropped(db_path):
+    """given journal whose last record was cut short by a crash
+    when database reopened
+    complete records are replayed and torn tail is truncated"""
+    stw = open_donation_controller(db_path, snapshot_every=0)
+    stw.create_donor(Donor(id=1, firstname='Fisher', lastname='Price'))
+    stw.create_donation(donor=1, amount=500)
+    journal_path = stw.journal.journal_path
+    stw.journal.close()
+    good_size = journal_path.stat().st_size
+    with open(journal_path, 'ab') as f:
+        f.write(b'\x00\x00\x00\x40\x12\x34')
+
+    loaded = reopen(db_path)
+    assert loaded.get_total_donations() == 500
+    assert journal_path.stat().st_size == good_size
+    loaded.create_donation(donor=1, amount=5)
+    loaded.journal.close()
+    assert reopen(db_path).get_total_donations() == 505
+
+
+def test_crash_between_snapshot_and_truncate(db_path):
+    """given snapshot written but journal not yet emptied
+    when database reopened
+    events already in the snapshot are not applied twice"""
+    journal = DonationJournal(db_path, snapshot_every=0)
+    stw = journal.open(name='Save The Whales')
+    stw.create_donor(Donor(id=1, firstname='Fisher', lastname='Price'))
+    stw.create_donation(donor=1, amount=500)
+    old_journal = journal.journal_path.read_bytes()
+    journal.compact()
+    journal.close()
+    journal.journal_path.write_bytes(old_journal)
+
+    assert reopen(db_path).get_total_donations() == 500
+
+
+def test_legacy_pickle_seeds_database(db_path, tmp_path):
+    """given database saved as whole-file pickle
+    when journaled database opened for first time
+    pickle contents are used"""
+    old = DonationController(name='Save The Whales')
+    old.create_donor(Donor(id=1, firstname='Fisher', lastname='Price'))
+    old.create_donation(donor=1, amount=500)
+    save_donation_controller(old, tmp_path / 'stw.p')
+
+    stw = reopen(db_path, legacy_database=tmp_path / 'stw.p')
+    stw.create_donation(donor=1, amount=5)
+    stw.journal.close()
+    assert reopen(db_path).get_total_donations() == 505
@@ -1,8 +1,9 @@
 """tests the donor class"""
 
+import datetime
 import pytest
 
-from Donor import Donor
+from Donor import Donor, Donation
 
 @pytest.fixture
 def example_donor():
@@ -55,3 +56,61 @@ def test_summarize_donor(example_donor):
         example_donor.add_donation(4)
         example_donor.add_donation(6)
         assert example_donor.summarize_donor() == (1, 'Bob Dod', 12, 3, 4)
+
+def test_donation_date_is_current(example_donor):
+        """given donor
+        when donations added without a date
+        each is dated when it was added, not when module was imported"""
+        before = datetime.datetime.utcnow()
+        example_donor.add_donation(10)
+        assert before <= example_donor.donations[0].date <= datetime.datetime.utcnow()
+
+def test_ledger_range_queries(example_donor):
+        """given donations added out of date order
+        when asking for a period
+        donations and totals for just that period are returned"""
+        for day, amount in [(20, 5), (3, 10), (12, 20), (28, 40), (12, 80)]:
+                example_donor.add_donation(amount, date=datetime.datetime(2018, 6, day))
+        assert [i.amount for i in example_donor.ledger.donations] == [10, 20, 80, 5, 40]
+        assert example_donor.donation_total_between(datetime.date(2018, 6, 12),
+                                                    datetime.date(2018, 6, 21)) == 105
+        assert [i.id for i in example_donor.donations_between(end=datetime.date(2018, 6, 12))] == [2]
+        assert example_donor.ledger.count(start=datetime.date(2018, 6, 13)) == 2
+        assert [i.amount for i in example_donor.ledger.last_days(10, now=datetime.date(2018, 6, 30))] == [5, 40]
+
+def test_ledger_follows_replaced_donations(example_donor):
+        """given donor whose donations are replaced, as projections do
+        when ledger queried
+        it reflects the new donations"""
+        example_donor.add_donation(10, date=datetime.datetime(2018, 1, 1))
+        assert example_donor.donation_total_between() == 10
+        example_donor.set_donations([Donation(amount=7, date=datetime.datetime(2018, 2, 1), id=1)])
+        assert example_donor.donation_total_between() == 7
+        example_donor.append_donation(Donation(amount=3, date=datetime.datetime(2017, 2, 1), id=2))
+        assert example_donor.donation_total_between(end=datetime.date(2018, 1, 1)) == 3
+        assert example_donor._donation_id == 3
+
+def test_ledger_follows_same_length_replacement(example_donor):
+        """given donations replaced by a list of the same length
+        when ledger queried
+        it is rebuilt rather than kept by length"""
+        example_donor.add_donation(10, date=datetime.datetime(2018, 1, 1))
+        example_donor.add_donation(20, date=datetime.datetime(2018, 1, 2))
+        assert example_donor.donation_total_between() == 30
+        donations = example_donor.donations
+        donations[0] = Donation(amount=100, date=datetime.datetime(2018, 1, 1), id=1)
+        example_donor.set_donations(donations)
+        assert example_donor.donation_total_between() == 120
+
+def test_ledger_version_counts_changes(example_donor):
+        """given a donor's ledger
+        when donations are added or replaced
+        the ledger bumps its own version and stays the same object"""
+        ledger = example_donor.ledger
+        assert ledger.version == 0
+        example_donor.add_donation(10, date=datetime.datetime(2018, 1, 1))
+        assert ledger.version == 1
+        example_donor.set_donations([])
+        assert example_donor.ledger is ledger
+        assert ledger.version == 2
+        assert example_donor.donation_total_between() == 0
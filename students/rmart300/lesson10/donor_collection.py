@@ -1,3 +1,4 @@
+import heapq
 import os
 from donor import Donor
 from functools import reduce
@@ -7,12 +8,34 @@ class DonorCollection(object):
     letter_directory = 'temp/'
 
     def __init__(self, donors=()):
-        # list to hold donors
-        self.donor_list = []
+        # donors keyed by full name, kept in the order they were added
+        self.donor_index = {}
 
         # build initial dictionary of donors and donation amounts
         for d in donors:
-            self.donor_list.append(d)
+            self.add_donor(d)
+
+    @property
+    def donor_list(self):
+        """ list of donors in the order they were added """
+        return list(self.donor_index.values())
+
+    def add_donor(self, donor):
+        """ add donor to the name index.  if a donor with the same full name
+            is already on file the gifts are added to that donor instead,
+            which is returned """
+        existing = self.donor_index.setdefault(str(donor), donor)
+        if existing is not donor:
+            existing.amount_list.extend(donor.amount_list)
+        return existing
+
+    def remove_donor(self, name):
+        """ remove donor by full name, raises KeyError if not found """
+        return self.donor_index.pop(name)
+
+    def find_donor(self, name):
+        """ return donor with matching full name, or None """
+        return self.donor_index.get(name)
 
     def validate_and_create_thank_you(self, name, amount):
         """ send a thank you email to the donor for donation """
@@ -22,23 +45,20 @@ class DonorCollection(object):
         except ValueError as e: 
             return 'invalid donation amount: ' + str(amount)
 
-        existing_donor = None
-        for d in self.donor_list:
-            if name == str(d):
-                existing_donor = d
-                break
-
-        if existing_donor is not None:
-            existing_donor.amount_list.append(amount)
-        else:
-            try:
-                d = Donor(name,[amount])
-            except IndexError as e:
-                return 'Could not send thank you.  The first and last name of donor must be provided\n'
-            else:
-                self.donor_list.append(d)
+        try:
+            d = Donor(name,[amount])
+        except IndexError as e:
+            return 'Could not send thank you.  The first and last name of donor must be provided\n'
+        # look up by the same key add_donor uses, so the gift is never lost
+        d = self.add_donor(d)
         return f"Hi {d}\nThank you for your donation of {amount} to the mailroom!\n"
 
+    def add_many(self, gifts):
+        """ add an iterable of (name, amount) gifts, returning the thank you
+            (or error) message for each """
+        return [self.validate_and_create_thank_you(name, amount)
+                for name, amount in gifts]
+
     def send_thank_you(self):
         """
             prompt user for name and donation amount, add to donation dictionary
@@ -49,21 +69,25 @@ class DonorCollection(object):
         while name == 'list':
             name = input("Provide full name: ").strip()
             if name == 'list':
-                for donor in self.donor_list:
+                for donor in self.donor_index.values():
                     print(donor)
 
         amount = input("Provide a donation amount:")
         thank_you_message = self.validate_and_create_thank_you(name, amount)
         print(thank_you_message)
 
-    def create_report(self):
+    def create_report(self, top=None):
 
-        """ Print a list of donors, sorted by total historical donation amount"""
+        """ Print a list of donors, sorted by total historical donation amount
+            if top is given only the top donors are ranked, using a heap """
         title = "{0:20} | {1:15} | {2:10} | {3:15}".format('Donor Name','Total Given','Num Gifts','Average Gift')
         print(title)
 
         #sort the dictionary by descending order of the sum of values
-        sorted_list = sorted(self.donor_list, key=lambda d: d.donation_total, reverse=True)
+        if top is None:
+            sorted_list = sorted(self.donor_index.values(), key=lambda d: d.donation_total, reverse=True)
+        else:
+            sorted_list = heapq.nlargest(top, self.donor_index.values(), key=lambda d: d.donation_total)
         for donor in sorted_list:
             data_row = "{0:20}  ${1:>15}   {2:>10}   ${3:>15}".format(str(donor),
                 str(donor.donation_total), str(donor.donation_count), str(donor.donation_average))
@@ -77,7 +101,7 @@ class DonorCollection(object):
             if '.txt' in f:
                 os.remove(DonorCollection.letter_directory + f)
 
-        for donor in self.donor_list:
+        for donor in self.donor_index.values():
             donation_num = 1
             for donation_amt in donor.amount_list:
                 message = f"Dear {donor.first_name} {donor.last_name},\n\n    "
@@ -108,7 +132,7 @@ class DonorCollection(object):
         self.max_value = int(input(question)) if question is not None else 0
         
 
-        for donor in self.donor_list:
+        for donor in self.donor_index.values():
             amount_list = donor.amount_list[:]
             #print(donor,"before filters",amount_list)
             amount_list = list(filter(self.greater_than_min_value, amount_list))
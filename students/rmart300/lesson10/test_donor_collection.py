@@ -2,6 +2,7 @@ from donor_collection import DonorCollection
 from donor import Donor
 import unittest
 import sys, os 
+import contextlib, io
 
 class TestDonorCollection(unittest.TestCase):
 
@@ -34,6 +35,57 @@ class TestDonorCollection(unittest.TestCase):
         
         self.assertEqual(amount_list, d.amount_list)
 
+    def test_add_many(self):
+        dc = DonorCollection([Donor(self.good_name, [500])])
+        output = dc.add_many([(self.good_name, '100'), ('Bride Frank', '50'),
+                              ('Bride Frank', self.bad_amount), ('Bride Frank', 25)])
+
+        self.assertEqual(output[0], f"Hi {self.good_name}\nThank you for your donation of 100.0 to the mailroom!\n")
+        self.assertEqual(output[2], f"invalid donation amount: {self.bad_amount}")
+        self.assertEqual(dc.find_donor(self.good_name).amount_list, [500, 100.0])
+        self.assertEqual(dc.find_donor('Bride Frank').amount_list, [50.0, 25.0])
+        self.assertEqual(len(dc.donor_list), 2)
+
+    def test_remove_donor(self):
+        dc = DonorCollection([Donor(self.good_name, [500]), Donor('Bride Frank', [50])])
+        removed = dc.remove_donor(self.good_name)
+
+        self.assertEqual(str(removed), self.good_name)
+        self.assertIsNone(dc.find_donor(self.good_name))
+        self.assertEqual([str(d) for d in dc.donor_list], ['Bride Frank'])
+        with self.assertRaises(KeyError):
+            dc.remove_donor(self.good_name)
+
+    def test_thank_you_extra_name_parts(self):
+        dc = DonorCollection([Donor('John Smith', [10])])
+        output = dc.validate_and_create_thank_you('John Smith Jr', 50)
+        self.assertEqual(output, "Hi John Smith\nThank you for your donation of 50.0 to the mailroom!\n")
+        self.assertEqual([(str(d), d.amount_list) for d in dc.donor_list], [('John Smith', [10, 50.0])])
+
+    def test_add_duplicate_donor_keeps_gifts(self):
+        dc = DonorCollection([Donor('John Smith', [10]), Donor('John Smith', [20, 30])])
+        self.assertEqual([(str(d), d.amount_list) for d in dc.donor_list], [('John Smith', [10, 20, 30])])
+
+    def test_remove_donor_keeps_order(self):
+        dc = DonorCollection([Donor(self.good_name, [500]), Donor('Bride Frank', [50]),
+                              Donor('Count Dracula', [5000])])
+        dc.remove_donor('Bride Frank')
+        dc.add_donor(Donor('Bride Frank', [25]))
+        self.assertEqual([str(d) for d in dc.donor_list],
+                         [self.good_name, 'Count Dracula', 'Bride Frank'])
+        self.assertEqual(dc.find_donor('Bride Frank').amount_list, [25])
+
+    def test_create_report_top(self):
+        dc = DonorCollection([Donor(self.good_name, [500]), Donor('Bride Frank', [50]),
+                              Donor('Count Dracula', [5000])])
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            dc.create_report(top=2)
+        lines = output.getvalue().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[1].startswith('Count Dracula'))
+        self.assertTrue(lines[2].startswith(self.good_name))
+
     def test_write_letters(self):
         dc = DonorCollection()
         donation_count = 0
@@ -193,14 +193,9 @@ def enter_name():
     amount = float(new_amount)
     date = year + "/" + month + "/" + day
 
-    # update data, pylint is throwing an Error here,
-    #   value mailroom_5_read_write_data.data
-    # is unsubscriptable if data is set to None. Canged it to {}.
+    # update data, the changed donor is appended to the data file's log
     # for more than one entry per day tobe counted the updating has to be changed
-    if date in mailroom_5_read_write_data.data[name]:
-        mailroom_5_read_write_data.data[name][date] += amount
-    else:
-        mailroom_5_read_write_data.data[name][date] = amount
+    mailroom_5_read_write_data.record_donation(name, date, amount)
 
     # send one of the existing letter from letter_templates
     letter_template = letter_templates("1")
@@ -1,26 +1,216 @@
 #!/usr/bin/env python3
 
 import os, json
+from collections.abc import MutableMapping
 
 data_file = None
 data = {}
 
+# number of changes appended to the log before the data file is rewritten
+compact_every = 1000
+
+
+class DonorData(MutableMapping):
+    """
+    dictionary {name: {date: amount}} kept in data_file
+
+    data_file:  still a json object, but written with one donor per line,
+                data_file + ".idx" holds the byte offset of every line, so a
+                donor is only read from disk the first time it is asked for
+    changes:    every changed donor is appended as one json line to
+                data_file + ".log", saving costs the same however large the
+                data file gets. After compact_every changes the log is folded
+                into a new data file, written to a temp file and renamed
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.log_file = source + ".log"
+        self.index_file = source + ".idx"
+        self.offsets = {}       # name: (offset, length) of its line in source
+        self.loaded = {}        # donors read from source or changed since
+        self.changed = set()
+        self.pending = 0        # changes in the log since the last compaction
+        self.rewrite = False    # source is not yet one donor per line
+        self.log = None
+
+        if os.path.exists(source):
+            self.read_index()
+        self.replay_log()
+        self.log = open(self.log_file, 'a')
+
+    def read_index(self):
+        """
+        uses data_file.idx if it belongs to the current data file,
+        otherwise finds the line offsets by scanning the data file once
+        """
+        size = os.path.getsize(self.source)
+        try:
+            with open(self.index_file, 'r') as infile:
+                index = json.load(infile)
+            if [index["size"], index["mtime"]] == [size, os.stat(self.source).st_mtime_ns]:
+                self.offsets = {name: tuple(pos) for name, pos in index["offsets"]}
+                return
+        except (FileNotFoundError, ValueError, KeyError):
+            pass
+
+        decoder = json.JSONDecoder()
+        with open(self.source, 'rb') as infile:
+            if infile.readline().strip() != b"{":
+                # whole dictionary on one line, as json.dump writes it
+                infile.seek(0)
+                self.loaded = json.load(infile)
+                self.changed = set(self.loaded)
+                self.rewrite = True
+                return
+            pos = infile.tell()
+            for line in infile:
+                if line.strip() not in (b"", b"}"):
+                    name = decoder.raw_decode(line.decode().strip())[0]
+                    self.offsets[name] = (pos, len(line))
+                pos += len(line)
+
+    def replay_log(self):
+        """
+        applies the changes in the log, a line cut short by a crash is
+        dropped and cut off the log
+        """
+        if not os.path.exists(self.log_file):
+            return
+        good = 0
+        with open(self.log_file, 'rb') as infile:
+            for line in infile:
+                try:
+                    name, donations = json.loads(line.decode())
+                except ValueError:
+                    break
+                good += len(line)
+                self.apply(name, donations)
+                self.pending += 1
+        if good < os.path.getsize(self.log_file):
+            os.truncate(self.log_file, good)
+
+    def apply(self, name, donations):
+        """
+        changes a donor in memory only, donations None removes the donor
+        """
+        if donations is None:
+            self.offsets.pop(name, None)
+            self.loaded.pop(name, None)
+            self.changed.discard(name)
+        else:
+            self.loaded[name] = donations
+            self.changed.add(name)
+
+    def record(self, name, donations):
+        """
+        changes a donor and appends the change to the log
+        """
+        self.apply(name, donations)
+        self.log.write(json.dumps([name, donations]) + "\n")
+        self.log.flush()
+        self.pending += 1
+        if self.pending >= compact_every:
+            self.compact()
+
+    def __getitem__(self, name):
+        if name not in self.loaded:
+            offset, length = self.offsets[name]
+            with open(self.source, 'rb') as infile:
+                infile.seek(offset)
+                line = infile.read(length).decode().strip().rstrip(",")
+            self.loaded[name] = json.loads("{" + line + "}")[name]
+        return self.loaded[name]
+
+    def __setitem__(self, name, donations):
+        self.record(name, donations)
+
+    def __delitem__(self, name):
+        if name not in self:
+            raise KeyError(name)
+        self.record(name, None)
+
+    def __contains__(self, name):
+        return name in self.loaded or name in self.offsets
+
+    def __iter__(self):
+        yield from self.offsets
+        yield from (name for name in list(self.loaded) if name not in self.offsets)
+
+    def __len__(self):
+        return len(self.offsets) + sum(1 for name in self.loaded if name not in self.offsets)
+
+    def compact(self):
+        """
+        writes a new data file and index and empties the log,
+        unchanged donors are copied over as raw lines without being parsed
+        """
+        names = list(self)
+        temp_file = self.source + ".tmp"
+        offsets = {}
+        old = None
+        if self.offsets:
+            old = open(self.source, 'rb')
+        try:
+            with open(temp_file, 'wb') as outfile:
+                outfile.write(b"{\n")
+                for count, name in enumerate(names, 1):
+                    if name in self.changed or name not in self.offsets:
+                        line = (json.dumps(name) + ": " + json.dumps(self.loaded[name])).encode()
+                    else:
+                        offset, length = self.offsets[name]
+                        old.seek(offset)
+                        line = old.read(length).rstrip(b",\r\n")
+                    line += b",\n" if count < len(names) else b"\n"
+                    offsets[name] = (outfile.tell(), len(line))
+                    outfile.write(line)
+                outfile.write(b"}\n")
+                outfile.flush()
+                os.fsync(outfile.fileno())
+        finally:
+            if old is not None:
+                old.close()
+        os.replace(temp_file, self.source)
+
+        # if this is lost the data file is scanned again on the next start
+        stat = os.stat(self.source)
+        index = {"size": stat.st_size, "mtime": stat.st_mtime_ns, "offsets": list(offsets.items())}
+        with open(self.index_file + ".tmp", 'w') as outfile:
+            json.dump(index, outfile)
+        os.replace(self.index_file + ".tmp", self.index_file)
+
+        # changes in the log are whole donors, replaying them again is harmless
+        self.log.close()
+        self.log = open(self.log_file, 'w')
+        self.offsets = offsets
+        self.changed = set()
+        self.pending = 0
+        self.rewrite = False
+
+    def close(self):
+        """
+        compacts if the log has grown or the data file has the old layout
+        """
+        if self.pending >= compact_every or self.rewrite:
+            self.compact()
+        self.log.close()
+
+
 def get_data_from(file_name):
     """
-    uses the json module to retrieve data from file as a dictionary
+    opens the donor data kept in file_name as a DonorData dictionary,
+    donors are read from the file when first used
     file_name:  file name where the data of the donors etc. can be found.
                 must be in the cwd,
     data:       expected to be in a dictionary
-                {name:(amount, times donating), etc}
+                {name:{date: amount, etc}, etc}
     """
 
     source = os.path.join(os.getcwd(), file_name)
     try:
-        with open(source, 'r') as infile:
-            # data_dict = json.load(infile)
-            data = json.load(infile)
-
-            return data
+        if not os.path.exists(source) and not os.path.exists(source + ".log"):
+            raise FileNotFoundError("No such file: " + file_name)
+        return DonorData(source)
     except FileNotFoundError as e:
         stringerror = e.args  #  stringerror will have unintended info with it
         # errno, stringerror = e.args  -  this upsets the linter
@@ -34,9 +224,25 @@ def get_data_from(file_name):
         print(message, error_encountered, stringerror, looking_for, file)
 
 
+def record_donation(name, date, amount):
+    """
+    adds amount to the donation made by name on date, new donors are added,
+    only this donor is written, appended to the log of data_file
+    """
+    global data
+    donations = dict(data.get(name, {}))
+    if date in donations:
+        donations[date] += amount
+    else:
+        donations[date] = amount
+    data[name] = donations
+
+
 def store_data():
     """
     writes data to data_file
+    changes are already in the log, this only rewrites data_file when the
+    log has grown past compact_every changes
     file_path:  abspath including file-name
     data:       dictionary
     """
@@ -44,9 +250,14 @@ def store_data():
     destination = os.path.join(os.getcwd(), data_file)
 
     try:
-        with open(destination, 'w') as outfile:
-            json.dump(data, outfile)
-            print("\nstored data in: ", data_file)
+        if not isinstance(data, DonorData):
+            plain, data = data, DonorData(destination)
+            data.offsets, data.loaded = {}, {}
+            for name, donations in plain.items():
+                data.apply(name, donations)
+            data.rewrite = True
+        data.close()
+        print("\nstored data in: ", data_file)
     except FileNotFoundError as e:
         stringerror = e.args  #  stringerror will have unintended info with it
         # errno, stringerror = e.args  -  this upsets the linter
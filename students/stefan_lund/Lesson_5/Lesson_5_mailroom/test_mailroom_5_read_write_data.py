@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+test the DonorData store in mailroom_5_read_write_data.py utilizing unittest module
+"""
+import json
+import os
+import tempfile
+import unittest
+import mailroom_5_read_write_data as rw
+from mailroom_5_read_write_data import DonorData
+
+
+
+class DonorDataTestCase(unittest.TestCase):
+    """
+    test that changes go to the log, survive reopening and that
+        compaction writes a data file donors can be read from one at a time
+    """
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.folder.name, "data.json")
+        names = {"Paul Allen": {"2018/02/03": 200, "2018/08/13": 308.42},
+                 "Jeff Bezos": {"2018/07/28": 877.33}}
+        with open(self.source, 'w') as outfile:
+            json.dump(names, outfile)
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_old_layout_is_rewritten(self):
+        """
+        a data file written by json.dump is read and rewritten one donor per line
+        """
+        data = DonorData(self.source)
+        self.assertEqual(data["Jeff Bezos"], {"2018/07/28": 877.33})
+        data.close()
+        with open(self.source, 'r') as infile:
+            self.assertEqual(len(infile.readlines()), 4)
+            infile.seek(0)
+            self.assertEqual(len(json.load(infile)), 2)
+
+    def test_save_appends_to_log(self):
+        """
+        a change adds one line to the log and leaves the data file alone
+        """
+        data = DonorData(self.source)
+        data.compact()
+        size = os.path.getsize(self.source)
+        data["Stefan Lund"] = {"2018/07/28": 12.12}
+        data["Paul Allen"] = {"2018/02/03": 400}
+        data.close()
+        self.assertEqual(os.path.getsize(self.source), size)
+        with open(data.log_file, 'r') as infile:
+            self.assertEqual(len(infile.readlines()), 2)
+
+        data = DonorData(self.source)
+        self.assertEqual(sorted(data), ["Jeff Bezos", "Paul Allen", "Stefan Lund"])
+        self.assertEqual(data["Paul Allen"], {"2018/02/03": 400})
+        self.assertNotIn("Jeff Bezos", data.loaded)
+        self.assertEqual(data["Jeff Bezos"], {"2018/07/28": 877.33})
+        data.close()
+
+    def test_compaction(self):
+        """
+        after compact_every changes the log is folded into the data file
+        and the index is used on the next start
+        """
+        old, rw.compact_every = rw.compact_every, 3
+        try:
+            data = DonorData(self.source)
+            data.compact()
+            data["Stefan Lund"] = {"2018/07/28": 12.12}
+            del data["Jeff Bezos"]
+            data["Stefan Lund"] = {"2018/07/28": 12.12, "2018/12/19": 6.13}
+            self.assertEqual(os.path.getsize(data.log_file), 0)
+            data.close()
+        finally:
+            rw.compact_every = old
+
+        with open(self.source, 'r') as infile:
+            self.assertEqual(json.load(infile), {"Paul Allen": {"2018/02/03": 200, "2018/08/13": 308.42},
+                                                 "Stefan Lund": {"2018/07/28": 12.12, "2018/12/19": 6.13}})
+        os.remove(self.source + ".idx")
+        data = DonorData(self.source)
+        self.assertEqual(data["Stefan Lund"]["2018/12/19"], 6.13)
+        self.assertEqual(len(data), 2)
+        data.close()
+
+    def test_torn_log_line(self):
+        """
+        a log line cut short by a crash is dropped
+        """
+        data = DonorData(self.source)
+        data["Stefan Lund"] = {"2018/07/28": 12.12}
+        data.log.close()
+        with open(data.log_file, 'a') as outfile:
+            outfile.write('["Mark Zuckerberg", {"2018/')
+
+        data = DonorData(self.source)
+        self.assertIn("Stefan Lund", data)
+        self.assertNotIn("Mark Zuckerberg", data)
+        data.close()
+
+    def test_record_donation(self):
+        """
+        record_donation adds to the days donation and adds new donors
+        """
+        rw.data = DonorData(self.source)
+        try:
+            rw.record_donation("Jeff Bezos", "2018/07/28", 100)
+            rw.record_donation("Stefan Lund", "2018/12/19", 6.13)
+            self.assertAlmostEqual(rw.data["Jeff Bezos"]["2018/07/28"], 977.33)
+            self.assertEqual(rw.data["Stefan Lund"], {"2018/12/19": 6.13})
+        finally:
+            rw.data.close()
+            rw.data = {}
+
+
+if __name__ == '__main__':
+    unittest.main()